@@ -315,7 +315,11 @@ class ObservableObject(models.Model):
     """
     @property
     def last_observed(self):
-        obs = self.observations.order_by('-ut_datetime').first()
+        cache = getattr(self, '_prefetched_objects_cache', {})
+        if 'observations' in cache:
+            obs = max(cache['observations'], key=lambda x: x.ut_datetime, default=None)
+        else:
+            obs = self.observations.order_by('-ut_datetime').first()
         if obs is None:
             return None
         return obs.ut_datetime
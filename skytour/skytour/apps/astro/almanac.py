@@ -1,4 +1,4 @@
-import datetime, pytz
+import bisect, datetime, pytz
 from skyfield.almanac import (
         risings_and_settings, 
         find_discrete, 
@@ -7,9 +7,10 @@ from skyfield.almanac import (
         meridian_transits,
         TWILIGHTS
     )
-from skyfield.api import wgs84, load
-from ..site_parameter.helpers import get_ephemeris
-from .time import get_0h
+from skyfield.api import wgs84
+from .ephemeris import get_eph, get_timescale
+from .time import get_0h, get_julian_date
+from ..solar_system.moon import simple_lunar_phase
 
 def get_astronomical_twilight(times, events, value, last=False, debug=False):
     """
@@ -41,14 +42,19 @@ def get_dark_time(utdt, location, as_datetime=False, debug=False):
     """
     Return the end/beginning of astronomical twilight
     """
-    ts = load.timescale()
+    ts = get_timescale()
     wgs = wgs84.latlon(location.latitude, location.longitude)
-    eph = load(get_ephemeris())
+    eph = get_eph()
     f = dark_twilight_day(eph, wgs)
     if debug:
         print(f"TS: {ts}  F: {f}")
     today = get_0h(utdt)
-    end_at, begin_at = get_almanac_times(today, ts, f, debug=debug)
+    one_day = datetime.timedelta(days=1)
+    stored = stored_events_in_windows(location, 'twilight', [(today, today + one_day), (today + one_day, today + 2 * one_day)])
+    if stored is not None:
+        end_at, begin_at = get_stored_dark_time(ts, stored)
+    else:
+        end_at, begin_at = get_almanac_times(today, ts, f, debug=debug)
     if end_at is None:
         if debug:
             print("end_at is still None - subtracting 1 day")
@@ -96,6 +102,20 @@ def get_almanac_times(today, ts, f, debug=False):
         print(begin_at)
     return end_at, begin_at
 
+def get_stored_dark_time(ts, stored):
+    """
+    get_almanac_times() from the stored twilight events for today and tomorrow.
+    """
+    end_at = begin_at = None
+    for ut, y in stored[0]:
+        if y == 0: # first time it gets dark
+            end_at = ts.from_datetime(ut)
+            break
+    for ut, y in stored[1]:
+        if y == 1: # last time it's astronomical twilight
+            begin_at = ts.from_datetime(ut)
+    return end_at, begin_at
+
 def get_events(t, y, events=None, transit=False, serialize=False, time_zone=None):
     """
     Create dict of timings for:
@@ -129,9 +149,16 @@ def get_object_rise_set(utdt, eph, target, location, serialize=False, time_zone=
     """
     Get Rise/Set times for an target from a given location.
     """
-    ts = load.timescale()
-    loc = wgs84.latlon(location.latitude, location.longitude)
+    ts = get_timescale()
     ut1 = utdt + datetime.timedelta(days=1)
+    kinds = STORED_TARGETS.get(getattr(target, 'target', None))
+    if kinds is not None:
+        risings, transits = [stored_events_in_windows(location, kind, [(utdt, ut1)]) for kind in kinds]
+        if risings is not None and transits is not None:
+            events = get_events(*_as_times(ts, risings[0]), serialize=serialize, time_zone=time_zone)
+            return get_events(*_as_times(ts, transits[0]), events=events, serialize=serialize, time_zone=time_zone, transit=True)
+
+    loc = wgs84.latlon(location.latitude, location.longitude)
     t0 = ts.utc(utdt)
     t1 = ts.utc(ut1)
 
@@ -207,10 +234,10 @@ def get_twilight_begin_end(utdt, loc, time_zone=None):
     ut0 = utdt.replace(hour=2, minute=0, second=0, microsecond=0)
     ut1 = ut0 + datetime.timedelta(days=1)
 
-    ts = load.timescale()
+    ts = get_timescale()
     t0 = ts.from_datetime(ut0)
     t1 = ts.from_datetime(ut1)
-    eph = load(get_ephemeris())
+    eph = get_eph()
     wgs = wgs84.latlon(loc.latitude, loc.longitude)
     f = dark_twilight_day(eph, wgs)
     times, events = find_discrete(t0, t1, f)
@@ -221,4 +248,188 @@ def get_twilight_begin_end(utdt, loc, time_zone=None):
         skey = 'start' if side == 'pm' else 'end'
         twilight[twi_list[e]][skey] = local_time.strftime("%I:%M %p")
 
-    return twilight
\ No newline at end of file
+    return twilight
+
+TWILIGHT_LIST = ['night', 'astro', 'nautical', 'civil', 'day']
+
+# The events kept in the stored almanac (ObservingLocationAlmanac), one
+# list of (UT, value) per kind per UT date.
+ALMANAC_EVENTS = {
+    'sun': lambda eph, loc: sunrise_sunset(eph, loc),
+    'twilight': lambda eph, loc: dark_twilight_day(eph, loc),
+    'moon': lambda eph, loc: risings_and_settings(eph, eph['moon'], loc),
+    'moon_transit': lambda eph, loc: meridian_transits(eph, eph['moon'], loc),
+}
+# get_object_rise_set() targets (by NAIF code) that can be read from it
+STORED_TARGETS = {301: ('moon', 'moon_transit')}
+
+def find_events_in_windows(ts, f, windows):
+    """
+    Run ONE find_discrete() over the span of all the windows [(start, end), ...]
+    and split the events up by window (start <= t < end).
+    Returns a list (one per window) of lists of (UT datetime, event value).
+    """
+    if len(windows) == 0:
+        return []
+    t0 = min(w[0] for w in windows)
+    t1 = max(w[1] for w in windows)
+    times, values = find_discrete(ts.from_datetime(t0), ts.from_datetime(t1), f)
+    uts = list(times.utc_datetime()) if len(times) > 0 else []
+    return split_into_windows(uts, values.tolist(), windows)
+
+def split_into_windows(uts, values, windows):
+    out = []
+    for start, end in windows:
+        i0 = bisect.bisect_left(uts, start)
+        i1 = bisect.bisect_left(uts, end)
+        out.append(list(zip(uts[i0:i1], values[i0:i1])))
+    return out
+
+def stored_events_in_windows(location, kind, windows):
+    """
+    find_events_in_windows() from the location's stored almanac.
+    Returns None if any UT date isn't there (or was computed for other coordinates).
+    """
+    if len(windows) == 0 or location is None or getattr(location, 'pk', None) is None:
+        return None
+    first = min(w[0] for w in windows).astimezone(pytz.utc).date()
+    last = (max(w[1] for w in windows).astimezone(pytz.utc) - datetime.timedelta(microseconds=1)).date()
+    rows = location.almanac_days.filter(
+        date__range=[first, last], latitude=location.latitude, longitude=location.longitude
+    ).order_by('date').values_list('events', flat=True)
+    rows = list(rows)
+    if len(rows) != (last - first).days + 1:
+        return None
+    uts, values = [], []
+    for events in rows:
+        if kind not in events:
+            return None
+        for ut, y in events[kind]:
+            uts.append(datetime.datetime.fromisoformat(ut))
+            values.append(y)
+    return split_into_windows(uts, values, windows)
+
+def get_events_in_windows(ts, eph, location, kind, windows):
+    """
+    Events of one kind (see ALMANAC_EVENTS) split up by window:
+    from the stored almanac if it's there, otherwise computed.
+    """
+    stored = stored_events_in_windows(location, kind, windows)
+    if stored is not None:
+        return stored
+    loc = wgs84.latlon(location.latitude, location.longitude)
+    return find_events_in_windows(ts, ALMANAC_EVENTS[kind](eph, loc), windows)
+
+def _as_times(ts, events):
+    if len(events) == 0:
+        return [], []
+    return ts.from_datetimes([ut for ut, _ in events]), [y for _, y in events]
+
+def fill_location_almanac(location, first, last, ts=None, eph=None):
+    """
+    Compute and store the almanac events for a location for the UT dates first...last.
+    There's one find_discrete() per kind of event for the whole span.
+    """
+    ts = get_timescale() if ts is None else ts
+    eph = get_eph() if eph is None else eph
+    loc = wgs84.latlon(location.latitude, location.longitude)
+    days = [first + datetime.timedelta(days=i) for i in range((last - first).days + 1)]
+    windows = []
+    for d in days:
+        w0 = datetime.datetime(d.year, d.month, d.day).replace(tzinfo=pytz.utc)
+        windows.append((w0, w0 + datetime.timedelta(days=1)))
+
+    found = {}
+    for kind, f in ALMANAC_EVENTS.items():
+        found[kind] = find_events_in_windows(ts, f(eph, loc), windows)
+
+    almanac_model = location.almanac_days.model
+    rows = []
+    for i, d in enumerate(days):
+        events = dict((kind, [(ut.isoformat(), y) for ut, y in found[kind][i]]) for kind in ALMANAC_EVENTS)
+        rows.append(almanac_model(
+            location = location,
+            date = d,
+            latitude = location.latitude,
+            longitude = location.longitude,
+            events = events
+        ))
+    location.almanac_days.filter(date__range=[first, last]).delete()
+    almanac_model.objects.bulk_create(rows, batch_size=500)
+    return len(rows)
+
+def refresh_location_almanac(location):
+    """
+    Recompute the stored days that were computed for other coordinates
+    (i.e., the location has been moved).
+    """
+    stale = location.almanac_days.exclude(latitude=location.latitude, longitude=location.longitude)
+    dates = stale.order_by('date').values_list('date', flat=True)
+    first, last = dates.first(), dates.last()
+    if first is None:
+        return 0
+    return fill_location_almanac(location, first, last)
+
+def _local_event(ut, time_zone):
+    local = ut.astimezone(time_zone)
+    return dict(ut=ut, local=local, local_str=local.strftime("%I:%M %p"))
+
+def get_almanac_for_dates(dates, location, time_zone=None, ts=None, eph=None):
+    """
+    Sunrise/sunset, twilight, moonrise/moonset and lunar phase for each of a list
+    of (aware) datetimes - usually consecutive midnights.
+
+    Each day gets the same values as get_sun_rise_set(), get_twilight_begin_end(),
+    get_moon_rise_set() and simple_lunar_phase() would give it, but the events come
+    from the location's stored almanac, or else one find_discrete() search per kind
+    of event for the whole range.
+    """
+    ts = get_timescale() if ts is None else ts
+    eph = get_eph() if eph is None else eph
+    one_day = datetime.timedelta(days=1)
+
+    # The same search windows the one-day functions use
+    sun_windows = [(d + datetime.timedelta(hours=2), d + datetime.timedelta(hours=26)) for d in dates]
+    twilight_windows = []
+    for d in dates:
+        w0 = d.replace(hour=2, minute=0, second=0, microsecond=0)
+        twilight_windows.append((w0, w0 + one_day))
+    moon_windows = []
+    for d in dates:
+        w0 = datetime.datetime(d.year, d.month, d.day, 2, 0).replace(tzinfo=pytz.utc)
+        moon_windows.append((w0, w0 + one_day))
+
+    sun_events = get_events_in_windows(ts, eph, location, 'sun', sun_windows)
+    twilight_events = get_events_in_windows(ts, eph, location, 'twilight', twilight_windows)
+    moon_events = get_events_in_windows(ts, eph, location, 'moon', moon_windows)
+
+    almanac = []
+    for d, sun, twi, moon in zip(dates, sun_events, twilight_events, moon_events):
+        sunrise = sunset = moonrise = moonset = None
+        for ut, y in sun:
+            if y == 1:
+                sunrise = _local_event(ut, time_zone)
+            else:
+                sunset = _local_event(ut, time_zone)
+        for ut, y in moon:
+            if y == 1:
+                moonrise = _local_event(ut, time_zone)
+            else:
+                moonset = _local_event(ut, time_zone)
+        twilight = dict((tw, dict(start=None, end=None)) for tw in TWILIGHT_LIST)
+        for ut, y in twi:
+            local_time = ut.astimezone(time_zone)
+            skey = 'end' if local_time.hour < 12 else 'start'
+            twilight[TWILIGHT_LIST[y]][skey] = local_time.strftime("%I:%M %p")
+        jd = get_julian_date(d)
+        almanac.append(dict(
+            date = d,
+            jd = jd,
+            moon = simple_lunar_phase(jd),
+            sunrise = sunrise,
+            sunset = sunset,
+            moonrise = moonrise,
+            moonset = moonset,
+            twilight = twilight
+        ))
+    return almanac
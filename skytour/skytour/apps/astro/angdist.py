@@ -1,6 +1,6 @@
 import math
-from scipy import spatial
 from ..utils.python import grid_and_transpose_list
+from .sky_index import cone_search, fudged_radius
 """
 These methods sort out finding a set of objects within an angular distance from a target.
 """
@@ -18,6 +18,8 @@ def get_neighbors(
         raw=False
     ):
     """
+    The candidates come from the shared sky index (astro.sky_index).
+
     For some reason the KDTree distances are 90 "off" for a FOV of 8°.
     I'm GUESSING it has something to do with there being a unit sphere.
     There are other weirdnessess that I can't suss out the math:
@@ -26,19 +28,9 @@ def get_neighbors(
         2. 2. * sin(FOV/2*r) / FOV = pi
     """
     object_class = object.__class__
-    other_objects = object_class.objects. exclude(pk=object.pk).order_by('catalog__slug', 'id_in_catalog')
-    radius = chord_length(fov, degrees=True) * fudge
-    coords = []
-    for other in other_objects:
-        coords.append(other.get_xyz)
-
-    center = object.get_xyz
-    tree = spatial.KDTree(coords)
-    neighbor_list = tree.query_ball_point([center], radius)
-    neighbor_objects = []
-    for idx in neighbor_list[[0][0]]:
-        if other_objects[idx] is not None:
-            neighbor_objects.append(other_objects[idx])
+    other_objects = object_class.objects.exclude(pk=object.pk).order_by('catalog__slug', 'id_in_catalog')
+    radius = fudged_radius(fov, fudge)
+    neighbor_objects = list(cone_search(object_class, object.ra_float, object.dec_float, radius, queryset=other_objects))
     
     if raw:
         return neighbor_objects
@@ -1,11 +1,8 @@
 import datetime
 from zoneinfo import ZoneInfo
-from skyfield import api
-from .almanac import get_sun_rise_set, get_moon_rise_set, get_twilight_begin_end
-from .time import get_julian_date
+from .almanac import get_almanac_for_dates
 from ..observe.models import ObservingLocation
-from ..site_parameter.helpers import find_site_parameter, get_ephemeris
-from ..solar_system.moon import simple_lunar_phase
+from ..site_parameter.helpers import find_site_parameter
 from ..misc.models import Calendar
 
 def is_leap_year(year):
@@ -133,46 +130,39 @@ def create_calendar_grid(
 
     # Get events from the Calendar model
     events = Calendar.objects.filter(date__range=[t0.date(), t1.date()]).order_by('date')
+    events_by_date = {}
+    for e in events:
+        events_by_date.setdefault(e.date, []).append(e)
     week_number = 0
     cells = []
 
-    # Set up rise/set, AT start/end
-    ts = api.load.timescale()
-    eph = api.load(get_ephemeris())
     if location_pk is None:
         location = ObservingLocation.get_default_location()
     else:
         location = ObservingLocation.objects.get(pk=location_pk)
-    loc = api.wgs84.latlon(location.latitude, location.longitude)
+
+    # Rise/set, twilight, and lunar phase for all the days at once
+    dates = [t0 + datetime.timedelta(days=i) for i in range(days_out + 1)]
+    almanac = get_almanac_for_dates(dates, location, time_zone=time_zone)
 
     # Create a list of data, one for each day shown
-    for i in range(days_out + 1):
-        tt = t0 + datetime.timedelta(days=i)
-        ee = events.filter(date=tt.date())
+    for tt, day in zip(dates, almanac):
         wd = tt.isoweekday() % 7 # Sun = 0, Sat = 6
-        jd = get_julian_date(tt)
-        moon = simple_lunar_phase(jd)
+        moon = day['moon']
         moon['phase_abbr'] = PHASE_ABBR[moon['phase']]
 
-        # sunrise, sunset
-        sunrise, sunset = get_sun_rise_set(tt, loc, ts, eph, time_zone=time_zone)
-        # AT start, end
-        twilight = get_twilight_begin_end(tt, location, time_zone=time_zone)
-        # moonrise, moonset
-        moonrise, moonset = get_moon_rise_set(tt, location, eph, time_zone=time_zone)
-
         cell_dict = dict(
             date = tt.date(),
-            events = ee,
+            events = events_by_date.get(tt.date(), []),
             day_of_week = wd,
             week = week_number,
-            jd = int(jd),
+            jd = int(day['jd']),
             moon = moon,
-            sunset = sunset,
-            sunrise = sunrise,
-            moonrise = moonrise,
-            moonset = moonset,
-            twilight = twilight
+            sunset = day['sunset'],
+            sunrise = day['sunrise'],
+            moonrise = day['moonrise'],
+            moonset = day['moonset'],
+            twilight = day['twilight']
         )
         # If the next day is a Sunday, start a new week
         if wd == 6:
@@ -206,25 +196,23 @@ def create_calendar_list(start_date, location_pk = 1, days_out = 30, time_zone =
     t1 = t0 + datetime.timedelta(days=days_out)
     out = []
 
-    # Set up rise/set, AT start/end
-    ts = api.load.timescale()
-    eph = api.load(get_ephemeris())
-    loc = api.wgs84.latlon(location.latitude, location.longitude)
+    # Rise/set, AT start/end for all the days at once
+    dates = [t0 + datetime.timedelta(days=i) for i in range(days_out + 1)]
+    almanac = get_almanac_for_dates(dates, location, time_zone=tz)
 
-    for i in range(days_out + 1):
-        tt = t0 + datetime.timedelta(days=i)
+    for tt, day in zip(dates, almanac):
         dstr = tt.strftime("%Y-%m-%d")
 
         # sunrise, sunset
-        sunrise, sunset = get_sun_rise_set(tt, loc, ts, eph, time_zone=tz)
+        sunrise, sunset = day['sunrise'], day['sunset']
         ssstr = sunset['local_str'] if sunset else 'N/A'
         srstr = sunrise['local_str'] if sunrise else 'N/A'
         # AT start, end
-        twilight = get_twilight_begin_end(tt, location, time_zone=tz)
+        twilight = day['twilight']
         atsstr = twilight['astro']['start'] if twilight['astro']['start'] else 'N/A'
         atestr = twilight['astro']['end'] if twilight['astro']['end'] else 'N/A'
         # moonrise, moonset
-        moonrise, moonset = get_moon_rise_set(tt, location, eph, time_zone=tz)
+        moonrise, moonset = day['moonrise'], day['moonset']
         msstr = moonset['local_str'] if moonset else 'N/A'
         mrstr = moonrise['local_str'] if moonrise else 'N/A'
 
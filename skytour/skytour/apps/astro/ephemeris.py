@@ -0,0 +1,75 @@
+import os
+import threading
+from skyfield.api import load
+from ..site_parameter.helpers import get_ephemeris
+
+class EphemerisRegistry:
+    """
+    Process-wide cache of opened Skyfield kernels and the timescale.
+
+    Kernels are keyed by absolute path and the file's mtime, so swapping the
+    'ephemeris-filename' site parameter (or replacing the BSP on disk) gets
+    picked up on the next call without a restart.
+    """
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._kernels = {}  # abs path -> (mtime, kernel)
+        self._timescale = None
+        self.stats = dict(loads=0, hits=0, timescale_loads=0, timescale_hits=0)
+
+    def timescale(self):
+        with self._lock:
+            if self._timescale is None:
+                self._timescale = load.timescale()
+                self.stats['timescale_loads'] += 1
+            else:
+                self.stats['timescale_hits'] += 1
+            return self._timescale
+
+    def kernel(self, path):
+        key = os.path.abspath(path)
+        try:
+            mtime = os.path.getmtime(key)
+        except OSError:
+            mtime = None # let load() raise/download as it always has
+        with self._lock:
+            cached = self._kernels.get(key)
+            if cached is not None and cached[0] == mtime:
+                self.stats['hits'] += 1
+                return cached[1]
+            kernel = load(path)
+            self._kernels[key] = (mtime, kernel)
+            self.stats['loads'] += 1
+            return kernel
+
+    def clear(self):
+        with self._lock:
+            self._kernels = {}
+            self._timescale = None
+
+    def get_stats(self):
+        with self._lock:
+            d = dict(self.stats)
+            d['kernels'] = sorted(self._kernels.keys())
+            return d
+
+REGISTRY = EphemerisRegistry()
+
+def get_timescale():
+    """
+    Shared Skyfield timescale for this process.
+    """
+    return REGISTRY.timescale()
+
+def get_eph(path=None):
+    """
+    Shared ephemeris for this process.
+    With no path, use the DE file configured in the site parameters.
+    """
+    return REGISTRY.kernel(path or get_ephemeris())
+
+def get_moon_system(planet):
+    """
+    Shared moon-system BSP for a Planet instance (Planet.bsp_file).
+    """
+    return REGISTRY.kernel(planet.bsp_file)
@@ -0,0 +1,74 @@
+import math
+import threading
+import numpy as np
+from scipy import spatial
+
+"""
+Persistent cone-search index over objects with RA/Dec.
+
+One KD-tree of unit vectors per model (DSO, DSOInField, BrightStar,
+VariableStar...), built the first time it's needed and thrown away by the
+post_save/post_delete receivers in the models when a row changes.
+"""
+
+class SkyIndex:
+    def __init__(self, pks, ra, dec):
+        self.pks = np.asarray(pks)
+        ra = np.radians(np.asarray(ra, dtype=float) * 15.)
+        dec = np.radians(np.asarray(dec, dtype=float))
+        self.xyz = np.column_stack([np.cos(dec) * np.cos(ra), np.cos(dec) * np.sin(ra), np.sin(dec)])
+        self.tree = spatial.KDTree(self.xyz) if len(self.pks) > 0 else None
+
+    def __len__(self):
+        return len(self.pks)
+
+    def cone(self, ra, dec, radius):
+        """
+        PKs of the objects within radius (degrees) of ra (hours), dec (degrees).
+        """
+        if self.tree is None:
+            return []
+        xra = math.radians(ra * 15.)
+        xdec = math.radians(dec)
+        center = [math.cos(xdec) * math.cos(xra), math.cos(xdec) * math.sin(xra), math.sin(xdec)]
+        chord = 2. * math.sin(math.radians(min(radius, 180.)) / 2.)
+        idx = self.tree.query_ball_point(center, chord)
+        return self.pks[idx].tolist()
+
+_lock = threading.Lock()
+_indexes = {}
+
+def get_sky_index(model):
+    """
+    The index for a model class, building it if needed.
+    """
+    key = model._meta.label
+    with _lock:
+        index = _indexes.get(key)
+        if index is None:
+            rows = model.objects.filter(ra__isnull=False, dec__isnull=False).values_list('pk', 'ra', 'dec')
+            pks, ra, dec = zip(*rows) if rows else ([], [], [])
+            index = SkyIndex(pks, ra, dec)
+            _indexes[key] = index
+        return index
+
+def invalidate_sky_index(model):
+    with _lock:
+        _indexes.pop(model._meta.label, None)
+
+def cone_search(model, ra, dec, radius, queryset=None):
+    """
+    Queryset of the objects within radius (degrees) of ra (hours), dec (degrees).
+    Pass a queryset to keep its filters/ordering.
+    """
+    pks = get_sky_index(model).cone(ra, dec, radius)
+    queryset = model.objects.all() if queryset is None else queryset
+    return queryset.filter(pk__in=pks)
+
+def fudged_radius(fov, fudge):
+    """
+    The angular radius (degrees) that the old KDTree lookups actually used:
+    a chord of 2 sin(fov/2) * fudge on a sphere of radius 180.
+    """
+    x = min(1., math.sin(math.radians(fov) / 2.) * fudge / 180.)
+    return math.degrees(2. * math.asin(x))
@@ -0,0 +1,170 @@
+import math
+import threading
+from django.db import OperationalError, connection, transaction
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+"""
+Spatial table of RA/Dec positions, in the database.
+
+For each model with positions (SKY_TABLE_MODELS) there's a table of
+(id, ra_min, ra_max, dec_min, dec_max) next to the model's own: an SQLite
+R*Tree virtual table if the SQLite build has the module, else a plain table
+indexed on Dec.   Points are stored as boxes with min = max.
+
+sky_box_filter() and sky_cone_filter() turn an RA/Dec box (RA in hours, which
+may cross 0h) or a cone into a queryset filter that looks the PKs up in that
+table rather than scanning the model's table.   (Use astro.sky_index for
+repeated in-memory cone searches while drawing charts.)
+
+The table is made (and filled) the first time it's needed, kept up to date
+by the post_save/post_delete receivers in the models, and can be rebuilt with
+the rebuild_sky_tables management command.
+"""
+
+SKY_TABLE_MODELS = ['dso.DSO', 'dso.DSOInField', 'stars.BrightStar', 'stars.VariableStar']
+
+_lock = threading.Lock()
+_ready = set()
+
+def sky_table_name(model):
+    return f"{model._meta.db_table}_sky"
+
+def create_sky_table(model):
+    """
+    Make the table if it's not there: an R*Tree if possible.
+    """
+    table = sky_table_name(model)
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            try:
+                with transaction.atomic():
+                    cursor.execute(
+                        f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} "
+                        "USING rtree(id, ra_min, ra_max, dec_min, dec_max)"
+                    )
+                return table
+            except OperationalError: # no R*Tree module in this SQLite
+                pass
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} "
+            "(id integer PRIMARY KEY, ra_min real, ra_max real, dec_min real, dec_max real)"
+        )
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {table}_dec ON {table} (dec_min, ra_min)")
+    return table
+
+def rebuild_sky_table(model):
+    """
+    Refill the table from the model's positions: returns the number of rows.
+    """
+    table = create_sky_table(model)
+    rows = model.objects.filter(ra__isnull=False, dec__isnull=False).values_list('pk', 'ra', 'dec')
+    rows = [(pk, ra, ra, dec, dec) for pk, ra, dec in rows]
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table}")
+        cursor.executemany(
+            f"INSERT INTO {table} (id, ra_min, ra_max, dec_min, dec_max) VALUES (%s, %s, %s, %s, %s)", rows)
+    return len(rows)
+
+def ensure_sky_table(model):
+    """
+    The table for a model, making and filling it if needed.
+    """
+    key = model._meta.label
+    table = sky_table_name(model)
+    if key in _ready:
+        return table
+    with _lock:
+        create_sky_table(model)
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT 1 FROM {table} LIMIT 1")
+            empty = cursor.fetchone() is None
+        if empty:
+            rebuild_sky_table(model)
+    # Only trust it once it's committed (a rolled-back transaction takes the table with it)
+    transaction.on_commit(lambda: _ready.add(key))
+    return table
+
+def store_sky_position(model, instance):
+    """
+    Put an object's position in the table (or take it out if it has none).
+    """
+    table = ensure_sky_table(model)
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table} WHERE id = %s", [instance.pk])
+        if instance.ra is not None and instance.dec is not None:
+            cursor.execute(
+                f"INSERT INTO {table} (id, ra_min, ra_max, dec_min, dec_max) VALUES (%s, %s, %s, %s, %s)",
+                [instance.pk, instance.ra, instance.ra, instance.dec, instance.dec]
+            )
+
+def remove_sky_position(model, pk):
+    table = ensure_sky_table(model)
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table} WHERE id = %s", [pk])
+
+def ra_ranges(ra_low, ra_high):
+    """
+    The RA range(s) in hours: ra_low > ra_high crosses 0h, so is split in two.
+    """
+    if ra_low is None or ra_high is None:
+        return [None]
+    ra_low, ra_high = float(ra_low), float(ra_high)
+    if ra_low < ra_high:
+        return [(ra_low, ra_high)]
+    if ra_low == ra_high: # the old filter took this as the whole sky
+        return [None]
+    return [(ra_low, 24.), (0., ra_high)]
+
+def sky_box_filter(queryset, ra_low=None, ra_high=None, dec_low=None, dec_high=None):
+    """
+    Filter to the objects with ra_low <= RA <= ra_high (hours) and dec_low <= Dec <= dec_high (degrees).
+    If ra_low > ra_high the box crosses 0h.   Leave a limit out (None) to not limit on it.
+    """
+    ranges = ra_ranges(ra_low, ra_high)
+    dec_low = -90. if dec_low is None else float(dec_low)
+    dec_high = 90. if dec_high is None else float(dec_high)
+    table = ensure_sky_table(queryset.model)
+
+    selects, params = [], []
+    for ra_range in ranges:
+        sql = f"SELECT id FROM {table} WHERE dec_max >= %s AND dec_min <= %s"
+        params += [dec_low, dec_high]
+        if ra_range is not None:
+            sql += " AND ra_max >= %s AND ra_min <= %s"
+            params += list(ra_range)
+        selects.append(sql)
+    queryset = queryset.filter(pk__in=RawSQL(" UNION ALL ".join(selects), params))
+
+    # R*Tree coordinates are 32-bit and rounded outwards: check the edges exactly
+    # (only on the rows the table found)
+    queryset = queryset.filter(dec__gte=dec_low, dec__lte=dec_high)
+    if ranges != [None]:
+        q = Q()
+        for low, high in ranges:
+            q |= Q(ra__gte=low, ra__lte=high)
+        queryset = queryset.filter(q)
+    return queryset
+
+def sky_cone_filter(queryset, ra, dec, radius):
+    """
+    Filter to the objects within radius (degrees) of ra (hours), dec (degrees):
+    the table finds the ones in the cone's bounding box, then the distance is checked on those.
+    """
+    dec_low, dec_high = max(-90., dec - radius), min(90., dec + radius)
+    if radius >= 90. or dec_low <= -90. or dec_high >= 90.:
+        ra_low = ra_high = None # a pole's in the cone
+    else:
+        half = math.degrees(math.asin(math.sin(math.radians(radius)) / math.cos(math.radians(dec)))) / 15.
+        ra_low, ra_high = (ra - half) % 24., (ra + half) % 24.
+    box = sky_box_filter(queryset.model.objects.all(), ra_low, ra_high, dec_low, dec_high)
+
+    xra, xdec = math.radians(ra * 15.), math.radians(dec)
+    limit = math.cos(math.radians(min(radius, 180.)))
+    pks = []
+    for pk, ora, odec in box.values_list('pk', 'ra', 'dec'):
+        ora, odec = math.radians(ora * 15.), math.radians(odec)
+        cos_d = math.sin(xdec) * math.sin(odec) + math.cos(xdec) * math.cos(odec) * math.cos(ora - xra)
+        if cos_d >= limit - 1.e-12:
+            pks.append(pk)
+    return queryset.filter(pk__in=pks)
@@ -1,4 +1,5 @@
 import math
+import numpy as np
 from .time import get_last
 from ..utils.format import to_sex
 
@@ -37,6 +38,34 @@ def get_alt_az(utdt, latitude, longitude, ra, dec, from_south=False, debug=False
 
     return azimuth, altitude, airmass
 
+def get_alt_az_array(last, latitude, ra, dec, from_south=False):
+    """
+    Array version of get_alt_az() for many objects at once.
+    last is the local apparent sidereal time (hours), ra (hours) and dec (degrees)
+    are numpy arrays.   Airmass is NaN for objects below the horizon.
+    """
+    xha = np.radians((last - ra) * 15.)
+    xlat = math.radians(latitude)
+    xdec = np.radians(dec)
+    denom = np.cos(xha) * math.sin(xlat) - np.tan(xdec) * math.cos(xlat)
+    azimuth = np.degrees(np.arctan2(np.sin(xha), denom)) % 360.
+    sin_alt = math.sin(xlat) * np.sin(xdec) + math.cos(xlat) * np.cos(xdec) * np.cos(xha)
+    altitude = np.degrees(np.arcsin(np.clip(sin_alt, -1., 1.)))
+
+    if not from_south: # measure from north - default
+        azimuth = (azimuth + 180.) % 360.
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        airmass = np.where(altitude > 0., 1. / np.cos(np.radians(90. - altitude)), np.nan)
+    return azimuth, altitude, airmass
+
+def get_hour_angle_array(last, ra):
+    """
+    Array version of get_hour_angle(), given LAST (hours).
+    """
+    ha = last - ra
+    return np.where(ha < 12.0, ha, ha - 24.)
+
 def get_hour_angle(utdt, longitude, ra):
     last = get_last(utdt, longitude)
     ha = last - ra
@@ -1,6 +1,18 @@
 import math
+import threading
+from django.apps import apps
 from  ..astro.utils import get_sep
-from .models import AtlasPlate
+
+"""
+Atlas plate geometry: the plate centers and which plates neighbor which.
+
+The centers are fixed (see plate_list()), so they're computed once.   The
+neighbors of every plate (regular and special), with their separation, PA and
+row/column in the neighbor layout, are computed the first time they're needed
+(PlateGraph, one per neighbor limit) along with the plate objects themselves,
+so plate pages and atlas rendering don't query per neighbor.   The graph is
+thrown away by the receivers in dso.models when a plate is added, removed or moved.
+"""
 
 def get_position_angle(ra1, dec1, ra2, dec2):
     """
@@ -25,13 +37,12 @@ def get_relative_positions(p1, p2):
     """
     Return the relative positions (sep, PA) between two AtlasPlate instances.
     """
-    plates = plate_list()
-    pp1 = plates[p1]
-    pp2 = plates[p2]
+    pp1 = PLATE_CENTERS[p1]
+    pp2 = PLATE_CENTERS[p2]
     p1_dec = math.radians(pp1[1])
     p1_ra = math.radians(pp1[0] * 15.)
     p2_dec = math.radians(pp2[1])
-    p2_ra = math.radians(pp1[0] * 15.)
+    p2_ra = math.radians(pp2[0] * 15.)
     
     # angular separation
     sep = get_sep(p1_ra, p1_dec, p2_ra, p2_dec)
@@ -54,37 +65,49 @@ def sign(x):
         return 1.
     return 0
 
-def find_neighbors(my_ra, my_dec, limit=20.):
+def neighbor_positions(my_ra, my_dec, limit=20.):
     """
-    Find all neighbors to an AtlasPlate instance, i.e., all plates that overlap.
-    This fails for plates 1 and 258 because all the neighbors end up in the same place.
-    That's because abs(dec) == 90 and so tan(dec) is ∞.
+    The plates within limit (degrees) of my_ra (hours), my_dec (degrees), in plate order:
+    [(plate_id, sep, pa, xdist), ...].   Geometry only.
     """
-    plate_dict = plate_list()
-    plate_keys = plate_dict.keys()
     my_ra = math.radians(my_ra * 15.)
     my_dec = math.radians(my_dec)
-
     neighbors = []
-    for plate in plate_keys:
-        ra = math.radians(plate_dict[plate][0] * 15.)
-        dec = math.radians(plate_dict[plate][1])
+    for plate, (ra, dec) in PLATE_CENTERS.items():
+        ra = math.radians(ra * 15.)
+        dec = math.radians(dec)
         sep = get_sep(my_ra, my_dec, ra, dec)
         pa = get_position_angle(my_ra, my_dec, ra, dec)
         # Create an index based on the sep and pa
         xdist = sep * sign(pa)
         if sep < limit:
-            pobj = AtlasPlate.objects.get(plate_id=plate)
-            p = dict(
-                plate=plate,
-                obj = pobj,
-                sep = sep,
-                pa = pa,
-                ra = pobj.center_ra,
-                dec = pobj.center_dec,
-                xdist = xdist
-            )
-            neighbors.append(p)
+            neighbors.append((plate, sep, pa, xdist))
+    return neighbors
+
+def find_neighbors(my_ra, my_dec, limit=20.):
+    """
+    Find all neighbors to a position, i.e., all plates that overlap.
+    This fails for plates 1 and 258 because all the neighbors end up in the same place.
+    That's because abs(dec) == 90 and so tan(dec) is ∞.
+
+    For an atlas plate's own neighbors, use plate_neighbor_rows().
+    """
+    plates = get_plate_graph(limit).plates
+    neighbors = []
+    for plate, sep, pa, xdist in neighbor_positions(my_ra, my_dec, limit=limit):
+        pobj = plates.get(plate)
+        if pobj is None: # not in the database (yet)
+            continue
+        p = dict(
+            plate=plate,
+            obj = pobj,
+            sep = sep,
+            pa = pa,
+            ra = pobj.center_ra,
+            dec = pobj.center_dec,
+            xdist = xdist
+        )
+        neighbors.append(p)
     return neighbors
 
 def find_neighbors_from_qs(qs):
@@ -115,7 +138,7 @@ def assemble_neighbors(plist):
     plates_in_row = []
     row_dec = None
     for p in plist:
-        dec = p['obj'].center_dec
+        dec = p['dec']
         if row_dec is None:
             row_dec = dec
         if dec != row_dec: # start new row
@@ -130,7 +153,7 @@ def assemble_neighbors(plist):
         rows.append(z) # use sorted here
     return rows
 
-def plate_list():
+def build_plate_list():
     """
     Create the canonical list of plates based on their defined (RA, Dec) centers,
     since they're defined algorithmically.
@@ -156,4 +179,102 @@ def plate_list():
             j += 1
     return plate
 
+PLATE_CENTERS = build_plate_list()
 
+def plate_list():
+    """
+    {plate_id: (RA, Dec)} for the 258 plates.   (Shared: don't change it.)
+    """
+    return PLATE_CENTERS
+
+def number_neighbor_rows(rows):
+    """
+    Give each neighbor in assemble_neighbors() rows its row and column (from 0).
+    """
+    for row_number, row in enumerate(rows):
+        for column, n in enumerate(row):
+            n['row'] = row_number
+            n['column'] = column
+    return rows
+
+class PlateGraph:
+    """
+    The neighbors of every atlas plate (and special plate) within limit degrees,
+    laid out as assemble_neighbors() does: each neighbor dict also has its row and column.
+    """
+    def __init__(self, limit):
+        self.limit = limit
+        AtlasPlate = apps.get_model('dso', 'AtlasPlate')
+        AtlasPlateSpecial = apps.get_model('dso', 'AtlasPlateSpecial')
+        self.plates = AtlasPlate.objects.in_bulk(field_name='plate_id')
+        self.specials = AtlasPlateSpecial.objects.in_bulk(field_name='plate_id')
+        self.rows = {}      # (kind, plate_id): [[neighbor, ...], ...]
+        self.centers = {}   # (kind, plate_id): (RA, Dec) the neighbors were found for
+        for kind, plates in [('plate', self.plates), ('special', self.specials)]:
+            for plate_id, plate in plates.items():
+                self.add(kind, plate)
+
+    def add(self, kind, plate):
+        neighbors = []
+        for plate_id, sep, pa, xdist in neighbor_positions(plate.center_ra, plate.center_dec, limit=self.limit):
+            pobj = self.plates.get(plate_id)
+            if pobj is None: # not in the database (yet)
+                continue
+            neighbors.append(dict(
+                plate=plate_id,
+                obj = pobj,
+                sep = sep,
+                pa = pa,
+                ra = pobj.center_ra,
+                dec = pobj.center_dec,
+                xdist = xdist
+            ))
+        rows = number_neighbor_rows(assemble_neighbors(neighbors))
+        key = (kind, plate.plate_id)
+        self.rows[key] = rows
+        self.centers[key] = (plate.center_ra, plate.center_dec)
+
+    def key(self, plate):
+        kind = 'special' if plate._meta.model_name == 'atlasplatespecial' else 'plate'
+        return (kind, plate.plate_id)
+
+    def neighbor_rows(self, plate):
+        """
+        The plate's neighbors as assemble_neighbors() rows, or None if it isn't in the graph.
+        """
+        return self.rows.get(self.key(plate))
+
+    def has_moved(self, plate):
+        center = self.centers.get(self.key(plate))
+        return center is None or center != (plate.center_ra, plate.center_dec)
+
+_lock = threading.Lock()
+_graphs = {}
+
+def get_plate_graph(limit=20.):
+    """
+    The neighbor graph for a limit, building it if needed.
+    """
+    with _lock:
+        graph = _graphs.get(limit)
+        if graph is None:
+            graph = PlateGraph(limit)
+            _graphs[limit] = graph
+        return graph
+
+def plate_neighbor_rows(plate, limit=20.):
+    """
+    The neighbors of an AtlasPlate/AtlasPlateSpecial, as assemble_neighbors() rows.
+    """
+    rows = get_plate_graph(limit).neighbor_rows(plate)
+    if rows is None: # not saved yet, or added by another process since the graph was built
+        rows = number_neighbor_rows(assemble_neighbors(find_neighbors(plate.center_ra, plate.center_dec, limit=limit)))
+    return rows
+
+def invalidate_plate_graph(plate=None):
+    """
+    Throw the graphs away: all of them, or just if this plate is new or has moved.
+    """
+    with _lock:
+        if plate is None or any(graph.has_moved(plate) for graph in _graphs.values()):
+            _graphs.clear()
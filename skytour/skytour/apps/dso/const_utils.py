@@ -1,34 +1,46 @@
-from django.db.models import Q
+from ..plotting.geometry import PackedLines, get_geometry
 from ..utils.models import Constellation, ConstellationBoundaries, ConstellationVertex
 from .models import AtlasPlate
 
+def load_boundaries():
+    """
+    All of the constellation boundary line segments, packed, and for each
+    constellation (pk) the indices of the segments that touch its vertices.
+    """
+    lines = {}
+    rows = ConstellationBoundaries.objects.order_by('pk').values_list('start_vertex', 'end_vertex', 'ra', 'dec')
+    for v1, v2, ra, dec in rows:
+        lines.setdefault((v1, v2), []).append((ra, dec))
+
+    vertex_constellations = {}
+    through = ConstellationVertex.constellation.through.objects.values_list('constellationvertex_id', 'constellation_id')
+    for vertex, constellation in through:
+        vertex_constellations.setdefault(vertex, set()).add(constellation)
+
+    by_constellation = {}
+    for i, (v1, v2) in enumerate(lines.keys()):
+        for constellation in vertex_constellations.get(v1, set()) | vertex_constellations.get(v2, set()):
+            by_constellation.setdefault(constellation, []).append(i)
+    return PackedLines.from_segments(list(lines.values())), by_constellation
+
 def get_boundary_lines(identifier, model_type='plate'):
     """
     Get all of the constellation boundaries seen on a plate.
     This is slightly optimized: it uses the list of known constellations on the plate,
-    and only returns the lines relevant to them.   
+    and only returns the lines relevant to them.
+    Returns (PackedLines, number of points).
     """
     if model_type == 'plate':
         plate = AtlasPlate.objects.get(plate_id=identifier)
         # get constellations on plate
-        const_list = plate.constellation.all()
+        const_list = plate.constellation.values_list('pk', flat=True)
     else:
         constellation = Constellation.objects.get(abbreviation=identifier.upper())
-        const_list = constellation.neighbors.all()
+        const_list = constellation.neighbors.values_list('pk', flat=True)
 
-    # get vertices for these constellations
-    verts = ConstellationVertex.objects.filter(constellation__in=const_list)
-    vert_list = verts.values_list('pk', flat=True)
-    # get boundary line segments
-    segments = ConstellationBoundaries.objects.filter(Q(start_vertex__in=vert_list) | Q(end_vertex__in=vert_list))
-    lines = {}
-    p = 0
-    for seg in segments:
-        v1 = seg.start_vertex
-        v2 = seg.end_vertex
-        t = tuple([v1, v2])
-        if t not in lines.keys():
-            lines[t] = []
-        lines[t].append(tuple([seg.ra, seg.dec]))
-        p += 1
-    return lines, p
\ No newline at end of file
+    boundaries, by_constellation = get_geometry('boundaries', load_boundaries)
+    indices = set()
+    for pk in const_list:
+        indices.update(by_constellation.get(pk, []))
+    lines = boundaries.subset(sorted(indices))
+    return lines, len(lines.ra)
@@ -7,14 +7,19 @@ import time
 
 from matplotlib import pyplot as plt
 from matplotlib.backends.backend_agg import FigureCanvasAgg as FigureCanvas
-from matplotlib import patches
 
-from skyfield.api import Star, load
+from skyfield.api import Star
 from skyfield.projections import build_stereographic_projection
 
+from ..astro.ephemeris import get_eph, get_timescale
+from ..astro.sky_index import cone_search
+from ..plotting.backgrounds import draw_background
+from ..plotting.render_cache import render_cached
 from ..plotting.map import *
-from ..site_parameter.helpers import find_site_parameter, get_ephemeris
+from ..site_parameter.helpers import find_site_parameter
+from ..utils.files import atomic_file
 from .models import DSO
+from .symbols import DSOSymbols, add_chart_labels
 # Circular import issue...  Sigh.
 from .const_utils import get_boundary_lines
 
@@ -26,9 +31,9 @@ def d2r(a): # a is a numpy.array
 
 def plot_other_dsos(
         ax, other_dso_records, projection, earth, t, 
-        limit, times, reversed=False, in_field=False, fov_type='narrow'):
+        limit, times, reversed=False, in_field=False, fov_type='narrow', cull_labels=False):
     
-    other_dsos = {'x': [], 'y': [], 'label': [], 'marker': []}
+    other_dsos = {'x': [], 'y': [], 'label': []}
 
     if fov_type == 'wide':
         default_size = 8.0
@@ -38,6 +43,7 @@ def plot_other_dsos(
         min_size = 1.0
 
     max_size = 30
+    symbols = DSOSymbols(reversed=reversed)
     for other in other_dso_records:
         x, y = projection(earth.at(t).observe(other.skyfield_object))
         if abs(x) > limit or abs(y) > limit:
@@ -45,34 +51,20 @@ def plot_other_dsos(
         other_dsos['x'].append(x)
         other_dsos['y'].append(y)
         other_dsos['label'].append(other.label_on_chart)
-        other_dsos['marker'].append(other.object_type.marker_type)
         # Kludge for nebulae:
         if other.object_type.map_symbol_type in ['square', 'gray-square', 'two-squares']: 
             if min_size < 2.0:
                 min_size = 2.0
-        ax = plot_dso(ax, x, y, other, alpha=0.6, 
-            default_size=default_size, max_size=max_size, min_size=min_size,
-            reversed=reversed
+        symbols.add(x, y, other, alpha=0.6, 
+            default_size=default_size, max_size=max_size, min_size=min_size
         )
-    xxx = np.array(other_dsos['x'])
-    yyy = np.array(other_dsos['y'])
-    for x, y, z in zip(xxx, yyy, other_dsos['label']):
-        if not in_field:
-            plt.annotate(
-                z, (x, y), 
-                textcoords='offset points',
-                xytext=(5, 5),
-                ha='left',
-                fontsize='x-small'
-            )
-        else:
-            plt.annotate(
-                z, (x, y),
-                textcoords='offset points',
-                xytext=(-5, -5),
-                ha='right',
-                fontsize='xx-small'
-            )
+    ax = symbols.draw(ax)
+    if not in_field:
+        add_chart_labels(ax, other_dsos['x'], other_dsos['y'], other_dsos['label'],
+            offset=(5, 5), ha='left', fontsize='x-small', cull=cull_labels)
+    else:
+        add_chart_labels(ax, other_dsos['x'], other_dsos['y'], other_dsos['label'],
+            offset=(-5, -5), ha='right', fontsize='xx-small', cull=cull_labels)
     times.append((time.perf_counter(), 'Other DSOs'))
     return ax, times
 
@@ -89,128 +81,17 @@ def plot_dso(ax, x, y, dso,
     Put a DSO on the map with custom markers related to the object type.
     Scale the marker to the size and orientation of the object, if it's not
     too small (or large).
+    (For many DSOs, use DSOSymbols directly: see dso/symbols.py)
     """
-    oangle = dso.orientation_angle or 0
-    ft = dso.object_type.map_symbol_type
-
-    default_size = default_size if default_size else min_size
-    amajor = dso.major_axis_size if dso.major_axis_size is not None else default_size
-    amajor = amajor if amajor != 0 else default_size
-    aminor = amajor if dso.minor_axis_size is None or dso.minor_axis_size == 0 else dso.minor_axis_size
-    
-    # Kludge for nebulae:
-    if dso.object_type.map_symbol_type in ['square', 'gray-square', 'two-squares']: 
-        if min_size < 2.0:
-            min_size = 2.0
-
-    if debug:
-        print(f"DSO: {dso} {dso.major_axis_size} x {dso.minor_axis_size} D: {default_size} 0: {min_size}")
-
-    ratio = aminor / amajor
-    if amajor < min_size:
-        if debug:
-            print("\t TOO SMALL")
-        amajor = min_size
-        aminor = min_size * ratio
-    if amajor > max_size:
-        if debug:
-            print("\t TOO BIG")
-        amajor = max_size
-        aminor = max_size * ratio
-    if debug:
-        print(f"\t finally {amajor} x {aminor}")
-
-    # Deal with size
-    amajor *= 2.909e-4
-    aminor *= 2.909e-4
-    # 6. Also, rotate by the position angle where appropriate.
-    angle = oangle
-    umajor = amajor / 2.
-    uminor = aminor / 2.
-    
-    #if amajor < size_limit or aminor < size_limit: # if it's too small put the marker there instead
-    #    ft = 'marker'
-
-    #('marker', 'Marker'),                               # default - star like things, or unknown
-    #('ellipse', 'Ellipse'),                             # galaxies - maybe not irregular
-    #('open-circle', 'Open Circle'),                     # open clusters, associations
-    #('gray-circle', 'Gray Circle'),                     # globular clusters
-    #('circle-square', 'Circle in Square'),              # planetary nebulae
-    #('square', 'Open Square'),                          # Emission Nebulae
-    #('gray-square', 'Gray Square'),                     # Dark Nebulae
-    #('circle-gray-square', 'Circle in Gray Square')     # cluster w/ nebulosity
-
-    if ft == 'ellipse': # galaxies
-        color = '#99f' if 'barred' in dso.object_type.slug.lower() else '#f00'
-        color = '#c6f' if 'ellip' in dso.object_type.slug.lower() else color
-        color = '#c6f' if 'lenti' in dso.object_type.slug.lower() else color
-        color = '#09f' if 'dwarf' in dso.object_type.slug.lower() else color
-        color = '#c69' if 'irreg' in dso.object_type.slug.lower() else color
-        e1 = patches.Ellipse((x, y), uminor, umajor, angle=angle, fill=True, color=color, alpha=alpha)
-        e2 = patches.Ellipse((x, y), uminor, umajor, angle=angle, fill=False, color='#999')
-        ax.add_patch(e1)
-        ax.add_patch(e2)
-
-    elif ft in ['open-circle', 'gray-circle', 'circle-plus']: # clusters
-        color = '#999' if ft == 'gray-circle' else '#ff0'
-        color = '#4fd' if 'young' in dso.object_type.slug.lower() else color # exception for YPCs
-        radius = umajor / 2.  # Why?  I don't know but the circles are always to large
-        c1 = patches.Circle((x, y), radius, fill=True, color=color, alpha=alpha)
-        r_color = '#fff' if reversed else '#000'
-        c2 = patches.Circle((x, y), radius, fill=False, color=r_color)
-        if ft == 'circle-plus':
-            cp_color = '#ccc' if reversed else '#000'
-            ax.vlines(x, y-radius, y+radius, color=cp_color)
-            ax.hlines(y, x-radius, x+radius, color=cp_color)
-        ax.add_patch(c1)
-        ax.add_patch(c2)
-
-    elif ft in ['square', 'gray-square', 'circle-square', 'circle-gray-square', 'two-squares']: # UGH - the center point is the lower-left corner
-        # angle of the rectangle, rotated by the orientation angle + 180 degrees to get its opposite
-        theta = angle + math.degrees(math.atan2(aminor, amajor)) + 180.
-        r = math.sqrt(umajor*umajor + uminor*uminor)/2.
-        dx = r * math.cos(math.radians(theta))
-        dy = r * math.sin(math.radians(theta))
-        if ft in ['square', 'gray-square']:
-            color = '#6f6' if ft == 'square' else '#999'
-            r1 = patches.Rectangle((x + dx, y + dy), umajor, uminor, fill=True, color=color, angle=angle, alpha=alpha)
-            r2 = patches.Rectangle((x + dx, y + dy), umajor, uminor, fill=False, color='#000', angle=angle)
-            ax.add_patch(r1)
-            ax.add_patch(r2)
-        elif ft == 'two-squares':
-            color = '#c0c'
-            r1 = patches.Rectangle((x + dx, y + dy ), umajor, uminor, fill=True, color=color, angle=angle, alpha=alpha/2.)
-            r2 = patches.Rectangle((x + dx, y + dy ), umajor, uminor, fill=False, color=color, angle=angle)
-            ax.add_patch(r1)
-            ax.add_patch(r2)
-        else:
-            color = '#6f6' if ft == 'circle-square' else '#999'
-            r1 = patches.Rectangle((x + dx, y + dy), umajor, uminor, fill=True, color=color, angle=angle, alpha=alpha)
-            r2 = patches.Rectangle((x + dx, y + dy), umajor, uminor, fill=False, color='k', angle=angle)
-            c1 = patches.Circle((x, y), uminor, fill=True, color='#fff', alpha=alpha*.5)
-            c2 = patches.Circle((x, y), uminor, fill=False, color='#000')
-            ax.add_patch(r1)
-            ax.add_patch(r2)
-            ax.add_patch(c1)
-            ax.add_patch(c2)
-
-    elif ft in ('two-circles'):
-        ccolor = '#3fc' if reversed else '#3c9'
-        radius = umajor / 2.
-        c1 = patches.Circle((x, y), radius, fill=False, color=ccolor)
-        c2 = patches.Circle((x, y), 0.75 * radius, fill=False, color=ccolor)
-        ax.add_patch(c1)
-        ax.add_patch(c2)
-
-    else: # marker
-        test = ax.scatter(
-            [x], [y],
-            s=[50.], c=['#00f'], facecolors='none',
-            marker = dso.object_type.marker_type,
-            #fillstyle = 'none'
-        )
-    return ax
-
+    symbols = DSOSymbols(reversed=reversed)
+    symbols.add(x, y, dso, alpha=alpha, min_size=min_size, max_size=max_size, 
+        default_size=default_size, debug=debug)
+    return symbols.draw(ax)
+
+@render_cached('dso_finder_chart', 
+    skip=('ts', 'eph', 'earth'), times_index=1, now_if_none=('utdt', 't'),
+    cacheable=lambda args: not args['save_file']
+)
 def create_dso_finder_chart(
         dso, 
         fov=8., 
@@ -242,11 +123,11 @@ def create_dso_finder_chart(
     times = [(time.perf_counter(), 'Start')]
     if ts is None or t is None or eph is None or earth is None:
         print("Getting DT metadata!")
-    ts = load.timescale() if ts is None else ts
+    ts = get_timescale() if ts is None else ts
     if t is None:
         t = ts.from_datetime(datetime.datetime.now(pytz.timezone('UTC'))) 
     if eph is None:
-        eph = load(get_ephemeris()) 
+        eph = get_eph() 
     earth = eph['earth'] if earth is None else earth
 
     # Center the chart on the DSO
@@ -259,25 +140,32 @@ def create_dso_finder_chart(
     style = 'dark_background' if reversed else 'default'
     plt.style.use(style)
     fig, ax = plt.subplots(figsize=[8,8])
+    ax.set_aspect(1.0) # (before the background is drawn: it's drawn at the axes' size)
     angle = np.pi - field_of_view_degrees  / 360.0 * np.pi
     limit = np.sin(angle) / (1.0 - np.cos(angle))
     times.append((time.perf_counter(), 'Start Plot'))
 
-    ax = map_equ(ax, earth, t, projection, 'equ', reversed=reversed)
-    ax = map_equ(ax, earth, t, projection, 'ecl', reversed=reversed)
-    ax = map_equ(ax, earth, t, projection, 'gal', reversed=reversed)
-    ax, stars = map_hipparcos(ax, earth, t, mag_limit, projection, reversed=reversed)
-    times.append((time.perf_counter(), 'Hipparcos'))
-    if constellation_lines:
-        ax = map_constellation_lines(ax, stars, reversed=reversed)
-    times.append((time.perf_counter(), 'Constellation Lines'))
-    # circular import... ugh
-    lines, _ = get_boundary_lines(dso.constellation.abbreviation, 'constellation')
-    if constellation_boundaries:
-        ax = new_map_constellation_boundaries(ax, lines, earth, t, projection, reversed=False)
-
-    ax = map_bright_stars(ax, earth, t, projection, points=False, annotations=True, reversed=reversed)
-    times.append((time.perf_counter(), 'Bright Stars'))
+    # The star field etc. around the DSO doesn't change: draw it once (see plotting/backgrounds.py)
+    def draw_field(ax):
+        ax = map_equ(ax, earth, t, projection, 'equ', reversed=reversed)
+        ax = map_equ(ax, earth, t, projection, 'ecl', reversed=reversed)
+        ax = map_equ(ax, earth, t, projection, 'gal', reversed=reversed)
+        ax, stars = map_hipparcos(ax, earth, t, mag_limit, projection, reversed=reversed,
+            center=(dso.ra_float, dso.dec_float), radius=fov)
+        if constellation_lines:
+            ax = map_constellation_lines(ax, stars, reversed=reversed)
+        # circular import... ugh
+        lines, _ = get_boundary_lines(dso.constellation.abbreviation, 'constellation')
+        if constellation_boundaries:
+            ax = new_map_constellation_boundaries(ax, lines, earth, t, projection, reversed=False)
+        ax = map_bright_stars(ax, earth, t, projection, points=False, annotations=True, reversed=reversed)
+    field = dict(
+        ra=dso.ra_float, dec=dso.dec_float, constellation=dso.constellation.abbreviation,
+        fov=fov, mag_limit=mag_limit, reversed=reversed,
+        constellation_lines=constellation_lines, constellation_boundaries=constellation_boundaries
+    )
+    ax = draw_background(ax, 'dso_finder_field', field, draw_field, limit)
+    times.append((time.perf_counter(), 'Star Field'))
 
     ##### this object
     object_x, object_y = projection(center)
@@ -296,9 +184,10 @@ def create_dso_finder_chart(
     )
     ##### other dsos
     if show_other_dsos:
-        # BUG: V2.x: This is inefficient: should use the dso.nearby_dsos property to get a list
-        # unless the FOV for "wide" is so wide that that won't work?
-        other_dso_records = DSO.objects.exclude(pk = dso.pk).order_by('-major_axis_size')
+        # Only the DSOs in a cone around the chart from the sky index - the corners
+        # of the chart are at fov/sqrt(2), so fov is plenty.
+        other_dso_records = cone_search(DSO, dso.ra_float, dso.dec_float, fov,
+            queryset=DSO.objects.exclude(pk = dso.pk).order_by('-major_axis_size').with_observing_summary())
         ax, times = plot_other_dsos(ax, other_dso_records, projection, earth, t, limit, times, in_field=False, reversed=reversed, fov_type=chart_type)
 
     if show_in_field_dsos:
@@ -402,7 +291,6 @@ def create_dso_finder_chart(
     secax = ax.secondary_xaxis('bottom', functions=(r2d, d2r))
     secax.set_xlabel('Degrees')
     secay = ax.secondary_yaxis('left', functions=(r2d, d2r))
-    ax.set_aspect(1.0)
 
     # title
     title = "{}: {} in {}".format(dso.label_on_chart, dso.object_type, dso.constellation)
@@ -425,10 +313,12 @@ def create_dso_finder_chart(
         if test:
             print(f"Saving to {path}{fn}")
         try:
-            fig.savefig('{}{}'.format(path, fn), bbox_inches='tight')
+            with atomic_file('{}{}'.format(path, fn)) as tmp:
+                fig.savefig(tmp, bbox_inches='tight')
         except: # sometimes there's UTF-8 in the name
             fn = 'dso_chart_{}.png'.format(dso.pk)
-            fig.savefig('{}{}'.format(path, fn), bbox_inches='tight')
+            with atomic_file('{}{}'.format(path, fn)) as tmp:
+                fig.savefig(tmp, bbox_inches='tight')
 
         plt.cla()
         plt.close(fig)
@@ -462,9 +352,9 @@ def plot_dso_list(center_ra, center_dec, dso_list,
         min_lunar_distance = 45.,
         moon = None
     ):
-    ts = load.timescale()
+    ts = get_timescale()
     t = ts.from_datetime(datetime.datetime.now(pytz.timezone('UTC')))
-    eph = load(get_ephemeris())
+    eph = get_eph()
     earth = eph['earth']
 
     # Center the chart on the DSO
@@ -477,7 +367,8 @@ def plot_dso_list(center_ra, center_dec, dso_list,
     fig, ax = plt.subplots(figsize=[8,8])
 
     # Stars
-    ax, stars = map_hipparcos(ax, earth, t, star_mag_limit, projection, mag_offset=0.1, reversed=reversed)
+    ax, stars = map_hipparcos(ax, earth, t, star_mag_limit, projection, mag_offset=0.1, reversed=reversed,
+        center=(center_ra, center_dec), radius=fov)
     ax = map_constellation_lines(ax, stars, reversed=reversed)
     ax = map_bright_stars(
         ax, earth, t, projection, mag_limit=3.0, points=False, annotations=True, reversed=reversed
@@ -2,6 +2,7 @@ import math
 from ..astro.utils import get_sep
 from .atlas_utils import plate_list
 from .models import DSOList, AtlasPlate, DSO, AtlasPlateVersion, AtlasPlateSpecial, AtlasPlateSpecialVersion
+from .name_index import get_name_index
 from .plot import create_atlas_plot
 
 def create_dso_list_from_queryset(dsos, name='Default Name', description=None):
@@ -38,16 +39,25 @@ def create_atlas_plate(plate_id, shapes=False, reversed=False):
     Create/Update an AtlasPlate instance with a newly-generated image.
     """
     plates = plate_list()
+    if plate_id not in plates.keys():
+        return None
+    ra, dec = plates[plate_id]
+    fn, dso_list = create_atlas_plot(ra, dec, plate_id, shapes=shapes, reversed=reversed)
+    return save_atlas_plate(plate_id, fn, dso_list, shapes=shapes, reversed=reversed)
+
+def save_atlas_plate(plate_id, fn, dso_list, shapes=False, reversed=False):
+    """
+    Record a rendered AtlasPlate image (fn) and the DSOs on it.
+    This is split out so that the batch renderer can do the drawing in worker 
+    processes and keep the database writes in one place.
+    """
+    ra, dec = plate_list()[plate_id]
     x = AtlasPlate.objects.filter(plate_id=plate_id).first()
     if x is None:
         x = AtlasPlate()
     x.plate_id = plate_id
-    if plate_id not in plates.keys():
-        return None
-    ra, dec = plates[plate_id]
     x.center_ra = ra
     x.center_dec = dec
-    fn, dso_list = create_atlas_plot(ra, dec, plate_id, shapes=shapes, reversed=reversed)
     x.save()
 
     # Store everything in AtlasPlateVersion
@@ -90,9 +100,8 @@ def lookup_dso(name):
     STUPID = {
         '(greek) ρ': 213, '(greek) ω': 1337,   # FIX THIS, also Pi Pup, Chi Per
     }
-    d = DSO.objects.filter(shown_name=name).first()
-    if d is None:
-        d = DSO.objects.filter(aliases__shown_name=name).first()
+    pk = get_name_index().shown_name(name) # see name_index.py
+    d = DSO.objects.filter(pk=pk).first() if pk is not None else None
     if d is None:
         if name == '(greek) ρ':
             d = DSO.objects.get(pk=213)
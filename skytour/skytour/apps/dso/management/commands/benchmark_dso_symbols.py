@@ -0,0 +1,93 @@
+import datetime, pytz, tempfile, time
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from matplotlib import pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg as FigureCanvas
+from skyfield.api import Star
+from skyfield.projections import build_stereographic_projection
+from ....astro.ephemeris import get_eph, get_timescale
+from ....astro.sky_index import cone_search
+from ...finder import create_dso_finder_chart, plot_dso
+from ...models import AtlasPlate, DSO
+from ...plot import create_atlas_plot
+from ...symbols import DSOSymbols, add_chart_labels
+
+class Command(BaseCommand):
+    help = 'Time drawing DSO symbols/labels one artist per DSO vs. batched, and atlas/finder renders'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--plates', dest='plates', nargs='+', type=int, default=[],
+            help='atlas plate IDs (default: the plate with the most DSOs)')
+        parser.add_argument('--dso_list', dest='dso_list', nargs='+', type=int, default=[], help='DSO PKs for finder charts')
+        parser.add_argument('--repeat', dest='repeat', type=int, default=3)
+        parser.add_argument('--cull', dest='cull', action='store_true', help='cull overlapping labels')
+
+    def handle(self, *args, **options):
+        ts = get_timescale()
+        eph = get_eph()
+        earth = eph['earth']
+        t = ts.from_datetime(datetime.datetime(2022, 1, 1, 0, 0).replace(tzinfo=pytz.utc))
+        plates = AtlasPlate.objects.filter(plate_id__in=options['plates']) if options['plates'] \
+            else AtlasPlate.objects.annotate(n=Count('dso')).order_by('-n')[:1]
+
+        for plate in plates:
+            dsos = list(cone_search(DSO, plate.center_ra, plate.center_dec, 20.,
+                queryset=DSO.objects.order_by('-major_axis_size').with_observing_summary()))
+            projection = build_stereographic_projection(
+                earth.at(t).observe(Star(ra_hours=plate.center_ra, dec_degrees=plate.center_dec)))
+            points = [projection(earth.at(t).observe(dso.skyfield_object)) for dso in dsos]
+            print(f"Plate {plate.plate_id}: {len(dsos)} DSOs")
+
+            per_artist = self.time_draw(options['repeat'], lambda ax: self.draw_per_artist(ax, dsos, points))
+            batched = self.time_draw(options['repeat'],
+                lambda ax: self.draw_batched(ax, dsos, points, cull=options['cull']))
+            print(f"\tSymbols + labels, one artist per DSO: {per_artist:.3f}s")
+            print(f"\tSymbols + labels, batched:            {batched:.3f}s")
+
+            for shapes in [False, True]:
+                seconds = self.best_of(options['repeat'], lambda: create_atlas_plot(
+                    plate.center_ra, plate.center_dec, plate.plate_id,
+                    shapes=shapes, save_file=False, cull_labels=options['cull']))
+                print(f"\tAtlas plate (shapes={shapes}): {seconds:.3f}s")
+
+        path = tempfile.mkdtemp() + '/'
+        for dso in DSO.objects.filter(pk__in=options['dso_list']).with_observing_summary():
+            seconds = self.best_of(options['repeat'], lambda: create_dso_finder_chart(
+                dso, save_file=True, path=path, utdt=None))
+            print(f"Finder chart {dso}: {seconds:.3f}s")
+
+    def best_of(self, repeat, function):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function()
+            seconds = time.perf_counter() - start
+            best = seconds if best is None else min(best, seconds)
+            plt.close('all')
+        return best
+
+    def time_draw(self, repeat, draw):
+        """
+        Build the layer and render it to PNG - the part that the number of artists affects.
+        """
+        def run():
+            fig, ax = plt.subplots(figsize=[9,9])
+            draw(ax)
+            ax.set_xlim(-0.2, 0.2)
+            ax.set_ylim(-0.2, 0.2)
+            FigureCanvas(fig).draw()
+        return self.best_of(repeat, run)
+
+    def draw_per_artist(self, ax, dsos, points):
+        for dso, (x, y) in zip(dsos, points):
+            plot_dso(ax, x, y, dso, alpha=0.6, min_size=15., default_size=10.)
+            ax.annotate(dso.label_on_chart, (x, y), textcoords='offset points', xytext=(5, 5),
+                ha='left', fontsize='x-small')
+
+    def draw_batched(self, ax, dsos, points, cull=False):
+        symbols = DSOSymbols()
+        for dso, (x, y) in zip(dsos, points):
+            symbols.add(x, y, dso, alpha=0.6, min_size=15., default_size=10.)
+        symbols.draw(ax)
+        add_chart_labels(ax, [p[0] for p in points], [p[1] for p in points],
+            [dso.label_on_chart for dso in dsos], fontsize='x-small', cull=cull)
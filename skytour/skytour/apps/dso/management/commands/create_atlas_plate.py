@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
-from ...helpers import create_atlas_plate
+from ...helpers import save_atlas_plate
+from ...render_batch import BatchReport, RenderManifest, atlas_plate_signature, plate_key, render_atlas_plate, run_batch
 
 
 class Command(BaseCommand):
@@ -12,7 +13,10 @@ class Command(BaseCommand):
         parser.add_argument('-a', '--all', dest='do_all', action='store_true')
         parser.add_argument('-d', '--debug', dest='debug', action='store_true')
         parser.add_argument('-f', '--full_set', dest='full_set', action='store_true')
-    
+        parser.add_argument('-w', '--workers', dest='workers', type=int, default=1, help='number of rendering processes')
+        parser.add_argument('--chunk', dest='chunk', type=int, default=4, help='plates handed to a worker at a time')
+        parser.add_argument('--force', dest='force', action='store_true', help='redraw plates even if nothing changed')
+
     def handle(self, *args, **options):
         debug = True if options['debug'] else False
         reversed = True if options['reversed'] else False
@@ -25,15 +29,34 @@ class Command(BaseCommand):
             print (f"Reversed: {reversed} Shapes: {shapes} Do all: {do_all}")
             print(f"Plate List: {plates}")
 
-        for plate_id in plates: 
+        manifest = RenderManifest('media/atlas_images')
+        tasks, signatures = [], {}
+        for plate_id in plates:
             if plate_id < 259 and plate_id > 0:
                 if not full_set:
-                    print("Plate: ", plate_id, " Shapes: ", shapes, " Reversed: ", reversed)
-                    fn = create_atlas_plate(plate_id, shapes=shapes, reversed=reversed)
+                    versions = [(shapes, reversed)]
                 else:
-                    for rev in [True, False]:
-                        for shape in [True, False]:
-                            print("Plate: ", plate_id, " Shapes: ", shape, " Reversed: ", rev)
-                            fn = create_atlas_plate(plate_id, shapes=shape, reversed=rev)
+                    versions = [(shape, rev) for rev in [True, False] for shape in [True, False]]
+                for shape, rev in versions:
+                    key = plate_key(plate_id, shape, rev)
+                    signatures[key] = atlas_plate_signature(plate_id, shape, rev)
+                    if not options['force'] and manifest.is_current(key, signatures[key]):
+                        print("Plate: ", plate_id, " Shapes: ", shape, " Reversed: ", rev, " is up to date")
+                        continue
+                    tasks.append((plate_id, shape, rev))
             else:
-                print(f"Plate ID {plate_id} invalid.")
\ No newline at end of file
+                print(f"Plate ID {plate_id} invalid.")
+
+        report = BatchReport(len(tasks), skipped=len(signatures)-len(tasks), label='plate')
+        for (plate_id, shape, rev), result, seconds, error in run_batch(
+                render_atlas_plate, tasks, workers=options['workers'], chunk_size=options['chunk']
+            ):
+            report.add(f"Plate: {plate_id} Shapes: {shape} Reversed: {rev}", seconds, error)
+            if error is not None:
+                continue
+            fn, dso_list = result
+            save_atlas_plate(plate_id, fn, dso_list, shapes=shape, reversed=rev)
+            key = plate_key(plate_id, shape, rev)
+            manifest.record(key, signatures[key], fn)
+        manifest.save()
+        report.summary()
@@ -1,10 +1,6 @@
-import datetime, pytz
-from skyfield.api import load
-
 from django.core.management.base import BaseCommand
 from ...models import DSO
-from ...finder import create_dso_finder_chart
-from skytour.apps.site_parameter.helpers import get_ephemeris
+from ...render_batch import BatchReport, RenderManifest, finder_chart_signature, render_finder_chart, run_batch
 
 class Command(BaseCommand):
     help = 'Create DSO finder charts'
@@ -14,6 +10,9 @@ class Command(BaseCommand):
         parser.add_argument('--all', dest='all', action='store_true')
         parser.add_argument('--test', action='store_true')
         parser.add_argument('--reversed', action='store_true')
+        parser.add_argument('--workers', type=int, default=1, help='number of rendering processes')
+        parser.add_argument('--chunk', type=int, default=10, help='DSOs handed to a worker at a time')
+        parser.add_argument('--force', action='store_true', help='redraw charts even if nothing changed')
     
     def handle(self, *args, **options):
         """
@@ -37,48 +36,55 @@ class Command(BaseCommand):
             just_new = True
             print ("Running new DSOs")
 
-        ts = load.timescale() 
-        t = ts.from_datetime(datetime.datetime.now(pytz.timezone('UTC'))) 
-        eph = load(get_ephemeris()) 
-        earth = eph['earth'] 
+        path = '/Users/robertdonahue/Desktop/' if options['test'] else 'media/dso_charts/'
+        chart_options = dict(
+            test=options['test'],
+            show_in_field_dsos = False, 
+            show_other_dsos = True,
+
+            reversed=reversed, 
+
+            utdt = None, 
+            planets_dict = None, 
+            asteroid_list = None,
+            comet_list = None,
+            now = False,
+
+            #chart_type = 'wide',
+            path = path,
+
+            include_mosaic = True,
+            gear_list = ['eyepiece', 'equinox2', 'seestar50', 'seestar30'],
+        )
 
         if dso_list:
             dsos = DSO.objects.filter(pk__in=dso_list)
         else:
             dsos = DSO.objects.all()
 
-        for dso in dsos:
+        manifest = RenderManifest(path)
+        tasks, signatures, names = [], {}, {}
+        for dso in dsos.with_observing_summary():
             if just_new and dso.dso_finder_chart:
                 continue
-            
-            # Otherwise operate!
-            print("Creating/Updating Finder Chart for {}: {}".format(dso.pk, dso.label_on_chart))
-            path = '/Users/robertdonahue/Desktop/' if options['test'] else 'media/dso_charts/'
-
-            fn = create_dso_finder_chart(
-                dso, 
-                test=options['test'],
-                show_in_field_dsos = False, 
-                show_other_dsos = True,
-
-                reversed=reversed, 
-                save_file=True,
-
-                utdt = None, 
-                planets_dict = None, 
-                asteroid_list = None,
-                comet_list = None,
-                now = False,
-
-                #chart_type = 'wide',
-                path = path,
-
-                include_mosaic = True,
-                gear_list = ['eyepiece', 'equinox2', 'seestar50', 'seestar30'],
-                ts = ts, eph = eph, t = t, earth = earth
-
-            )
+            names[dso.pk] = "{}: {}".format(dso.pk, dso.label_on_chart)
+            signatures[dso.pk] = finder_chart_signature(dso, chart_options)
+            if not options['force'] and manifest.is_current(dso.pk, signatures[dso.pk]):
+                print("Finder Chart for {} is up to date".format(names[dso.pk]))
+                continue
+            tasks.append((dso.pk, chart_options))
+        
+        # Otherwise operate!
+        report = BatchReport(len(tasks), skipped=len(signatures)-len(tasks), label='chart')
+        print("Creating/Updating {} Finder Charts with {} worker(s)".format(len(tasks), options['workers']))
+        for (pk, _), fn, seconds, error in run_batch(
+                render_finder_chart, tasks, workers=options['workers'], chunk_size=options['chunk']
+            ):
+            report.add(names[pk], seconds, error)
+            if error is not None:
+                continue
+            manifest.record(pk, signatures[pk], fn)
             if not options['test']:
-                dso.dso_finder_chart = 'dso_charts/{}'.format(fn)
-                #print ("\tFN: ", fn)
-                dso.save()
\ No newline at end of file
+                DSO.objects.filter(pk=pk).update(dso_finder_chart='dso_charts/{}'.format(fn))
+        manifest.save()
+        report.summary()
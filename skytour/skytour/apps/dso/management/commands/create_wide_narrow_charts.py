@@ -1,10 +1,8 @@
-import datetime, pytz
 from django.core.files.base import ContentFile
 from django.core.management.base import BaseCommand
-from skyfield.api import load
 from skytour.apps.dso.models import DSO
 from skytour.apps.dso.finder import create_dso_finder_chart
-from skytour.apps.site_parameter.helpers import get_ephemeris
+from skytour.apps.dso.render_batch import BatchReport, RenderManifest, finder_chart_signature, render_finder_chart, run_batch
 
 class Command(BaseCommand):
     help = 'Create DSO wide/narrow finder charts'
@@ -20,6 +18,9 @@ class Command(BaseCommand):
         parser.add_argument('--start', nargs='?', const=0, type=int)
         parser.add_argument('--num', nargs='?', const=100 ,type=int)
         parser.add_argument('--dso_list', dest='dso_list', nargs='+', type=int)
+        parser.add_argument('--workers', type=int, default=1, help='number of rendering processes')
+        parser.add_argument('--chunk', type=int, default=10, help='charts handed to a worker at a time')
+        parser.add_argument('--force', action='store_true', help='redraw charts even if nothing changed')
     
     def handle(self, *args, **options):
         """
@@ -50,10 +51,53 @@ class Command(BaseCommand):
             print("DSO LIST: ", dso_list)
             print("SAVE: ", save)
         else:
-            run_set(start=start, dso_list=dso_list, length=num, save=save, all=all, which=which, save_local=save_local)
+            run_set(start=start, dso_list=dso_list, length=num, save=save, all=all, which=which, save_local=save_local,
+                workers=options['workers'], chunk_size=options['chunk'], force=options['force'])
 
 MEDIA_PATH = 'media'
 
+def wide_chart_options(path):
+    return dict(
+        utdt = None, 
+        planets_dict = None, 
+        asteroid_list = None,
+        show_other_dsos = True,
+        show_in_field_dsos = False,
+        comet_list = None,
+        now = False,
+        chart_type = 'wide',
+        path = path,
+        include_mosaic = True,
+        gear_list = ['eyepiece', 'equinox2', 'seestar50', 'seestar30'],
+    )
+
+def narrow_chart_options(path):
+    return dict(
+        utdt = None,
+        fov = 2.5, # up to 2.5 for S30?
+        mag_limit = 11.,
+        show_other_dsos = True,
+        show_in_field_dsos = True,
+        now = False,
+        planets_dict=None,
+        asteroid_list=None,
+        comet_list=None,
+        chart_type = 'narrow',
+        path = path,
+        include_mosaic = False,
+        gear_list = ['eyepiece', 'equinox2', 'seestar50', 'seestar30'],
+    )
+
+def store_chart(dso, chart_type, fn):
+    """
+    Copy a rendered chart from the temp directory into the DSO's image field.
+    """
+    field = dso.dso_finder_chart_wide if chart_type == 'wide' else dso.dso_finder_chart_narrow
+    with open(f"/Users/robertdonahue/Temp/dso_finder_{chart_type}/{fn}", 'rb') as f:
+        data = f.read()
+        f.close()
+    field.save(f'{fn}', ContentFile(data))
+
 def run_dso(
         dso, 
         which='both', 
@@ -66,20 +110,8 @@ def run_dso(
     if which in ['both', 'wide']:
         path = base_dir + 'dso_finder_wide/' if not save_local else ''
         finder_wide = create_dso_finder_chart(
-            dso,
-            utdt = None, 
-            planets_dict = None, 
-            asteroid_list = None,
-            show_other_dsos = True,
-            show_in_field_dsos = False,
-            comet_list = None,
-            now = False,
-            save_file = save,
-            chart_type = 'wide',
-            path = path,
-            include_mosaic = True,
-            gear_list = ['eyepiece', 'equinox2', 'seestar50', 'seestar30'],
-            ts = ts, t = t, eph = eph, earth=earth
+            dso, save_file = save, ts = ts, t = t, eph = eph, earth=earth,
+            **wide_chart_options(path)
         )
     else:
         finder_wide = None
@@ -87,22 +119,8 @@ def run_dso(
     if which in ['both', 'narrow']:
         path = base_dir + 'dso_finder_narrow/' if not save_local else ''
         finder_narrow = create_dso_finder_chart(
-            dso,
-            utdt = None,
-            fov = 2.5, # up to 2.5 for S30?
-            mag_limit = 11.,
-            show_other_dsos = True,
-            show_in_field_dsos = True,
-            now = False,
-            planets_dict=None,
-            asteroid_list=None,
-            comet_list=None,
-            save_file = save,
-            chart_type = 'narrow',
-            path = path,
-            include_mosaic = False,
-            gear_list = ['eyepiece', 'equinox2', 'seestar50', 'seestar30'],
-            ts = ts, t = t, eph = eph, earth=earth
+            dso, save_file = save, ts = ts, t = t, eph = eph, earth=earth,
+            **narrow_chart_options(path)
         )
     else:
         finder_narrow = None
@@ -110,46 +128,70 @@ def run_dso(
 
     if save:
         if finder_narrow is not None:
-            with open(f"/Users/robertdonahue/Temp/dso_finder_narrow/{finder_narrow}", 'rb') as f:
-                data = f.read()
-                f.close()
-            dso.dso_finder_chart_narrow.save(f'{finder_narrow}', ContentFile(data))
+            store_chart(dso, 'narrow', finder_narrow)
         if finder_wide is not None:
-            with open(f"/Users/robertdonahue/Temp/dso_finder_wide/{finder_wide}", 'rb') as f:
-                data = f.read()
-                f.close()
-            dso.dso_finder_chart_wide.save(f'{finder_wide}', ContentFile(data))
+            store_chart(dso, 'wide', finder_wide)
     else:
         print("Not saving...")
 
     return finder_wide, finder_narrow, dso
 
-def run_set(start=0, length=100, dso_list=[], save=True, all=False, which='both', save_local=False):
+def run_set(
+        start=0, length=100, dso_list=[], save=True, all=False, which='both', save_local=False,
+        workers=1, chunk_size=10, force=False
+    ):
+    """
+    Render the wide and/or narrow charts for a set of DSOs - in parallel if workers > 1 -
+    skipping the ones whose inputs haven't changed since they were last drawn.
+    """
     dsos = DSO.objects.order_by('pk')
 
-    ts = load.timescale() 
-    t = ts.from_datetime(datetime.datetime.now(pytz.timezone('UTC'))) 
-    eph = load(get_ephemeris()) 
-    earth = eph['earth'] 
-
     if len(dso_list) == 0: 
         subset = dsos if all else dsos[start:(start+length)]
     else:
         subset = dsos.filter(pk__in=dso_list)
 
+    base_dir = '/Users/robertdonahue/Temp/' if not save_local else ''
+    chart_types = ['wide', 'narrow'] if which == 'both' else [which]
+    options, manifests = {}, {}
+    for chart_type in chart_types:
+        path = base_dir + f'dso_finder_{chart_type}/' if not save_local else ''
+        chart_options = wide_chart_options(path) if chart_type == 'wide' else narrow_chart_options(path)
+        chart_options['save_file'] = save
+        options[chart_type] = chart_options
+        manifests[chart_type] = RenderManifest(path)
+
     total = subset.count()
     print(f"Running {total} DSOs")
-    n = 0
-    base_dir = '/Users/robertdonahue/Temp/' if not save_local else ''
+    tasks, signatures, dsos_by_pk, skipped = [], {}, {}, 0
     for dso in subset:
-        n += 1
-        print(f"Doing {n} of {total}:  PK #{dso.pk} = {dso}")
-        fw, fn, new = run_dso(
-            dso, 
-            which=which, 
-            save=save, 
-            base_dir=base_dir, 
-            save_local=save_local,
-            ts=ts, t=t, eph=eph, earth=earth
-        )
-        #print("\t... Done")
+        dsos_by_pk[dso.pk] = dso
+        for chart_type in chart_types:
+            signature = finder_chart_signature(dso, options[chart_type])
+            if save and not force and manifests[chart_type].is_current(dso.pk, signature):
+                print(f"\tPK #{dso.pk} = {dso}: {chart_type} chart is up to date")
+                skipped += 1
+                continue
+            signatures[(dso.pk, chart_type)] = signature
+            tasks.append((dso.pk, options[chart_type]))
+
+    report = BatchReport(len(tasks), skipped=skipped, label='chart')
+    print(f"Rendering {len(tasks)} charts with {workers} worker(s)")
+    for (pk, chart_options), fn, seconds, error in run_batch(
+            render_finder_chart, tasks, workers=workers, chunk_size=chunk_size
+        ):
+        dso = dsos_by_pk[pk]
+        chart_type = chart_options['chart_type']
+        report.add(f"PK #{pk} = {dso} ({chart_type})", seconds, error)
+        if error is not None:
+            continue
+        if save:
+            manifests[chart_type].record(pk, signatures[(pk, chart_type)], fn)
+            if not save_local:
+                store_chart(dso, chart_type, fn)
+        else:
+            print("Not saving...")
+    if save:
+        for manifest in manifests.values():
+            manifest.save()
+    report.summary()
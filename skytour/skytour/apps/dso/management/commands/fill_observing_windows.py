@@ -0,0 +1,30 @@
+import time
+from django.core.management.base import BaseCommand
+from ...models import DSO, get_window_locations
+from ...observing import fill_observing_windows
+
+class Command(BaseCommand):
+    help = 'Precompute the DSO observing windows (opposition, season, max. altitude) for observing locations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--locations', dest='locations', nargs='+', type=int, help='location PKs (default: active + default)')
+        parser.add_argument('--dso_list', dest='dso_list', nargs='+', type=int, help='DSO PKs (default: all)')
+        parser.add_argument('--chunk', dest='chunk', type=int, default=500, help='DSOs stored at a time')
+
+    def handle(self, *args, **options):
+        locations = get_window_locations().order_by('pk')
+        if options['locations']:
+            locations = locations.model.objects.filter(pk__in=options['locations']).order_by('pk')
+        locations = list(locations)
+        dsos = DSO.objects.order_by('pk')
+        if options['dso_list']:
+            dsos = dsos.filter(pk__in=options['dso_list'])
+        pks = list(dsos.values_list('pk', flat=True))
+
+        t0 = time.perf_counter()
+        n = 0
+        for i in range(0, len(pks), options['chunk']):
+            chunk = DSO.objects.filter(pk__in=pks[i:i+options['chunk']]).prefetch_related('dsoobservingmode_set')
+            n += fill_observing_windows(chunk, locations)
+            print(f"{min(i + options['chunk'], len(pks))}/{len(pks)} DSOs")
+        print(f"{n} windows for {len(locations)} locations in {time.perf_counter() - t0:.1f}s")
@@ -0,0 +1,18 @@
+import time
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from ....astro.sky_table import SKY_TABLE_MODELS, rebuild_sky_table, sky_table_name
+
+class Command(BaseCommand):
+    help = 'Rebuild the spatial (R*Tree) tables of DSO, DSOInField, BrightStar and VariableStar positions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--models', dest='models', nargs='+', default=SKY_TABLE_MODELS,
+            help=f"app_label.Model (default: {' '.join(SKY_TABLE_MODELS)})")
+
+    def handle(self, *args, **options):
+        for label in options['models']:
+            model = apps.get_model(label)
+            t0 = time.perf_counter()
+            n = rebuild_sky_table(model)
+            print(f"{label}: {n} positions in {sky_table_name(model)} ({time.perf_counter() - t0:.1f}s)")
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.27 on 2026-10-18 16:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('observe', '0027_observinglocationalmanac'),
+        ('dso', '0143_alter_dsoobservingnotessource_symbol'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DSOObservingWindow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('latitude', models.FloatField(verbose_name='Latitude')),
+                ('opposition_date', models.DateField(verbose_name='Opposition Date')),
+                ('delta_days', models.FloatField(blank=True, null=True, verbose_name='Half Season (days)')),
+                ('cos_hh', models.FloatField(verbose_name='Cos(Hour Angle) at Min. Alt.')),
+                ('min_altitude', models.FloatField(verbose_name='Minimum Altitude')),
+                ('max_altitude', models.FloatField(verbose_name='Maximum Altitude')),
+                ('dso', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='observing_windows', to='dso.dso')),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dso_windows', to='observe.observinglocation')),
+            ],
+            options={
+                'ordering': ['dso', 'location'],
+                'unique_together': {('dso', 'location')},
+            },
+        ),
+    ]
@@ -1,17 +1,32 @@
+from ..plotting.geometry import PackedLines, get_geometry
 from .models import MilkyWay
 
+def load_milky_way():
+     """
+     All the Milky Way contours in one query: {contour: PackedLines of its segments}.
+     """
+     points = MilkyWay.objects.order_by('contour', 'segment', 'pk')
+     contours = {}
+     for contour, sid, ra, dec in points.values_list('contour', 'segment', 'ra', 'dec'):
+          contours.setdefault(contour, {}).setdefault(sid, []).append((ra, dec))
+     return dict((contour, PackedLines.from_segments(list(segments.values()))) for contour, segments in contours.items())
+
+def get_milky_way(contour=1):
+     """
+     The segments for the Milky Way at a particular contour level, as PackedLines.
+     (There are 5; Skymap only looks at level=1, but AtlasPlate uses levels 1 and 2.)
+     """
+     contours = get_geometry('milky_way', load_milky_way)
+     return contours.get(contour, PackedLines([], [], [0]))
+
 def get_list_of_segments(contour=1):
      """
      Get the list of segments for the Milky Way at a particular contour level.
-     (There are 5; Skymap only looks at level=1, but AtlasPlate uses levels 1 and 2.)
      """
-     points = MilkyWay.objects.filter(contour=contour)
-     segment_ids = set(points.values_list('segment', flat=True))
-     list_of_coords = []
-     for sid in segment_ids:
-          segment = []
-          coords = points.filter(segment=sid).order_by('pk').values_list('ra', 'dec')
-          for c in coords:
-               segment.append(c)
-          list_of_coords.append(segment)
-     return list_of_coords
+     return get_milky_way(contour=contour).segments()
+
+def preload_segments():
+     """
+     Read the Milky Way contours now, for a process that's going to draw a lot of maps.
+     """
+     get_geometry('milky_way', load_milky_way)
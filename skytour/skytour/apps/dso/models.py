@@ -1,7 +1,9 @@
 import datetime as dt
 from collections import OrderedDict
 from django.db import models
-from django.db.models import Avg
+from django.db.models import Avg, Prefetch
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
 from django.utils.html import mark_safe
 from django.utils.translation import gettext as _
 from jsonfield import JSONField
@@ -21,17 +23,26 @@ from ..abstract.models import WikipediaPage, WikipediaPageObject
 from ..abstract.utils import get_metadata
 from ..abstract.vocabs import YES, NO, YES_NO as INT_YES_NO, SYMBOLS
 from ..astro.angdist import get_neighbors
-from ..astro.astro import get_delta_hour_for_altitude
 from ..astro.coords import equ2ecl, equ2gal
 from ..astro.culmination import get_opposition_date
+from ..astro.time import get_utdt
+from ..astro.sky_index import invalidate_sky_index
+from ..astro.sky_table import remove_sky_position, sky_box_filter, sky_cone_filter, store_sky_position
+from ..plotting.geometry import invalidate_geometry
+from ..plotting.render_cache import bump_background_cache, bump_render_cache
 from ..astro.transform import get_alt_az
+from ..observe.models import ObservingLocation
 from ..astro.utils import alt_get_small_sep, get_simple_position_angle, get_atlas_sep
-from ..site_parameter.helpers import find_site_parameter
 from ..solar_system.utils import get_constellation
 from ..stars.utils import handle_formatting
 from ..utils.format import to_dms_string
-from ..utils.models import Constellation, ObjectType
-from .observing import get_max_altitude
+from ..utils.models import Catalog, Constellation, ObjectType
+from .atlas_utils import invalidate_plate_graph
+from .name_index import invalidate_name_index
+from .observing import (
+    clear_default_location, fill_observing_windows, get_default_location_values, 
+    get_max_altitude, get_observing_window_values, get_stored_window
+)
 from .utils import get_hyperleda_value, get_simbad_value
 from .vocabs import (
     MODE_PRIORITY_CHOICES,
@@ -342,6 +353,43 @@ class DSOAbstract(Coordinates):
     class Meta:
         abstract = True
 
+class DSOQuerySet(models.QuerySet):
+    def with_observing_summary(self):
+        """
+        Fetch what DSO lists, the availability pass and finder charts read
+        from each DSO (modes/priorities, library images, DSOInField objects,
+        active observing lists, observations, observing windows) in a fixed
+        number of queries.
+
+        The mode/image/list properties on DSO use the prefetched values
+        when they're there, and fall back to querying when they're not.
+        """
+        return self.select_related('catalog', 'object_type', 'constellation').prefetch_related(
+            'dsoobservingmode_set',
+            Prefetch('image_library', queryset=DSOLibraryImage.objects.order_by('order_in_list')),
+            'dsoinfield_set',
+            Prefetch(
+                'dsolist_set', 
+                queryset=DSOList.objects.filter(active_observing_list=YES), 
+                to_attr='prefetched_active_lists'
+            ),
+            'observations',
+            'aliases',
+            'observing_windows'
+        )
+
+    def in_sky_box(self, ra_low=None, ra_high=None, dec_low=None, dec_high=None):
+        """
+        DSOs in an RA (hours)/Dec box, looked up in the spatial table (see astro.sky_table).
+        """
+        return sky_box_filter(self, ra_low=ra_low, ra_high=ra_high, dec_low=dec_low, dec_high=dec_high)
+
+    def in_sky_cone(self, ra, dec, radius):
+        """
+        DSOs within radius (degrees) of ra (hours), dec (degrees).
+        """
+        return sky_cone_filter(self, ra, dec, radius)
+
 class DSO(DSOAbstract, ObservableObject, WikipediaPageObject):
     """
     Metadata, images, etc. for each DSO
@@ -448,6 +496,10 @@ class DSO(DSOAbstract, ObservableObject, WikipediaPageObject):
         """
         Return Opposition Date based on RA
         """
+        window = get_stored_window(self)
+        if window is not None:
+            # Same type as get_opposition_date(): an aware UT datetime, at the current time of day
+            return dt.datetime.combine(window.next_opposition_date, get_utdt().timetz())
         return get_opposition_date(self.ra, next=True)
     
     @property
@@ -457,17 +509,15 @@ class DSO(DSOAbstract, ObservableObject, WikipediaPageObject):
         NOTE: the minimum is set to be 20° generally, can be 5° or 10° - this
             is only because there are handful of DSOs that are REALLY south
             but still very high priority
-        BUG: This doesn't know about the latitude of the cookie!
-            Therefore it always will use the default location!
+        This is for the default location: it's read from the stored
+            DSOObservingWindow if there is one.
         """
-        default_min_altitude = find_site_parameter('minimum-object-altitude', default=10., param_type='float')
-        ipri = self.mode_imaging_priority
-        alt = 20.
-        delta_days, cos_hh = get_delta_hour_for_altitude(self.dec)
-        if delta_days is None:
-            alt = 5. if (ipri is not None and ipri > 0) else default_min_altitude
-            delta_days, cos_hh = get_delta_hour_for_altitude(self.dec, alt=alt)
-        return delta_days, cos_hh, alt
+        window = get_stored_window(self)
+        if window is not None:
+            return window.delta_days, window.cos_hh, window.min_altitude
+        values = get_observing_window_values(self.dec, get_default_location_values()[1], 
+            imaging_priority=self.mode_imaging_priority)
+        return values['delta_days'], values['cos_hh'], values['min_altitude']
     
     @property
     def observing_date_range(self):
@@ -500,6 +550,16 @@ class DSO(DSOAbstract, ObservableObject, WikipediaPageObject):
             pp.append(str(p.plate_id))
         return ', '.join(pp)
     
+    objects = DSOQuerySet.as_manager()
+
+    def _prefetched(self, name):
+        """
+        Return the prefetched list for a relation (see DSOQuerySet.with_observing_summary()),
+        or None if it wasn't prefetched.
+        """
+        cache = getattr(self, '_prefetched_objects_cache', {})
+        return list(cache[name]) if name in cache else None
+
     @property
     def num_library_images(self):
         """
@@ -520,11 +580,10 @@ class DSO(DSOAbstract, ObservableObject, WikipediaPageObject):
         """
         Return a dict of the dsoobservingmode_set values, or None if no assignment.
         """
-        d = {}
-        modes = self.dsoobservingmode_set.all()
-        for k in 'NBSMI':
-            mode = modes.filter(mode=k).first()
-            d[k] = None if mode is None else mode
+        d = dict((k, None) for k in 'NBSMI')
+        for mode in self.dsoobservingmode_set.all():
+            if d.get(mode.mode) is None:
+                d[mode.mode] = mode
         return d
     
     @property
@@ -614,6 +673,9 @@ class DSO(DSOAbstract, ObservableObject, WikipediaPageObject):
         """
         Return the first (based on order_in_list) image in the Library Image stack.
         """
+        images = self._prefetched('image_library')
+        if images is not None:
+            return images[0] if len(images) > 0 else None
         return self.image_library.order_by('order_in_list').first() # returns None if none
 
     @property
@@ -623,8 +685,7 @@ class DSO(DSOAbstract, ObservableObject, WikipediaPageObject):
         Note that DSOs with >0 DSOInField objects get a '+' appended,
         e.g., M33 is shown as M33+ because of the other NGC objects in the FOV.
         """
-        in_fov = self.dsoinfield_set.all()
-        n_in_fov = in_fov.count()
+        n_in_fov = self.dsoinfield_set.count() # uses the prefetch if there is one
         label = self.shown_name if self.map_label is None else self.map_label
         if n_in_fov > 0 and self.map_label is None:
             label += '+'
@@ -772,6 +833,8 @@ class DSO(DSOAbstract, ObservableObject, WikipediaPageObject):
     
     @property
     def active_observing_list_count(self):
+        if hasattr(self, 'prefetched_active_lists'):
+            return len(self.prefetched_active_lists)
         return self.dsolist_set.filter(active_observing_list=YES).count()
     
     @property
@@ -868,6 +931,9 @@ class DSO(DSOAbstract, ObservableObject, WikipediaPageObject):
         """
         Return the maximum altitude a DSO reaches at a given observing location.
         """
+        window = get_stored_window(self, location=location)
+        if window is not None:
+            return window.max_altitude
         return get_max_altitude(self, location=location)
     
     def finder_chart_tag(self):
@@ -1602,6 +1668,76 @@ class DSOObservingMode(models.Model):
             output_field=models.IntegerField()
         ), # yes, you need this comma...
 
+class DSOObservingWindow(models.Model):
+    """
+    When a DSO is observable from a location: its opposition date, the season
+    when it's above the minimum altitude at midnight, and its maximum altitude.
+    Filled by the fill_observing_windows command (and refreshed when the DSO,
+    its modes, or the location change) so the DSO properties are plain reads.
+    latitude is what it was computed for - windows that don't match the
+    location anymore are ignored.
+    """
+    dso = models.ForeignKey (
+        DSO,
+        on_delete = models.CASCADE,
+        related_name = 'observing_windows'
+    )
+    location = models.ForeignKey (
+        ObservingLocation,
+        on_delete = models.CASCADE,
+        related_name = 'dso_windows'
+    )
+    latitude = models.FloatField (
+        _('Latitude')
+    )
+    # The next opposition when computed: it's the same date every year
+    opposition_date = models.DateField (
+        _('Opposition Date')
+    )
+    # Days on either side of opposition (None = circumpolar or too far south)
+    delta_days = models.FloatField (
+        _('Half Season (days)'),
+        null = True, blank = True
+    )
+    cos_hh = models.FloatField (
+        _('Cos(Hour Angle) at Min. Alt.')
+    )
+    min_altitude = models.FloatField (
+        _('Minimum Altitude')
+    )
+    max_altitude = models.FloatField (
+        _('Maximum Altitude')
+    )
+
+    @property
+    def next_opposition_date(self):
+        """
+        The stored opposition date, moved up to this year or next.
+        """
+        today = dt.date.today()
+        opposition = self.opposition_date
+        while opposition < today:
+            try:
+                opposition = opposition.replace(year=opposition.year + 1)
+            except ValueError: # Feb 29
+                opposition = opposition.replace(year=opposition.year + 1, day=28)
+        return opposition
+
+    class Meta:
+        ordering = ['dso', 'location']
+        unique_together = ['dso', 'location']
+
+    def __str__(self):
+        return f"{self.dso_id} @ {self.location_id}"
+
+def get_window_locations():
+    """
+    The locations that get stored observing windows: the usable ones and the default.
+    """
+    return ObservingLocation.objects.filter(
+        models.Q(status__in=['Active', 'Provisional']) | models.Q(is_default=True)
+    )
+
 class AnnalsDeepSkyDSO(AnnalsDeepSkyAbstract):
     dso = models.OneToOneField (
         DSO,
@@ -1617,4 +1753,95 @@ class AnnalsDeepSkyDSOInField(AnnalsDeepSkyAbstract):
         related_name = 'annals'
     )
     # placeholder if I have a non-observable DSO table
-    # other_dso 
\ No newline at end of file
+    # other_dso 
+
+@receiver([post_save, post_delete], sender=DSO)
+@receiver([post_save, post_delete], sender=DSOInField)
+def invalidate_dso_sky_index(sender, instance, **kwargs):
+    # Positions changed (or an object came/went): rebuild the cone-search index on next use
+    invalidate_sky_index(sender)
+
+@receiver(post_save, sender=DSO)
+@receiver(post_save, sender=DSOInField)
+def store_dso_sky_position(sender, instance, **kwargs):
+    # Keep the spatial table used by coordinate filters in step
+    store_sky_position(sender, instance)
+
+@receiver(post_delete, sender=DSO)
+@receiver(post_delete, sender=DSOInField)
+def remove_dso_sky_position(sender, instance, **kwargs):
+    remove_sky_position(sender, instance.pk)
+
+@receiver([post_save, post_delete], sender=AtlasPlate)
+@receiver([post_save, post_delete], sender=AtlasPlateSpecial)
+def invalidate_atlas_plate_graph(sender, instance, **kwargs):
+    # A plate came/went or moved: rebuild the neighbor graph on next use
+    # (saving a plate's DSO list doesn't change it)
+    if kwargs.get('created', True): # i.e., created or deleted
+        invalidate_plate_graph()
+    else:
+        invalidate_plate_graph(instance)
+
+@receiver(pre_save, sender=AtlasPlate)
+@receiver(pre_save, sender=AtlasPlateSpecial)
+def remember_atlas_plate_center(sender, instance, **kwargs):
+    # So that the post_save receivers can tell whether the plate moved
+    saved = sender.objects.filter(pk=instance.pk) if instance.pk else sender.objects.none()
+    instance._saved_center = saved.values_list('center_ra', 'center_dec').first()
+
+@receiver([post_save, post_delete], sender=AtlasPlate)
+@receiver([post_save, post_delete], sender=AtlasPlateSpecial)
+def bump_atlas_plate_backgrounds(sender, instance, **kwargs):
+    # Plate centers are on the neighbor markers of the plate backgrounds:
+    # redraw them if a plate came/went or moved (not on every re-render's save)
+    if getattr(instance, '_saved_center', None) != (instance.center_ra, instance.center_dec):
+        bump_background_cache()
+
+@receiver([post_save, post_delete], sender=AtlasPlateConstellationAnnotation)
+def bump_constellation_annotation_backgrounds(sender, instance, **kwargs):
+    # The constellation names are part of the atlas plate backgrounds
+    bump_background_cache()
+
+@receiver([post_save, post_delete], sender=DSO)
+@receiver([post_save, post_delete], sender=DSOAlias)
+@receiver([post_save, post_delete], sender=DSOInField)
+@receiver([post_save, post_delete], sender=DSOInFieldAlias)
+@receiver([post_save, post_delete], sender=Catalog)
+def invalidate_dso_name_index(sender, instance, **kwargs):
+    # A name/ID/alias changed: rebuild the designation index on next use
+    invalidate_name_index()
+
+@receiver([post_save, post_delete], sender=DSO)
+@receiver([post_save, post_delete], sender=DSOInField)
+@receiver([post_save, post_delete], sender=MilkyWay)
+def bump_dso_render_cache(sender, instance, **kwargs):
+    # Anything drawn on maps/finder charts changed: don't reuse cached images
+    bump_render_cache()
+
+@receiver([post_save, post_delete], sender=MilkyWay)
+def invalidate_milky_way_geometry(sender, instance, **kwargs):
+    # Re-read the contours on next use, and redraw the atlas/finder backgrounds
+    invalidate_geometry('milky_way')
+    bump_background_cache()
+
+@receiver(post_save, sender=DSO)
+@receiver([post_save, post_delete], sender=DSOObservingMode)
+def refresh_dso_observing_windows(sender, instance, **kwargs):
+    # Position or imaging priority may have changed
+    if isinstance(kwargs.get('origin'), DSO): # the DSO's being deleted
+        return
+    dso_id = instance.pk if sender == DSO else instance.dso_id
+    dsos = DSO.objects.filter(pk=dso_id).prefetch_related('dsoobservingmode_set')
+    fill_observing_windows(dsos, get_window_locations())
+
+@receiver([post_save, post_delete], sender=ObservingLocation)
+def clear_default_location_values(sender, instance, **kwargs):
+    # The default location may have changed
+    clear_default_location()
+
+@receiver(post_save, sender=ObservingLocation)
+def refresh_location_observing_windows(sender, instance, **kwargs):
+    # If the location has been moved, recompute its stored windows
+    if instance.dso_windows.exclude(latitude=instance.latitude).exists():
+        dsos = DSO.objects.filter(observing_windows__location=instance).distinct()
+        fill_observing_windows(dsos.prefetch_related('dsoobservingmode_set'), [instance])
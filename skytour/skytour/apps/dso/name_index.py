@@ -0,0 +1,183 @@
+import bisect
+import difflib
+import re
+import threading
+from django.apps import apps
+
+"""
+In-memory index of DSO designations: every catalog ID, alias, DSOInField ID
+and alias, map label and nickname, pointing at the DSO it belongs to.
+
+It's built the first time it's needed (one query per table) and thrown away
+by the post_save/post_delete receivers in dso.models when any of those rows
+change, like astro.sky_index.   Lookups are dict/bisect operations:
+    exact():    normalized (case, spacing) match
+    prefix():   names starting with the text
+    fuzzy():    the closest names, for typos and odd punctuation
+search.py uses it to resolve names the same way the old sequence of queries did.
+"""
+
+# The kinds of name, in the order a catalog-ID lookup tries them
+CATALOG_ID = 'catalog'
+ALIAS = 'alias'
+IN_FIELD = 'in_field'
+IN_FIELD_ALIAS = 'in_field_alias'
+MAP_LABEL = 'map_label'
+NICKNAME = 'nickname'
+OTHER = 'other'             # IDs in the OTHER catalog are looked up bare
+IN_FIELD_NICKNAME = 'in_field_nickname'
+KIND_ORDER = [CATALOG_ID, ALIAS, IN_FIELD, IN_FIELD_ALIAS, MAP_LABEL, NICKNAME, OTHER, IN_FIELD_NICKNAME]
+
+def normalize_name(name):
+    """
+    Lower case, single spaces.
+    """
+    return re.sub(r'\s+', ' ', str(name).strip().lower())
+
+def compact_name(name):
+    """
+    Letters and digits only, no leading zeros on numbers: 'NGC 0224' = 'ngc-224' = 'ngc224'.
+    """
+    name = re.sub(r'(?<![0-9])0+(?=[0-9])', '', normalize_name(name))
+    return re.sub(r'[^0-9a-z]', '', name)
+
+class DSONameIndex:
+    def __init__(self):
+        self.names = {}         # normalized name: [(kind, DSO pk), ...]
+        self.compact = {}       # compact name: [normalized name, ...]
+        self.shown_names = {}   # exact shown_name: DSO pk (DSOs first, then aliases)
+        self.nicknames = []     # (normalized nickname, kind, DSO pk) for substring searches
+        self.rank = {}          # DSO pk: position in the DSO default ordering
+        self.sorted_names = []
+
+    def add(self, name, kind, pk):
+        if name is None or pk is None or str(name).strip() == '':
+            return
+        key = normalize_name(name)
+        entries = self.names.setdefault(key, [])
+        if (kind, pk) not in entries:
+            entries.append((kind, pk))
+        same = self.compact.setdefault(compact_name(key), [])
+        if key not in same:
+            same.append(key)
+        if kind in [NICKNAME, IN_FIELD_NICKNAME]:
+            self.nicknames.append((key, kind, pk))
+
+    def add_shown_name(self, name, pk):
+        if name and name not in self.shown_names:
+            self.shown_names[name] = pk
+
+    def finish(self):
+        self.sorted_names = sorted(self.names.keys())
+        for entries in self.names.values():
+            entries.sort(key=lambda e: KIND_ORDER.index(e[0])) # stable: keeps row order within a kind
+
+    def __len__(self):
+        return len(self.names)
+
+    def first(self, pks):
+        """
+        Of these DSO pks, the one that comes first in the DSO ordering (i.e., queryset.first()).
+        """
+        pks = list(pks)
+        return min(pks, key=lambda pk: self.rank.get(pk, len(self.rank))) if len(pks) > 0 else None
+
+    def exact(self, name, kinds=None):
+        """
+        [(kind, DSO pk), ...] for the name, best first.
+        """
+        entries = self.names.get(normalize_name(name), [])
+        return [e for e in entries if kinds is None or e[0] in kinds]
+
+    def prefix(self, text, kinds=None, limit=20):
+        """
+        [(name, kind, DSO pk), ...] for names starting with text, in name order.
+        """
+        text = normalize_name(text)
+        out = []
+        i = bisect.bisect_left(self.sorted_names, text)
+        while i < len(self.sorted_names) and self.sorted_names[i].startswith(text):
+            name = self.sorted_names[i]
+            out += [(name, kind, pk) for kind, pk in self.names[name] if kinds is None or kind in kinds]
+            if limit is not None and len(out) >= limit:
+                return out[:limit]
+            i += 1
+        return out
+
+    def containing(self, text, kinds=(NICKNAME,)):
+        """
+        [(name, kind, DSO pk), ...] for nicknames containing text.
+        """
+        text = normalize_name(text)
+        return [(name, kind, pk) for name, kind, pk in self.nicknames if kind in kinds and text in name]
+
+    def fuzzy(self, text, limit=5, cutoff=0.75):
+        """
+        [(name, kind, DSO pk), ...] for the names closest to text:
+        same letters/digits first, then similar spellings.
+        """
+        key = compact_name(text)
+        names = list(self.compact.get(key, []))
+        if len(names) < limit:
+            close = difflib.get_close_matches(key, self.compact.keys(), n=limit, cutoff=cutoff)
+            for c in close:
+                names += [n for n in self.compact[c] if n not in names]
+        out = []
+        for name in names[:limit]:
+            out += [(name, kind, pk) for kind, pk in self.names[name]]
+        return out
+
+    def shown_name(self, name):
+        """
+        The DSO pk for an exact shown_name (of the DSO or an alias), or None.
+        """
+        return self.shown_names.get(name)
+
+def build_name_index():
+    DSO = apps.get_model('dso', 'DSO')
+    DSOAlias = apps.get_model('dso', 'DSOAlias')
+    DSOInField = apps.get_model('dso', 'DSOInField')
+    DSOInFieldAlias = apps.get_model('dso', 'DSOInFieldAlias')
+    index = DSONameIndex()
+
+    dsos = list(DSO.objects.values_list(
+        'pk', 'catalog__abbreviation', 'id_in_catalog', 'shown_name', 'map_label', 'nickname'))
+    for pk, cat, id_in_cat, shown_name, _, _ in dsos:
+        index.rank[pk] = len(index.rank)
+        index.add(f"{cat} {id_in_cat}", CATALOG_ID, pk)
+        index.add_shown_name(shown_name, pk)
+    aliases = DSOAlias.objects.values_list('object_id', 'catalog__abbreviation', 'id_in_catalog', 'shown_name')
+    for pk, cat, id_in_cat, shown_name in aliases:
+        index.add(f"{cat} {id_in_cat}", ALIAS, pk)
+        index.add_shown_name(shown_name, pk)
+    in_field = list(DSOInField.objects.values_list('parent_dso_id', 'catalog__abbreviation', 'id_in_catalog', 'nickname'))
+    for pk, cat, id_in_cat, _ in in_field:
+        index.add(f"{cat} {id_in_cat}", IN_FIELD, pk)
+    field_aliases = DSOInFieldAlias.objects.values_list('object__parent_dso_id', 'catalog__abbreviation', 'id_in_catalog')
+    for pk, cat, id_in_cat in field_aliases:
+        index.add(f"{cat} {id_in_cat}", IN_FIELD_ALIAS, pk)
+    for pk, cat, id_in_cat, _, map_label, nickname in dsos:
+        index.add(map_label, MAP_LABEL, pk)
+        index.add(nickname, NICKNAME, pk)
+        if cat == 'OTHER':
+            index.add(id_in_cat, OTHER, pk)
+    for pk, _, _, nickname in in_field:
+        index.add(nickname, IN_FIELD_NICKNAME, pk)
+    index.finish()
+    return index
+
+_lock = threading.Lock()
+_index = {}
+
+def get_name_index():
+    """
+    The index, building it if needed.
+    """
+    with _lock:
+        if 'index' not in _index:
+            _index['index'] = build_name_index()
+        return _index['index']
+
+def invalidate_name_index():
+    with _lock:
+        _index.pop('index', None)
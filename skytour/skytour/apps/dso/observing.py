@@ -1,3 +1,5 @@
+from ..astro.astro import get_delta_hour_for_altitude
+from ..astro.culmination import get_opposition_date
 from ..observe.models import ObservingLocation
 from ..site_parameter.helpers import find_site_parameter
 
@@ -25,9 +27,88 @@ def make_observing_date_grid(dso):
 def get_max_altitude(dso, location=None):
     
     if location is None: # Get the default location
-        location = ObservingLocation.get_default_location()
-
-    lat = location.latitude
+        lat = get_default_location_values()[1]
+    else:
+        lat = location.latitude
     delta = 90. - lat + dso.dec
     delta = 180 - delta if delta > 90 else delta
-    return delta
\ No newline at end of file
+    return delta
+
+### Stored observing windows (DSOObservingWindow)
+def get_observing_window_values(dec, latitude, imaging_priority=None, default_min_altitude=None):
+    """
+    The half-width in days of the season when an object is above the minimum
+    altitude at midnight, cos(hour angle) at that altitude, the altitude used,
+    and the maximum altitude - at this latitude.
+    NOTE: the minimum is 20° generally, 5° or 10° for objects too far south
+        (5° if it has an imaging priority).
+    """
+    if default_min_altitude is None:
+        default_min_altitude = find_site_parameter('minimum-object-altitude', default=10., param_type='float')
+    alt = 20.
+    delta_days, cos_hh = get_delta_hour_for_altitude(dec, dlat=latitude)
+    if delta_days is None:
+        alt = 5. if (imaging_priority is not None and imaging_priority > 0) else default_min_altitude
+        delta_days, cos_hh = get_delta_hour_for_altitude(dec, alt=alt, dlat=latitude)
+    max_alt = 90. - latitude + dec
+    max_alt = 180 - max_alt if max_alt > 90 else max_alt
+    return dict(delta_days=delta_days, cos_hh=cos_hh, min_altitude=alt, max_altitude=max_alt)
+
+_default_location = {}
+
+def get_default_location_values():
+    """
+    The default ObservingLocation's (pk, latitude) - kept, since every DSO property asks for it.
+    (Cleared when a location is saved.)
+    """
+    if 'pk' not in _default_location:
+        location = ObservingLocation.get_default_location()
+        _default_location['pk'] = location.pk if location is not None else None
+        _default_location['latitude'] = location.latitude if location is not None else None
+    return _default_location['pk'], _default_location['latitude']
+
+def clear_default_location():
+    _default_location.clear()
+
+def get_stored_window(dso, location=None):
+    """
+    The DSOObservingWindow for a DSO at a location (the default if None),
+    or None if there isn't one for the location's current latitude.
+    Uses the prefetched windows if they're there (see DSOQuerySet.with_observing_summary()).
+    """
+    if location is None:
+        location_id, latitude = get_default_location_values()
+    else:
+        location_id, latitude = location.pk, location.latitude
+    windows = dso._prefetched('observing_windows')
+    if windows is None:
+        windows = dso.observing_windows.filter(location_id=location_id)
+    for window in windows:
+        if window.location_id == location_id and window.latitude == latitude:
+            return window
+    return None
+
+def fill_observing_windows(dsos, locations):
+    """
+    (Re)build the stored windows for these DSOs at these locations.
+    dsos should have their modes prefetched (the imaging priority matters).
+    Returns the number of windows stored.
+    """
+    locations = list(locations)
+    if len(locations) == 0:
+        return 0
+    Window = locations[0].dso_windows.model
+    default_min_altitude = find_site_parameter('minimum-object-altitude', default=10., param_type='float')
+    rows, pks = [], []
+    for dso in dsos:
+        pks.append(dso.pk)
+        opposition = get_opposition_date(dso.ra, next=True).date()
+        ipri = dso.mode_imaging_priority
+        for location in locations:
+            values = get_observing_window_values(dso.dec, location.latitude, 
+                imaging_priority=ipri, default_min_altitude=default_min_altitude)
+            rows.append(Window(dso=dso, location=location, latitude=location.latitude, 
+                opposition_date=opposition, **values))
+    Window.objects.filter(dso_id__in=pks, location__in=locations).delete()
+    Window.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
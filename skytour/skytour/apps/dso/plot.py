@@ -4,18 +4,19 @@ from re import X
 import io
 from matplotlib import pyplot as plt
 from matplotlib.backends.backend_agg import FigureCanvasAgg as FigureCanvas
-from scipy import spatial
-from skyfield.api import load, Star
+from skyfield.api import Star
 from skyfield.projections import build_stereographic_projection
 
-from ..astro.angdist import chord_length
-from ..astro.transform import get_cartesian
+from ..astro.ephemeris import get_eph, get_timescale
+from ..astro.sky_index import cone_search, fudged_radius
+from ..plotting.backgrounds import draw_background
 from ..plotting.map import *
-from ..site_parameter.helpers import get_ephemeris
+from ..plotting.projection import project_lines
+from ..utils.files import atomic_file
 from ..utils.format import to_hm, to_dm
 
 from .const_utils import get_boundary_lines
-from .finder import plot_dso
+from .symbols import DSOSymbols, add_chart_labels
 from .models import AtlasPlate, DSO
 from .vocabs import MILKY_WAY_CONTOUR_COLORS
 
@@ -54,18 +55,7 @@ def get_dsos_on_plate(ra, dec, fov=20):
     But mostly it works.
     """
     fudge = 120
-    dsos = DSO.objects.all()
-    radius = chord_length(fov, degrees=True) * fudge
-    coords = []
-    for other in dsos:
-        coords.append(other.get_xyz)
-    center = get_cartesian(ra, dec, ra_dec=True)
-    tree = spatial.KDTree(coords)
-    neighbor_list = tree.query_ball_point([center], radius)
-    neighbor_objects = []
-    for idx in neighbor_list[[0][0]]:
-        neighbor_objects.append(dsos[idx])
-    return neighbor_objects
+    return list(cone_search(DSO, ra, dec, fudged_radius(fov, fudge)))
 
 def map_constellation_boundaries(ax, lines, earth, t, projection, reversed=False):
     """
@@ -75,16 +65,9 @@ def map_constellation_boundaries(ax, lines, earth, t, projection, reversed=False
     line_color = '#9907' if reversed else '#999' # constellation-boundary
     line_width = 1.5
     line_type = '--'
-    for k, v in lines.items():
-        # k is the key, v is the list of coordinates
-        d = dict(x =[], y = [])
-        for point in v:
-            ra = point[0]
-            dec = point[1]
-            x, y = projection(earth.at(t).observe(Star(ra_hours=ra, dec_degrees=dec)))
-            d['x'].append(x)
-            d['y'].append(y)
-        w = ax.plot(d['x'], d['y'], ls=line_type, lw=line_width, alpha=0.7, color=line_color)
+    # lines are PackedLines (see const_utils.get_boundary_lines()) - project them all at once
+    for x, y in project_lines(earth, t, projection, lines):
+        w = ax.plot(x, y, ls=line_type, lw=line_width, alpha=0.7, color=line_color)
     return ax
 
 def create_atlas_plot(
@@ -94,18 +77,20 @@ def create_atlas_plot(
         mag_offset = 0, shapes = False,
         label_size = 'x-small',
         label_weight = 'normal',
-        model = AtlasPlate
+        model = AtlasPlate,
+        cull_labels = False
     ):
     """
     Create an AtlasPlate image.
+    cull_labels: with shapes, skip DSO labels that would overlap one already drawn
     IDEA V2.x: Change annotation font weight to be BOLD for high/highest priority!
     """
     fov = fov if fov else 20.
     object = model.objects.get(plate_id=plate_id)
-    ts = load.timescale()
+    ts = get_timescale()
     # Datetime is arbitrary
     t = ts.from_datetime(datetime.datetime(2022, 1, 1, 0, 0).replace(tzinfo=pytz.utc)) # Arbitrary time
-    eph = load(get_ephemeris())
+    eph = get_eph()
     earth = eph['earth']
     zenith = earth.at(t).observe(Star(ra_hours=center_ra, dec_degrees=center_dec))
 
@@ -123,30 +108,41 @@ def create_atlas_plot(
     limit = np.sin(angle) / (1.0 - np.cos(angle))
 
     # NOW PLOT THINGS!
-    # 1. stars constellation lines
-    ax = map_plate_neighbors(ax, object, reversed=reversed)
-    if model == AtlasPlate:
-        ax = map_constellation_names(ax, object, earth, t, projection, reversed=reversed)
-
-    ax = map_equ(ax, earth, t, projection, 'ecl', reversed=reversed)
-    ax = map_equ(ax, earth, t, projection, 'gal', reversed=reversed)
-    if abs(center_dec <= 15.):
-        ax = map_equ(ax, earth, t, projection, 'equ', reversed=reversed)
-
-    ax = map_milky_way(ax, earth, t, projection, reversed=reversed, colors=MILKY_WAY_CONTOUR_COLORS[1])
-    ax = map_milky_way(ax, earth, t, projection, reversed=reversed, contour=2, colors=MILKY_WAY_CONTOUR_COLORS[2])
-    ax = map_special_points(ax, earth, t, projection, reversed=reversed)
-    if model == AtlasPlate:
-        lines, _ = get_boundary_lines(plate_id, 'plate')
-        ax = map_constellation_boundaries(ax, lines, earth, t, projection, reversed=reversed)
-    ax, stars = map_hipparcos(ax, earth, t, mag_limit, projection, reversed=reversed, mag_offset=mag_offset)
-    line_color = '#99f' if reversed else "#00f4" # constellation-line
-    ax = map_constellation_lines(ax, stars, reversed=reversed, line_color=line_color)
-    ax = map_bright_stars(ax, earth, t, projection, points=False, annotations=True, reversed=reversed)
+    # Everything but the DSOs is the same every time the plate is drawn: 
+    # draw it once (see plotting/backgrounds.py)
+    def draw_plate(ax):
+        # 1. stars constellation lines
+        ax = map_plate_neighbors(ax, object, reversed=reversed)
+        if model == AtlasPlate:
+            ax = map_constellation_names(ax, object, earth, t, projection, reversed=reversed)
+
+        ax = map_equ(ax, earth, t, projection, 'ecl', reversed=reversed)
+        ax = map_equ(ax, earth, t, projection, 'gal', reversed=reversed)
+        if abs(center_dec <= 15.):
+            ax = map_equ(ax, earth, t, projection, 'equ', reversed=reversed)
+
+        ax = map_milky_way(ax, earth, t, projection, reversed=reversed, colors=MILKY_WAY_CONTOUR_COLORS[1])
+        ax = map_milky_way(ax, earth, t, projection, reversed=reversed, contour=2, colors=MILKY_WAY_CONTOUR_COLORS[2])
+        ax = map_special_points(ax, earth, t, projection, reversed=reversed)
+        if model == AtlasPlate:
+            lines, _ = get_boundary_lines(plate_id, 'plate')
+            ax = map_constellation_boundaries(ax, lines, earth, t, projection, reversed=reversed)
+        ax, stars = map_hipparcos(ax, earth, t, mag_limit, projection, reversed=reversed, mag_offset=mag_offset,
+            center=(center_ra, center_dec), radius=fov)
+        line_color = '#99f' if reversed else "#00f4" # constellation-line
+        ax = map_constellation_lines(ax, stars, reversed=reversed, line_color=line_color)
+        ax = map_bright_stars(ax, earth, t, projection, points=False, annotations=True, reversed=reversed)
+    plate = dict(
+        plate=object, center_ra=center_ra, center_dec=center_dec, fov=fov, 
+        mag_limit=mag_limit, mag_offset=mag_offset, reversed=reversed
+    )
+    ax = draw_background(ax, 'atlas_plate', plate, draw_plate, limit)
 
     if shapes:    
-        other_dso_records = DSO.objects.order_by('-major_axis_size')
-        other_dsos = {'x': [], 'y': [], 'label': [], 'marker': []}
+        other_dso_records = cone_search(DSO, center_ra, center_dec, fov, 
+            queryset=DSO.objects.order_by('-major_axis_size').with_observing_summary())
+        other_dsos = {'x': [], 'y': [], 'label': []}
+        symbols = DSOSymbols(reversed=reversed)
         for other in other_dso_records:
             x, y = projection(earth.at(t).observe(other.skyfield_object))
             if abs(x) > limit or abs(y) > limit:
@@ -154,27 +150,18 @@ def create_atlas_plot(
             other_dsos['x'].append(x)
             other_dsos['y'].append(y)
             other_dsos['label'].append(other.label_on_chart)
-            other_dsos['marker'].append(other.object_type.marker_type)
-            ax = plot_dso(ax, x, y, other, 
+            symbols.add(x, y, other, 
                 alpha=0.6, 
-                reversed=reversed, 
                 #min_size=10.
                 min_size=15.,
                 default_size=10.
             )
-        xxx = np.array(other_dsos['x'])
-        yyy = np.array(other_dsos['y'])
+        ax = symbols.draw(ax)
         text_color = '#6ff' if reversed else '#333' # annotation
-        for x, y, z in zip(xxx, yyy, other_dsos['label']):
-            plt.annotate(
-                z, (x, y), 
-                textcoords='offset points',
-                xytext=(5, 5),
-                ha='left',
-                color = text_color,
-                fontweight = label_weight,
-                fontsize=label_size
-            )
+        add_chart_labels(ax, other_dsos['x'], other_dsos['y'], other_dsos['label'],
+            offset=(5, 5), ha='left', color=text_color, 
+            fontweight=label_weight, fontsize=label_size, cull=cull_labels
+        )
     else:
         ax, _ = map_dsos(ax, earth, t, projection,
             center = (center_ra, center_dec), 
@@ -201,7 +188,8 @@ def create_atlas_plot(
 
     if save_file:
         fn = get_fn(center_ra, center_dec, plate_id, shapes=shapes, reversed=reversed)
-        fig.savefig(f'media/{path}/{fn}', bbox_inches='tight')
+        with atomic_file(f'media/{path}/{fn}') as tmp:
+            fig.savefig(tmp, bbox_inches='tight')
         plt.cla()
         plt.close(fig)
         return fn, on_plate
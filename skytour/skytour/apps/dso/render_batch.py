@@ -0,0 +1,229 @@
+import datetime, hashlib, json, multiprocessing, os, pytz, time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError, as_completed
+from django.db import connections
+from django.db.models import Count
+from matplotlib import pyplot as plt
+from ..astro.ephemeris import get_eph, get_timescale
+from ..astro.sky_index import cone_search, get_sky_index
+from ..stars.star_catalog import get_constellation_edges, get_star_catalog
+from ..utils.files import atomic_file
+from .atlas_utils import plate_list
+from .finder import create_dso_finder_chart
+from .milky_way import preload_segments
+from .models import DSO
+from .plot import create_atlas_plot
+
+"""
+Batch rendering of DSO finder charts and atlas plates.
+
+Each worker process loads the ephemeris, the star catalog, constellation lines,
+the DSO sky index and the Milky Way once, and then draws whatever chunk of
+DSOs/plates it's handed.   Workers ONLY draw (and write image files atomically);
+the database updates stay in the management command.
+
+A RenderManifest next to the images remembers a signature of what each image
+was drawn from, so that a re-run skips the targets that haven't changed.
+"""
+
+# Bump this when the chart drawing code changes, so everything gets redrawn.
+RENDER_VERSION = 1
+
+# The DSO fields that show up on a chart
+CHART_FIELDS = [
+    'ra', 'dec', 'catalog_id', 'id_in_catalog', 'shown_name', 'nickname', 'map_label',
+    'object_type_id', 'constellation_id', 'magnitude',
+    'major_axis_size', 'minor_axis_size', 'orientation_angle'
+]
+IN_FIELD_FIELDS = [x for x in CHART_FIELDS if x != 'map_label']
+
+_worker = {}
+
+def init_worker(utdt=None, setup_django=True):
+    """
+    Set up a worker: Django (needed when processes are spawned rather than forked),
+    a fresh database connection, and everything every chart draws.
+    """
+    if setup_django:
+        import django
+        django.setup()
+        connections.close_all()
+    utdt = datetime.datetime.now(pytz.timezone('UTC')) if utdt is None else utdt
+    ts = get_timescale()
+    eph = get_eph()
+    _worker.update(ts=ts, eph=eph, earth=eph['earth'], t=ts.from_datetime(utdt))
+    get_star_catalog()
+    get_constellation_edges()
+    get_sky_index(DSO)
+    preload_segments()
+
+def run_chunk(function, chunk):
+    """
+    Run function(task) for a chunk of tasks; return (task, result, seconds, error) for each.
+    """
+    results = []
+    for task in chunk:
+        start = time.perf_counter()
+        try:
+            result, error = function(task), None
+        except Exception as e:
+            result, error = None, f"{e.__class__.__name__}: {e}"
+            plt.close('all')
+        results.append((task, result, time.perf_counter() - start, error))
+    return results
+
+def run_batch(function, tasks, workers=1, chunk_size=10, utdt=None, timeout=None):
+    """
+    Run function(task) for every task - in a pool of worker processes if workers > 1,
+    handing the tasks out chunk_size at a time.
+    Yields (task, result, seconds, error) as each chunk finishes.
+
+    The workers are spawned, not forked (so it's safe from a threaded web process).
+    If timeout (seconds, for the whole batch) runs out, the tasks that haven't
+    come back are yielded with a TimeoutError and the pool is abandoned.
+    """
+    chunk_size = max(1, chunk_size)
+    chunks = [tasks[i:i+chunk_size] for i in range(0, len(tasks), chunk_size)]
+    if len(chunks) == 0:
+        return
+    if workers <= 1:
+        init_worker(utdt=utdt, setup_django=False)
+        for chunk in chunks:
+            yield from run_chunk(function, chunk)
+        return
+
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+        initializer=init_worker, initargs=(utdt,))
+    futures = {pool.submit(run_chunk, function, chunk): chunk for chunk in chunks}
+    finished = True
+    try:
+        done = set()
+        try:
+            for future in as_completed(futures, timeout=timeout):
+                done.add(future)
+                yield from future.result()
+        except TimeoutError:
+            finished = False
+            for future, chunk in futures.items():
+                if future not in done:
+                    for task in chunk:
+                        yield (task, None, 0., f"TimeoutError: not done after {timeout}s")
+    finally:
+        # Don't wait on a stuck worker
+        pool.shutdown(wait=finished, cancel_futures=True)
+
+### Worker tasks - these have to be module-level so they can be pickled.
+def render_finder_chart(task):
+    """
+    task = (DSO pk, create_dso_finder_chart() keyword arguments); returns the filename.
+    """
+    pk, options = task
+    dso = DSO.objects.with_observing_summary().get(pk=pk)
+    options = dict({'save_file': True}, **options)
+    return create_dso_finder_chart(
+        dso, ts=_worker['ts'], eph=_worker['eph'], t=_worker['t'], earth=_worker['earth'],
+        **options
+    )
+
+def render_atlas_plate(task):
+    """
+    task = (plate_id, shapes, reversed); returns (filename, PKs of the DSOs on the plate).
+    """
+    plate_id, shapes, reversed = task
+    ra, dec = plate_list()[plate_id]
+    fn, on_plate = create_atlas_plot(ra, dec, plate_id, shapes=shapes, reversed=reversed)
+    return fn, [x.pk for x in on_plate]
+
+### Signatures
+def make_signature(*parts):
+    blob = json.dumps([RENDER_VERSION, parts], sort_keys=True, default=str)
+    return hashlib.sha1(blob.encode('utf-8')).hexdigest()
+
+def _chart_rows(queryset):
+    # n_in_field: label_on_chart gets a '+' if there are DSOInField objects.
+    return list(queryset.annotate(n_in_field=Count('dsoinfield'))
+        .order_by('pk').values_list('pk', 'n_in_field', *CHART_FIELDS))
+
+def finder_chart_signature(dso, options):
+    """
+    Everything a finder chart for dso is drawn from: the options, the DSO itself,
+    the other DSOs in the field and (for narrow charts) its DSOInField objects.
+    """
+    fov = options.get('fov', 8.)
+    me = _chart_rows(DSO.objects.filter(pk=dso.pk))
+    others = _chart_rows(cone_search(DSO, dso.ra_float, dso.dec_float, fov).exclude(pk=dso.pk))
+    in_field = []
+    if options.get('show_in_field_dsos'):
+        in_field = list(dso.dsoinfield_set.order_by('pk').values_list('pk', *IN_FIELD_FIELDS))
+    return make_signature(options, me, others, in_field)
+
+def plate_key(plate_id, shapes, reversed):
+    """
+    Manifest key for one version of an atlas plate.
+    """
+    return f"{plate_id}-{'shapes' if shapes else 'markers'}-{'reversed' if reversed else 'normal'}"
+
+def atlas_plate_signature(plate_id, shapes, reversed, fov=20.):
+    """
+    Everything an atlas plate is drawn from: its center, the options and the DSOs on it.
+    """
+    ra, dec = plate_list()[plate_id]
+    dsos = _chart_rows(cone_search(DSO, ra, dec, fov))
+    return make_signature(plate_id, ra, dec, shapes, reversed, dsos)
+
+class RenderManifest:
+    """
+    The signature each image in a directory was drawn from, kept as JSON next to the images.
+    """
+    FILENAME = '.render_manifest.json'
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.path = os.path.join(directory, self.FILENAME)
+        try:
+            with open(self.path) as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def is_current(self, key, signature):
+        entry = self.entries.get(str(key))
+        if entry is None or entry['signature'] != signature:
+            return False
+        return os.path.exists(os.path.join(self.directory, entry['file']))
+
+    def record(self, key, signature, fn):
+        self.entries[str(key)] = dict(signature=signature, file=fn)
+
+    def save(self):
+        with atomic_file(self.path) as tmp:
+            with open(tmp, 'w') as f:
+                json.dump(self.entries, f, indent=1, sort_keys=True)
+
+class BatchReport:
+    """
+    Per-chart timing as results come in, and throughput at the end.
+    """
+    def __init__(self, total, skipped=0, label='chart'):
+        self.total = total
+        self.skipped = skipped
+        self.label = label
+        self.start = time.perf_counter()
+        self.n = self.rendered = self.failed = 0
+        self.render_time = 0.
+
+    def add(self, name, seconds, error=None):
+        self.n += 1
+        self.render_time += seconds
+        if error is None:
+            self.rendered += 1
+            print(f"[{self.n}/{self.total}] {name}: {seconds:.2f}s")
+        else:
+            self.failed += 1
+            print(f"[{self.n}/{self.total}] {name}: FAILED after {seconds:.2f}s - {error}")
+
+    def summary(self):
+        wall = time.perf_counter() - self.start
+        print(f"{self.rendered} {self.label}s rendered, {self.skipped} skipped, {self.failed} failed")
+        if self.n > 0:
+            rate = 60. * self.n / wall if wall > 0 else 0.
+            print(f"Wall time {wall:.1f}s; {self.render_time/self.n:.2f}s per {self.label}; {rate:.1f} {self.label}s/minute")
@@ -1,5 +1,9 @@
 import re
-from .models import DSO, DSOAlias, DSOInField, DSOInFieldAlias
+from .models import DSO
+from .name_index import (
+    ALIAS, CATALOG_ID, IN_FIELD, IN_FIELD_ALIAS, IN_FIELD_NICKNAME, MAP_LABEL, NICKNAME, OTHER,
+    get_name_index, normalize_name
+)
 
 
 def find_cat_id_in_string(string):
@@ -18,80 +22,82 @@ def find_cat_id_in_string(string):
         else:
             return None, string
 
-def search_dso_name(words, name, debug=False):
+def find_dso_pk(words, name, fuzzy=False, debug=False):
+    """
+    The pk of the DSO that a parsed query (see find_cat_id_in_string()) names, or None.
+    Same order as always: catalog ID, alias, DSOInField, DSOInField alias, map label,
+    nickname, OTHER catalog; or for a name: nickname, DSOInField nickname, map label.
+    With fuzzy, fall back on the closest designation (e.g., 'NGC 0224' for 'NGC 224').
+    """
+    index = get_name_index()
     if words is not None:
-        cat, id = words
-        # Easy lookup
-        primary = DSO.objects.filter(catalog__abbreviation__iexact=cat, id_in_catalog__iexact=id)
-        if debug:
-            print(f"{cat}, {id}: primary found {primary}")
-        if primary.count() > 0:
-            return primary.first()
-
-        # Maybe it's an alias
-        aliases = DSOAlias.objects.filter(catalog__abbreviation__iexact=cat, id_in_catalog__iexact=id)
-        if debug:
-            print(f"{cat}, {id}: aliases found {aliases}")
-        if aliases.count() > 0:
-            return aliases.first().object
-        
-        # Maybe it's a DSO in the field of another DSO
-        field_objects = DSOInField.objects.filter(catalog__abbreviation__iexact=cat, id_in_catalog__iexact=id)
-        if debug:
-            print(f"{cat}, {id}: in field found {field_objects}")
-        if field_objects.count() > 0:
-            return field_objects.first().parent_dso
-        
-        # Maybe it's a DSOInField alias
-        field_aliases = DSOInFieldAlias.objects.filter(
-            catalog__abbreviation__iexact=cat,
-            id_in_catalog__iexact=id
-        )
-        if field_aliases.count() > 0:
-            return field_aliases.first().object.parent_dso
-        
-        # Maybe it's a map label
         idstr = ' '.join(words)
-        map_name_objects = DSO.objects.filter(map_label__iexact=idstr)
-        if debug:
-            print(f"{idstr}: map label found {map_name_objects}")
-        if map_name_objects.count() > 0:
-            return map_name_objects.first()
+        for kind in [CATALOG_ID, ALIAS, IN_FIELD, IN_FIELD_ALIAS, MAP_LABEL]:
+            found = index.exact(idstr, kinds=[kind])
+            if debug:
+                print(f"{idstr}: {kind} found {found}")
+            if len(found) > 0:
+                return found[0][1]
         
         # maybe it's a nickname
-        nickname_objects = DSO.objects.filter(nickname__istartswith=idstr)
-        if nickname_objects.count() > 0:
-            return nickname_objects.first()
-        
+        found = index.prefix(idstr, kinds=[NICKNAME], limit=None)
+        if len(found) > 0:
+            return index.first(pk for _, _, pk in found)
+
         # Maybe it's in the other catalog
-        other_objects = DSO.objects.filter(catalog__abbreviation='OTHER', id_in_catalog__iexact=idstr)
+        found = index.exact(idstr, kinds=[OTHER])
         if debug:
-            print(f"{idstr}: other objects found {other_objects}")
-        if other_objects.count() > 0:
-            return other_objects.first()
-        
+            print(f"{idstr}: other objects found {found}")
+        if len(found) > 0:
+            return found[0][1]
+
     # TODO V2.x: come up with better logic for this
     # if you send one word as a name then it can get confused...
     else:
-        names = DSO.objects.filter(nickname__icontains=name)
+        found = index.containing(name, kinds=[NICKNAME])
         if debug:
-            print(f"name {name} found {names}")
-        if names.count() == 1:
-            return names.first()
-        elif names.count() > 1:
-            names = DSO.objects.filter(nickname__istartswith=name)
-            if names.count() >= 1:
-                return names.first()
-        
-        field_names = DSOInField.objects.filter(nickname__icontains=name)
+            print(f"name {name} found {found}")
+        pks = set(pk for _, _, pk in found)
+        if len(pks) == 1:
+            return pks.pop()
+        elif len(pks) > 1:
+            starts = [pk for nickname, _, pk in found if nickname.startswith(normalize_name(name))]
+            if len(starts) >= 1:
+                return index.first(starts)
+
+        found = index.containing(name, kinds=[IN_FIELD_NICKNAME])
         if debug:
-            print(f"name {name}: field names found {field_names}")
-        if field_names.count() > 0:
-            return field_names.first().parent_dso
-        
-        map_name_objects = DSO.objects.filter(map_label__iexact=name)
+            print(f"name {name}: field names found {found}")
+        if len(found) > 0:
+            return found[0][2]
+
+        found = index.exact(name, kinds=[MAP_LABEL])
+        if debug:
+            print(f"name {name}: map names found {found}")
+        if len(found) > 0:
+            return found[0][1]
+
+    if fuzzy:
+        query = ' '.join(words) if words is not None else name
+        found = index.fuzzy(query, limit=1)
         if debug:
-            print(f"name {name}: map names found {map_name_objects}")
-        if map_name_objects.count() > 0:
-            return map_name_objects.first()
-    return None
\ No newline at end of file
+            print(f"{query}: closest found {found}")
+        if len(found) > 0:
+            return found[0][2]
+    return None
+
+def search_dso_name(words, name, fuzzy=False, debug=False):
+    pk = find_dso_pk(words, name, fuzzy=fuzzy, debug=debug)
+    return DSO.objects.filter(pk=pk).first() if pk is not None else None
+
+def search_dso_names(queries, fuzzy=False):
+    """
+    Resolve a list of names (e.g., an observing list being imported) at once:
+    returns {query: DSO or None}.
+    """
+    pks = {}
+    for query in queries:
+        words, name = find_cat_id_in_string(query.strip().lower())
+        pks[query] = find_dso_pk(words, name, fuzzy=fuzzy)
+    dsos = DSO.objects.in_bulk([pk for pk in pks.values() if pk is not None])
+    return dict((query, dsos.get(pk)) for query, pk in pks.items())
@@ -0,0 +1,265 @@
+import math
+import numpy as np
+from matplotlib import patches, rcParams
+from matplotlib.artist import Artist
+from matplotlib.collections import LineCollection, PatchCollection
+from matplotlib.colors import to_rgba
+from matplotlib.font_manager import FontProperties
+from matplotlib.transforms import Bbox
+
+"""
+Drawing many DSOs on a chart.
+
+Adding a matplotlib patch (and an annotation) per DSO means thousands of artists
+on a dense plate (Virgo, Coma), and Agg spends most of its time on per-artist
+overhead.   DSOSymbols collects the symbols and draws each kind as a single
+collection; ChartLabels draws all of the labels as one artist, optionally
+dropping labels that would overlap ones already placed.
+"""
+
+#('marker', 'Marker'),                               # default - star like things, or unknown
+#('ellipse', 'Ellipse'),                             # galaxies - maybe not irregular
+#('open-circle', 'Open Circle'),                     # open clusters, associations
+#('gray-circle', 'Gray Circle'),                     # globular clusters
+#('circle-square', 'Circle in Square'),              # planetary nebulae
+#('square', 'Open Square'),                          # Emission Nebulae
+#('gray-square', 'Gray Square'),                     # Dark Nebulae
+#('circle-gray-square', 'Circle in Gray Square')     # cluster w/ nebulosity
+SQUARE_SYMBOLS = ['square', 'gray-square', 'circle-square', 'circle-gray-square', 'two-squares']
+
+def get_symbol_size(dso, min_size=1., max_size=40., default_size=None, debug=False):
+    """
+    The symbol's half-axes (radians, on the projection) and orientation:
+    scaled to the size of the object, if it's not too small (or large).
+    """
+    default_size = default_size if default_size else min_size
+    amajor = dso.major_axis_size if dso.major_axis_size is not None else default_size
+    amajor = amajor if amajor != 0 else default_size
+    aminor = amajor if dso.minor_axis_size is None or dso.minor_axis_size == 0 else dso.minor_axis_size
+
+    # Kludge for nebulae:
+    if dso.object_type.map_symbol_type in ['square', 'gray-square', 'two-squares']:
+        if min_size < 2.0:
+            min_size = 2.0
+
+    if debug:
+        print(f"DSO: {dso} {dso.major_axis_size} x {dso.minor_axis_size} D: {default_size} 0: {min_size}")
+
+    ratio = aminor / amajor
+    if amajor < min_size:
+        if debug:
+            print("\t TOO SMALL")
+        amajor = min_size
+        aminor = min_size * ratio
+    if amajor > max_size:
+        if debug:
+            print("\t TOO BIG")
+        amajor = max_size
+        aminor = max_size * ratio
+    if debug:
+        print(f"\t finally {amajor} x {aminor}")
+
+    # arcmin -> radians, halved
+    umajor = amajor * 2.909e-4 / 2.
+    uminor = aminor * 2.909e-4 / 2.
+    return umajor, uminor, dso.orientation_angle or 0
+
+def galaxy_color(slug):
+    color = '#99f' if 'barred' in slug else '#f00'
+    color = '#c6f' if 'ellip' in slug else color
+    color = '#c6f' if 'lenti' in slug else color
+    color = '#09f' if 'dwarf' in slug else color
+    color = '#c69' if 'irreg' in slug else color
+    return color
+
+class DSOSymbols:
+    """
+    The DSO symbols for a chart: add() each DSO, then draw() them all.
+
+    Symbols are drawn in the order they were added, as the per-DSO patches
+    were (callers sort largest first so small objects stay on top): each run
+    of patches is one PatchCollection, each run of markers one scatter.
+    """
+    def __init__(self, reversed=True):
+        self.reversed = reversed
+        self.layers = []    # ('patches', dict(patches, face, edge)) or ('marker', marker type, [(x, y), ...])
+        self.crosses = []
+
+    def __len__(self):
+        return sum(len(layer[1]['patches']) if layer[0] == 'patches' else len(layer[2]) for layer in self.layers)
+
+    def add_shape(self, patch, face, edge):
+        if len(self.layers) == 0 or self.layers[-1][0] != 'patches':
+            self.layers.append(('patches', dict(patches=[], face=[], edge=[])))
+        shapes = self.layers[-1][1]
+        shapes['patches'].append(patch)
+        shapes['face'].append(face)
+        shapes['edge'].append(edge)
+
+    def add_marker(self, marker, x, y):
+        if len(self.layers) == 0 or self.layers[-1][:2] != ('marker', marker):
+            self.layers.append(('marker', marker, []))
+        self.layers[-1][2].append((x, y))
+
+    def add(self, x, y, dso, alpha=.7, min_size=1., max_size=40., default_size=None, debug=False):
+        """
+        Queue one DSO at (x, y) with custom markers related to the object type.
+        """
+        umajor, uminor, angle = get_symbol_size(dso,
+            min_size=min_size, max_size=max_size, default_size=default_size, debug=debug)
+        ft = dso.object_type.map_symbol_type
+        slug = dso.object_type.slug.lower()
+
+        if ft == 'ellipse': # galaxies
+            ellipse = patches.Ellipse((x, y), uminor, umajor, angle=angle)
+            self.add_shape(ellipse, to_rgba(galaxy_color(slug), alpha), to_rgba('#999'))
+
+        elif ft in ['open-circle', 'gray-circle', 'circle-plus']: # clusters
+            color = '#999' if ft == 'gray-circle' else '#ff0'
+            color = '#4fd' if 'young' in slug else color # exception for YPCs
+            radius = umajor / 2.  # Why?  I don't know but the circles are always to large
+            r_color = '#fff' if self.reversed else '#000'
+            self.add_shape(patches.Circle((x, y), radius), to_rgba(color, alpha), to_rgba(r_color))
+            if ft == 'circle-plus':
+                self.crosses.append([(x, y-radius), (x, y+radius)])
+                self.crosses.append([(x-radius, y), (x+radius, y)])
+
+        elif ft in SQUARE_SYMBOLS: # UGH - the center point is the lower-left corner
+            # angle of the rectangle, rotated by the orientation angle + 180 degrees to get its opposite
+            theta = angle + math.degrees(math.atan2(uminor, umajor)) + 180.
+            r = math.sqrt(umajor*umajor + uminor*uminor)/2.
+            dx = r * math.cos(math.radians(theta))
+            dy = r * math.sin(math.radians(theta))
+            rectangle = patches.Rectangle((x + dx, y + dy), umajor, uminor, angle=angle)
+            if ft in ['square', 'gray-square']:
+                color = '#6f6' if ft == 'square' else '#999'
+                self.add_shape(rectangle, to_rgba(color, alpha), to_rgba('#000'))
+            elif ft == 'two-squares':
+                self.add_shape(rectangle, to_rgba('#c0c', alpha/2.), to_rgba('#c0c'))
+            else:
+                color = '#6f6' if ft == 'circle-square' else '#999'
+                self.add_shape(rectangle, to_rgba(color, alpha), to_rgba('k'))
+                self.add_shape(patches.Circle((x, y), uminor), to_rgba('#fff', alpha*.5), to_rgba('#000'))
+
+        elif ft in ('two-circles'):
+            ccolor = '#3fc' if self.reversed else '#3c9'
+            radius = umajor / 2.
+            self.add_shape(patches.Circle((x, y), radius), to_rgba('none'), to_rgba(ccolor))
+            self.add_shape(patches.Circle((x, y), 0.75 * radius), to_rgba('none'), to_rgba(ccolor))
+
+        else: # marker
+            self.add_marker(dso.object_type.marker_type, x, y)
+
+    def draw(self, ax):
+        """
+        One collection per run of patches/markers, in order; the cluster crosses
+        (lines, so above the patches as before) as one more.
+        """
+        for layer in self.layers:
+            if layer[0] == 'patches':
+                shapes = layer[1]
+                ax.add_collection(PatchCollection(shapes['patches'],
+                    facecolors=shapes['face'], edgecolors=shapes['edge']))
+            else:
+                xy = np.array(layer[2])
+                ax.scatter(
+                    xy[:,0], xy[:,1],
+                    s=50., c=['#00f'] * len(xy), facecolors='none',
+                    marker = layer[1],
+                )
+        if len(self.crosses) > 0:
+            ax.add_collection(LineCollection(self.crosses, colors='#ccc' if self.reversed else '#000'))
+        return ax
+
+class ChartLabels(Artist):
+    """
+    Text labels at data points, each offset by a fixed number of points
+    (like annotate(textcoords='offset points')), drawn by a single artist.
+    Labels whose point is off the axes aren't drawn; with cull=True neither
+    are ones that would overlap a label already drawn (in the order given).
+    """
+    zorder = 3
+
+    def __init__(self, x, y, labels, offset=(5, 5), ha='left', color=None,
+            fontsize=None, fontweight=None, cull=False):
+        super().__init__()
+        self.x = np.asarray(x, dtype=float)
+        self.y = np.asarray(y, dtype=float)
+        self.labels = list(labels)
+        self.offset = offset
+        self.ha = ha
+        self.color = color if color is not None else rcParams['text.color'] # i.e., the style's
+        self.cull = cull
+        self.prop = FontProperties(size=fontsize, weight=fontweight)
+        self.drawn = 0
+
+    def layout(self, renderer):
+        """
+        [(x, baseline y, label, (x0, y0, x1, y1)), ...] in display coordinates
+        for the labels that get drawn.
+        """
+        ax = self.axes
+        if not self.get_visible() or len(self.labels) == 0 or ax is None:
+            return []
+        points = ax.transData.transform(np.column_stack([self.x, self.y]))
+        dx = renderer.points_to_pixels(self.offset[0])
+        dy = renderer.points_to_pixels(self.offset[1])
+
+        cells = {} # placed label boxes, hashed by position
+        cell = 50.
+        placed = []
+        for (px, py), label in zip(points, self.labels):
+            if not label or not ax.bbox.contains(px, py):
+                continue
+            width, height, descent = renderer.get_text_width_height_descent(label, self.prop, ismath=False)
+            x0 = px + dx if self.ha == 'left' else px + dx - width
+            y0 = py + dy # baseline
+            box = (x0, y0 - descent, x0 + width, y0 - descent + height)
+            if self.cull:
+                keys = [(i, j)
+                    for i in range(int(box[0] // cell), int(box[2] // cell) + 1)
+                    for j in range(int(box[1] // cell), int(box[3] // cell) + 1)
+                ]
+                if any(
+                    box[0] < b[2] and b[0] < box[2] and box[1] < b[3] and b[1] < box[3]
+                    for key in keys for b in cells.get(key, [])
+                ):
+                    continue
+                for key in keys:
+                    cells.setdefault(key, []).append(box)
+            placed.append((x0, y0, label, box))
+        return placed
+
+    def get_window_extent(self, renderer=None):
+        """
+        The union of the drawn labels' boxes (so tight bbox/constrained layout see them).
+        """
+        if renderer is None:
+            renderer = self.figure._get_renderer()
+        boxes = [Bbox.from_extents(*box) for _, _, _, box in self.layout(renderer)]
+        return Bbox.union(boxes) if len(boxes) > 0 else Bbox.null()
+
+    def draw(self, renderer):
+        placed = self.layout(renderer)
+        self.drawn = 0
+        if len(placed) == 0:
+            return
+        _, canvas_height = renderer.get_canvas_width_height()
+        gc = renderer.new_gc()
+        gc.set_foreground(self.color)
+        gc.set_alpha(self.get_alpha())
+        for x0, y0, label, _ in placed:
+            if renderer.flipy():
+                y0 = canvas_height - y0
+            renderer.draw_text(gc, x0, y0, label, self.prop, 0., ismath=False)
+            self.drawn += 1
+        gc.restore()
+        self.stale = False
+
+def add_chart_labels(ax, x, y, labels, **kwargs):
+    """
+    Put a ChartLabels layer on the axes.
+    """
+    layer = ChartLabels(x, y, labels, **kwargs)
+    ax.add_artist(layer)
+    return layer
@@ -1,8 +1,12 @@
 import datetime as dt, pytz
+import numpy as np
 
-from ..astro.transform import get_alt_az, get_hour_angle
-from ..astro.utils import alt_get_small_sep
+from ..abstract.vocabs import YES
+from ..astro.time import get_last
+from ..astro.transform import get_alt_az_array, get_hour_angle_array
+from ..observe.horizon import get_horizon_mask
 from ..observe.models import ObservingLocation
+from .models import DSO, DSOList, DSOLibraryImage, DSOObservingMode
 import time
 
 # NOTE: This is in its own app mostly to get around a circular import problem.
@@ -63,90 +67,133 @@ def find_dsos_at_location_and_time (
     
     times.append((time.perf_counter(), 'Filtering DSOs'))
 
-    candidate_pks = []
-
-    for d in dsos: # loop on DSOs
-        override_active = on_dso_list_all and (d.active_observing_list_count > 0)
-        # Filter based on existing images
-        priority = d.mode_priority_value_dict[mode]
-        if priority is None and not override_active:
-            continue
-        if (priority != None) and (priority < min_priority) and not override_active:
-            continue
-        if (priority is None) and override_active:
-            pass
-        # always include imaged = 'All'
-        if imaged == 'Yes' and d.library_image is None:
-            continue
-        elif imaged == 'Redo':
-            if d.library_image is not None and not d.reimage:
-                continue
-        elif imaged == 'No' and d.library_image is not None and d.reimage == False:
-            continue
-        # filter by gear
-        if (gear is not None) and len(d.mode_list) > 0:
-            gear_set = set(gear)
-            dso_set = set(d.mode_list)
-            n_overlap = len(gear_set.intersection(dso_set))
-            if n_overlap < 1:
-                continue
-        if scheduled and (d.active_observing_list_count == 0):
-            continue
-        # Is it in a good location in the sky?
-        hour_angle = get_hour_angle(utdt, location.longitude, d.ra_float)
-        (az, alt, _) = d.alt_az(location, utdt)
-
-        # Is it far enough away from the Moon
-        lunar_distance = None
-        if moon is not None:
-            try:
-                moon_ra = moon['apparent']['equ']['ra']
-                moon_dec = moon['apparent']['equ']['dec']
-                (moon_az, moon_alt, moon_airmass) = get_alt_az(utdt, location.latitude, location.longitude, moon_ra, moon_dec)
-                #print(f"AZ: {moon_az} ALT: {moon_alt} AIR: {moon_airmass}")
-                if moon_alt is not None: # > -10.:
-                    lunar_distance = alt_get_small_sep(moon_ra, moon_dec, d.ra_float, d.dec_float, hemi=True)        
-                    if lunar_distance <= min_dso_lunar_distance:
-                        continue
-            except:
-                pass # oops...
-
-        # Check against location masks, etc.
-        in_window = is_available_at_location(location, az, alt, min_alt=min_alt, max_alt=max_alt, use_mask=mask, debug=debug)
-        if not in_window:
-            continue
-        # Is it below the celestial pole?
-        if not incl_low_culmination:
-            if location.latitude > 0.:   # Northern circumpolar
-                if d.dec_float > location.latitude and abs(hour_angle) > 6.0:
-                    print(f"Skipping {d} HA: {hour_angle:.2f} Dec: {d.dec_float:.2f}")
-                    continue
-            else: # Southern circumpolar
-                if d.dec_float < location.latitude and abs(hour_angle) > 6.0:
-                    print(f"Skipping {d} HA: {hour_angle:.2f} Dec: {d.dec_float:.2f}")
-                    continue
-        # Is it about to set?
-        if west_ha_limit is not None:
-            if hour_angle > west_ha_limit: # things are setting - ignore them
-                print(f"Setting: {d} HA: {hour_angle:.2f} > {west_ha_limit}")
-                continue
-        candidate_pks.append(d.pk)
+    if dsos is None:
+        dsos = DSO.objects.all()
+    cols = get_dso_columns(dsos, mode)
+    times.append((time.perf_counter(), 'Get DSO Columns'))
+
+    # Catalog filters - priority, images, gear, active lists
+    active = cols['active']
+    priority = cols['priority']
+    has_priority = ~np.isnan(priority)
+    override_active = active if on_dso_list_all else np.zeros_like(active)
+    keep = has_priority | override_active
+    keep &= ~(has_priority & (priority < min_priority) & ~override_active)
+    # always include imaged = 'All'
+    has_image = cols['has_image']
+    if imaged == 'Yes':
+        keep &= has_image
+    elif imaged == 'Redo':
+        keep &= ~(has_image & ~cols['reimage'])
+    elif imaged == 'No':
+        keep &= ~(has_image & ~cols['reimage'])
+    if gear is not None:
+        gear_set = set(gear)
+        gear_ok = np.array([len(m) == 0 or len(gear_set.intersection(m)) > 0 for m in cols['modes']], dtype=bool)
+        keep &= gear_ok
+    if scheduled:
+        keep &= active
+
+    # Is it in a good location in the sky?
+    ra, dec = cols['ra'], cols['dec']
+    last = get_last(utdt, location.longitude)
+    hour_angle = get_hour_angle_array(last, ra)
+    az, alt, airmass = get_alt_az_array(last, location.latitude, ra, dec)
+
+    # Is it far enough away from the Moon
+    if moon is not None and min_dso_lunar_distance is not None:
+        moon_ra = moon['apparent']['equ']['ra']
+        moon_dec = moon['apparent']['equ']['dec']
+        lunar_distance = get_small_sep_array(moon_ra, moon_dec, ra, dec)
+        keep &= lunar_distance > min_dso_lunar_distance
+
+    # Check against location masks, etc.
+    keep &= (np.abs(alt) <= 90.)
+    if max_alt is not None:
+        keep &= alt <= max_alt
+    if min_alt is not None:
+        keep &= alt >= min_alt
+    if mask:
+        keep &= get_horizon_mask(location).is_clear(az, alt)
+
+    # Is it below the celestial pole?
+    if not incl_low_culmination:
+        if location.latitude > 0.:   # Northern circumpolar
+            low = (dec > location.latitude) & (np.abs(hour_angle) > 6.0)
+        else: # Southern circumpolar
+            low = (dec < location.latitude) & (np.abs(hour_angle) > 6.0)
         if debug:
-            if alt < min_alt:
-                print(f"ERROR WITH DSO {d}: alt = {alt}, in_window = {in_window}")
+            for i in np.flatnonzero(keep & low):
+                print(f"Skipping {cols['pk'][i]} HA: {hour_angle[i]:.2f} Dec: {dec[i]:.2f}")
+        keep &= ~low
+    # Is it about to set?
+    if west_ha_limit is not None:
+        setting = hour_angle > west_ha_limit # things are setting - ignore them
+        if debug:
+            for i in np.flatnonzero(keep & setting):
+                print(f"Setting: {cols['pk'][i]} HA: {hour_angle[i]:.2f} > {west_ha_limit}")
+        keep &= ~setting
 
     times.append((time.perf_counter(), 'Assemble DSO List'))
 
     # Given the subset of DSOs - assemble the list
-    dsos = dsos.filter(pk__in=candidate_pks)
+    idx = np.flatnonzero(keep)
+    positions = dict(
+        (int(cols['pk'][i]), (float(az[i]), float(alt[i]), None if np.isnan(airmass[i]) else float(airmass[i])))
+        for i in idx
+    )
+    dsos = dsos.filter(pk__in=list(positions.keys())).with_observing_summary()
     for d in dsos:
-        (az, alt, secz) = d.alt_az(location, utdt)
-        d.azimuth = az
-        d.altitude = alt
-        d.airmass = secz
+        (d.azimuth, d.altitude, d.airmass) = positions[d.pk]
 
     return dict(utdt=utdt, dsos=dsos, location=location), times
 
+def get_dso_columns(dsos, mode):
+    """
+    Everything the availability filter needs about a set of DSOs, as arrays,
+    in a fixed number of queries (rather than several per DSO).
+    """
+    rows = list(dsos.values_list('pk', 'ra', 'dec', 'reimage'))
+    n = len(rows)
+    pks = np.array([r[0] for r in rows], dtype=int)
+    index = dict((pk, i) for i, pk in enumerate(pks.tolist()))
+
+    priority = np.full(n, np.nan)
+    modes = [''] * n
+    for dso_id, m, p in DSOObservingMode.objects.filter(dso__in=dsos).values_list('dso_id', 'mode', 'priority'):
+        i = index[dso_id]
+        modes[i] += m
+        if m == mode:
+            priority[i] = np.nan if p is None else p
+
+    imaged = set(DSOLibraryImage.objects.filter(object__in=dsos).values_list('object_id', flat=True))
+    active = set(DSOList.objects.filter(active_observing_list=YES, dso__in=dsos).values_list('dso', flat=True))
+
+    return dict(
+        pk = pks,
+        ra = np.array([r[1] for r in rows], dtype=float),
+        dec = np.array([r[2] for r in rows], dtype=float),
+        reimage = np.array([bool(r[3]) for r in rows], dtype=bool),
+        priority = priority,
+        modes = modes,
+        has_image = np.array([pk in imaged for pk in pks.tolist()], dtype=bool),
+        active = np.array([pk in active for pk in pks.tolist()], dtype=bool)
+    )
+
+def get_small_sep_array(ra1, dec1, ra2, dec2):
+    """
+    Array version of alt_get_small_sep(..., hemi=True): separation in degrees
+    between one point and arrays of RA (hours)/Dec (degrees).
+    """
+    r1 = np.radians(ra1 * 15.)
+    d1 = np.radians(dec1)
+    dr = np.radians(ra2 * 15.) - r1
+    d2 = np.radians(dec2)
+    x = np.cos(d1) * np.sin(d2) - np.sin(d1) * np.cos(d2) * np.cos(dr)
+    y = np.cos(d2) * np.sin(dr)
+    z = np.sin(d1) * np.sin(d2) + np.cos(d1) * np.cos(d2) * np.cos(dr)
+    return np.degrees(np.arctan2(np.hypot(x, y), z))
+
 def assemble_gear_list(request):
     out = ""
     for g in 'NBSMI':
@@ -165,27 +212,10 @@ def is_available_at_location (
     """
     See if an object's azimuth and altitude are above the mask set for a location.
     """
-    def interpolate_for_altitude(m, az):
-        """
-        Given two mask endpoints, get the altitude for a given mask and azimuth
-        This is an internal method
-        """
-        if m.altitude_end == m.altitude_start: # Flat so constant
-            return m.altitude_start
-        # Deal with azimuth
-        daz = m.azimuth_end - m.azimuth_start # size of az window
-        faz = az - m.azimuth_start  # degrees into window 
-        paz = faz/daz # percentage
-        # Deal with altitude
-        dalt = m.altitude_end - m.altitude_start # change in altitude
-        alt = m.altitude_start + paz * dalt
-        return alt
-
     # Deal with no location or no masks
     if location is None: # Shouldn't get here - but assume True
         return True 
         
-    masks = location.observinglocationmask_set.all()
     # Stupid - but ... deal with bogus values
     if abs(alt) > 90. or az < 0:
         return False
@@ -201,13 +231,6 @@ def is_available_at_location (
     if not use_mask:
         return True
     
-    if masks.count() > 0:
-        for mask in masks:
-            if az < mask.azimuth_start or az >= mask.azimuth_end: # not in window
-                continue
-            # We're in the zone
-            mask_alt = interpolate_for_altitude(mask, az)
-            return alt >= mask_alt
-    
-    return True # default if no mask is set for this azimuth...
+    # no mask set for this azimuth means -inf, i.e., True
+    return bool(get_horizon_mask(location).is_clear(az, alt))
 
@@ -1,4 +1,5 @@
 from django.db.models import Q
+from ..astro.sky_table import sky_box_filter
 
 DSO_TYPE_DICT = {
     'cluster': [
@@ -54,6 +55,15 @@ def get_filter_params(request, debug=True):
     return params
 
 def filter_dsos(params, dsos):
+    # Position first (from the spatial table): the filters below that loop over the DSOs see fewer
+    ra_low = ra_high = dec_low = dec_high = None
+    if params['ra_low'] and params['ra_high']:
+        ra_low, ra_high = float(params['ra_low']), float(params['ra_high']) # low > high crosses 0h!
+    if params['dec_low'] and params['dec_high']:
+        dec_low, dec_high = float(params['dec_low']), float(params['dec_high'])
+    if ra_low is not None or dec_low is not None:
+        dsos = sky_box_filter(dsos, ra_low=ra_low, ra_high=ra_high, dec_low=dec_low, dec_high=dec_high)
+
     if params['constellation']:
         in_clist = [x.upper().strip() for x in params['constellation'].split(',')]
         dsos = dsos.filter(constellation__abbreviation__in=in_clist)
@@ -90,14 +100,6 @@ def filter_dsos(params, dsos):
         good_ids = [x.pk for x in dsos if x.num_library_images == 0]
         dsos = dsos.filter(pk__in=good_ids)
 
-    if params['ra_low'] and params['ra_high']:
-        if params['ra_low'] < params['ra_high']:
-            dsos = dsos.filter(ra__gte=params['ra_low'], ra__lte=params['ra_high'])
-        else: # crosses 0h!
-            dsos = dsos.filter(Q(ra__gte=params['ra_low']) | Q(ra__lte=params['ra_high']))
-    if params['dec_low'] and params['dec_high']:
-        dsos = dsos.filter(dec__gte=params['dec_low'], dec__lte=params['dec_high'])
-    
     if params['mag_max']:
         mag_max = float(params['mag_max'])
         good_pks = [
@@ -31,7 +31,7 @@ from ..solar_system.position import get_object_metadata
 from ..tech.models import Telescope
 from ..utils.timer import compile_times
 
-from .atlas_utils import find_neighbors, assemble_neighbors
+from .atlas_utils import plate_neighbor_rows
 from .finder import plot_dso_list
 from .forms import (
     DSOListCreateForm, 
@@ -140,7 +140,7 @@ class DSOListView(CookieMixin, ListView):
         context['dso_type_items'] = DSO_TYPE_LIST
         params = get_filter_params(self.request)
         context = update_dso_filter_context(context, params)
-        dso_list = filter_dsos(params, DSO.objects.all())
+        dso_list = filter_dsos(params, DSO.objects.with_observing_summary())
         context['total_count'] = len(dso_list)
 
         # Pagination
@@ -384,8 +384,7 @@ class AtlasPlateDetailView(CookieMixin, DetailView):
         context['table_id'] = f"atlas_dso_{obj.plate_id}"
         context['selected_atlas_plate'] = select_atlas_plate(obj.plate_images, context)
         context['other_atlas_plates'] = select_other_atlas_plates(obj.plate_images, context['selected_atlas_plate'])
-        neighbors = find_neighbors(obj.center_ra, obj.center_dec, limit=30.)
-        context['assembled_neighbors'] = assemble_neighbors(neighbors)
+        context['assembled_neighbors'] = plate_neighbor_rows(obj, limit=30.)
         return context
 
 class DSOObservationLogView(CookieMixin, ListView):
@@ -576,10 +575,8 @@ class AvailableDSOObjectsView(CookieMixin, AvailableDSOMixin, TemplateView):
         dso_list = DSO.objects.all()
 
         # Eliminate impossible ones (based on latitude)
-        if min_dec is not None:
-            dso_list = dso_list.filter(dec__gte=min_dec)
-        if max_dec is not None:
-            dso_list = dso_list.filter(dec__lte=max_dec)
+        if min_dec is not None or max_dec is not None:
+            dso_list = dso_list.in_sky_box(dec_low=min_dec, dec_high=max_dec)
 
         up_dict, times = find_dsos_at_location_and_time (
             dsos = dso_list,                         # DSO List to start with - filtered by declination
@@ -0,0 +1,86 @@
+import threading
+import numpy as np
+
+"""
+Compiled horizon masks.
+
+An ObservingLocation's mask is a handful of ObservingLocationMask rows
+(azimuth range -> linearly interpolated altitude).   Rather than walking
+those rows for every object, each location's mask is turned once into a
+dense azimuth -> minimum altitude array, and everything (availability,
+the skymap mask, the location mask plot) reads that.
+
+The compiled arrays are cached per location and thrown away by the
+post_save/post_delete receivers on ObservingLocationMask.
+"""
+
+RESOLUTION = 0.1 # degrees of azimuth per bin
+
+class HorizonMask:
+    """
+    altitude[i] is the minimum altitude for azimuths in [i, i+1) * resolution;
+    -inf where no mask row covers that azimuth.
+    """
+    def __init__(self, masks, resolution=RESOLUTION):
+        self.resolution = resolution
+        n = int(round(360. / resolution))
+        self.azimuth = np.arange(n) * resolution
+        self.altitude = np.full(n, -np.inf)
+        done = np.zeros(n, dtype=bool)
+        # Same rule as before: the first mask (by azimuth_start) that
+        # contains the azimuth wins.  Start is inclusive, end is exclusive.
+        for m in masks:
+            inside = ~done & (self.azimuth >= m.azimuth_start) & (self.azimuth < m.azimuth_end)
+            if m.altitude_end == m.altitude_start: # Flat so constant
+                self.altitude[inside] = m.altitude_start
+            else:
+                paz = (self.azimuth[inside] - m.azimuth_start) / (m.azimuth_end - m.azimuth_start)
+                self.altitude[inside] = m.altitude_start + paz * (m.altitude_end - m.altitude_start)
+            done |= inside
+        self.is_empty = not done.any()
+
+    def __len__(self):
+        return len(self.altitude)
+
+    def min_altitude(self, az):
+        """
+        Mask altitude at each azimuth (scalar or array, degrees).
+        """
+        idx = np.floor((np.asarray(az, dtype=float) % 360.) / self.resolution).astype(int) % len(self)
+        return self.altitude[idx]
+
+    def is_clear(self, az, alt):
+        """
+        True where alt is at or above the mask.
+        """
+        return np.asarray(alt) >= self.min_altitude(az)
+
+    def outline(self, step=1):
+        """
+        (azimuth, altitude) arrays for drawing the mask, closed at 360°.
+        Unmasked azimuths are NaN so that matplotlib leaves a gap there.
+        """
+        az = np.append(self.azimuth[::step], 360.)
+        alt = np.append(self.altitude[::step], self.altitude[0])
+        alt = np.where(np.isinf(alt), np.nan, alt)
+        return az, alt
+
+_lock = threading.Lock()
+_masks = {}
+
+def get_horizon_mask(location):
+    """
+    The compiled mask for an ObservingLocation (an empty one for None).
+    """
+    if location is None:
+        return HorizonMask([])
+    with _lock:
+        mask = _masks.get(location.pk)
+        if mask is None:
+            mask = HorizonMask(location.observinglocationmask_set.order_by('azimuth_start'))
+            _masks[location.pk] = mask
+        return mask
+
+def invalidate_horizon_mask(location_id):
+    with _lock:
+        _masks.pop(location_id, None)
@@ -0,0 +1,36 @@
+import datetime, time
+from django.core.management.base import BaseCommand
+from ....astro.almanac import fill_location_almanac
+from ....astro.ephemeris import get_eph, get_timescale
+from ...models import ObservingLocation
+
+class Command(BaseCommand):
+    help = 'Precompute the Sun/Moon/twilight almanac for observing locations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('locations', nargs='*', type=int, help='location PKs (default: all)')
+        parser.add_argument('--start', dest='start', type=int, default=None, help='first year (default: this year)')
+        parser.add_argument('--years', dest='years', type=int, default=3, help='number of years')
+        parser.add_argument('--force', dest='force', action='store_true', help='recompute years that are already there')
+
+    def handle(self, *args, **options):
+        start = options['start'] or datetime.date.today().year
+        locations = ObservingLocation.objects.order_by('pk')
+        if options['locations']:
+            locations = locations.filter(pk__in=options['locations'])
+        ts = get_timescale()
+        eph = get_eph()
+
+        for location in locations:
+            for year in range(start, start + options['years']):
+                first = datetime.date(year, 1, 1)
+                last = datetime.date(year, 12, 31)
+                stored = location.almanac_days.filter(
+                    date__range=[first, last], latitude=location.latitude, longitude=location.longitude
+                ).count()
+                if not options['force'] and stored == (last - first).days + 1:
+                    print(f"{location.pk}: {year} is up to date")
+                    continue
+                t0 = time.perf_counter()
+                n = fill_location_almanac(location, first, last, ts=ts, eph=eph)
+                print(f"{location.pk}: {year} - {n} days in {time.perf_counter() - t0:.1f}s")
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.27 on 2026-10-18 14:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('observe', '0026_observinglocation_azimuthal_map_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ObservingLocationAlmanac',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='UT Date')),
+                ('latitude', models.FloatField(verbose_name='Latitude')),
+                ('longitude', models.FloatField(verbose_name='Longitude')),
+                ('events', models.JSONField(default=dict, verbose_name='Events')),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='almanac_days', to='observe.observinglocation')),
+            ],
+            options={
+                'ordering': ['location', 'date'],
+                'unique_together': {('location', 'date')},
+            },
+        ),
+    ]
@@ -1,10 +1,15 @@
 import pytz, datetime
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.urls import reverse
 from django.utils.html import mark_safe
 from django.utils.translation import gettext as _
 from ..misc.models import TimeZone, StateRegion, Country
+from ..astro.almanac import refresh_location_almanac
 from ..astro.utils import get_limiting_magnitude, get_declination_range
+from ..plotting.render_cache import bump_render_cache
+from .horizon import invalidate_horizon_mask
 from .pdf import create_pdf_form
 from .utils import get_mean_obs_sqm, get_effective_bortle
 from .vocabs import CARDINAL_DIRECTIONS, STATUS_CHOICES
@@ -389,4 +394,60 @@ class ObservingLocationMask(models.Model):
         x = self.location.name
         start = f"({self.azimuth_start:5.1f}, {self.altitude_start:4.1f})"
         end = f"({self.azimuth_end:5.1f}, {self.altitude_end:4.1f})"
-        return f"{x}: {start} - {end}"
\ No newline at end of file
+        return f"{x}: {start} - {end}"
+
+class ObservingLocationAlmanac(models.Model):
+    """
+    The Sun, Moon, and twilight events at a location for one UT date:
+    {kind: [(UT, value), ...]} for the kinds in astro.almanac.ALMANAC_EVENTS.
+    Filled by the fill_almanac command; the almanac functions read these first.
+    latitude/longitude are the coordinates they were computed for - days that
+    don't match the location anymore are ignored (and recomputed on save).
+    """
+    location = models.ForeignKey (
+        ObservingLocation, 
+        on_delete = models.CASCADE,
+        related_name = 'almanac_days'
+    )
+    date = models.DateField (
+        _('UT Date')
+    )
+    latitude = models.FloatField (
+        _('Latitude')
+    )
+    longitude = models.FloatField (
+        _('Longitude')
+    )
+    events = models.JSONField (
+        _('Events'),
+        default = dict
+    )
+
+    class Meta:
+        ordering = ['location', 'date']
+        unique_together = ['location', 'date']
+
+    def __str__(self):
+        return f"{self.location_id}: {self.date}"
+
+@receiver([post_save, post_delete], sender=ObservingLocationMask)
+def invalidate_location_horizon_mask(sender, instance, **kwargs):
+    """
+    Recompile the location's horizon mask next time it's needed.
+    """
+    invalidate_horizon_mask(instance.location_id)
+
+@receiver([post_save, post_delete], sender=ObservingLocation)
+@receiver([post_save, post_delete], sender=ObservingLocationMask)
+def bump_location_render_cache(sender, instance, **kwargs):
+    """
+    Skymaps/zenith maps are drawn for a location (and its mask).
+    """
+    bump_render_cache()
+
+@receiver(post_save, sender=ObservingLocation)
+def refresh_stored_almanac(sender, instance, **kwargs):
+    """
+    If the location has been moved, recompute its stored almanac days.
+    """
+    refresh_location_almanac(instance)
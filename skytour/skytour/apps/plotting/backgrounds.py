@@ -0,0 +1,95 @@
+import io
+import numpy as np
+from django.conf import settings
+from matplotlib import pyplot as plt
+from .render_cache import (
+    BACKGROUND_CACHE_DIR, BACKGROUND_CACHE_SIZE_MB, get_cached_render, get_render_cache_version, 
+    normalize, put_cached_render, render_key
+)
+
+"""
+Cached backgrounds for atlas plates and finder charts.
+
+The stars, constellation lines/boundaries, Milky Way and reference circles on
+an atlas plate (drawn for a fixed epoch) or around a finder chart's DSO never
+change between renders: only the DSOs, gear overlays, etc. do.   So those layers
+are drawn once, without the axes, into a raster covering exactly the axes'
+data limits, and kept (with the projection it was drawn for) in a render cache
+of its own under BACKGROUND_CACHE_DIR, with its own size cap
+(BACKGROUND_CACHE_SIZE_MB; see render_cache.py).   Later renders put that
+raster down first (draw_background()) and draw only the dynamic layers on top.
+
+Its version stamp is bumped (bump_background_cache()) by the model saves that
+change the static layers (Milky Way, boundaries, bright stars, site parameters)
+- but not DSO saves, so regenerating the atlas after a DSO edit redraws only
+the DSO overlay.
+settings.RENDER_BACKGROUNDS_ENABLED = False draws every layer every time.
+"""
+
+BACKGROUND_DPI = getattr(settings, 'BACKGROUND_DPI', 200)
+
+def render_background(draw, limit, figsize):
+    """
+    Draw the static layers (draw(ax)) on bare axes spanning -limit..limit
+    and return the PNG.   figsize is the size (inches) of the axes the raster
+    goes on, so anything sized in points comes out the same size there.
+    """
+    fig = plt.figure(figsize=figsize, dpi=BACKGROUND_DPI)
+    ax = fig.add_axes([0, 0, 1, 1])
+    ax.set_axis_off()
+    draw(ax)
+    ax.set_xlim(-limit, limit)
+    ax.set_ylim(-limit, limit)
+    png = io.BytesIO()
+    fig.savefig(png, format='png', dpi=BACKGROUND_DPI, facecolor=fig.get_facecolor())
+    plt.close(fig)
+    return png.getvalue()
+
+def get_background(kind, inputs, draw, limit, figsize):
+    """
+    The background for these inputs: {'png', 'extent', 'limit', 'inputs', ...},
+    from the cache or drawn now.
+    """
+    key = render_key(kind, [inputs, limit, figsize, BACKGROUND_DPI], 0, get_render_cache_version(BACKGROUND_CACHE_DIR))
+    background = get_cached_render(key, cache_dir=BACKGROUND_CACHE_DIR)
+    if background is not None and np.isclose(background['limit'], limit):
+        return background
+    background = dict(
+        kind = kind,
+        inputs = normalize(inputs, 0),
+        limit = limit,
+        extent = (-limit, limit, -limit, limit),
+        figsize = figsize,
+        dpi = BACKGROUND_DPI,
+        png = render_background(draw, limit, figsize)
+    )
+    try:
+        put_cached_render(key, background, cache_dir=BACKGROUND_CACHE_DIR, size_cap=BACKGROUND_CACHE_SIZE_MB)
+    except OSError as e:
+        print(f"Background cache: could not store {kind}: {e}")
+    return background
+
+def axes_size(ax):
+    """
+    The physical size (inches) of the axes, rounded so it can go in a cache key.
+    """
+    position = ax.get_position()
+    width, height = ax.figure.get_size_inches()
+    width, height = position.width * width, position.height * height
+    aspect = ax.get_aspect()
+    if aspect != 'auto': # the box shrinks to fit (x and y both span -limit..limit)
+        width, height = min(width, height / aspect), min(height, width * aspect)
+    return (round(width, 3), round(height, 3))
+
+def draw_background(ax, kind, inputs, draw, limit):
+    """
+    Put the static layers that draw(ax) makes on ax, as a cached raster
+    drawn at the axes' own size.   inputs is everything those layers depend on.
+    """
+    if not getattr(settings, 'RENDER_BACKGROUNDS_ENABLED', True):
+        draw(ax)
+        return ax
+    background = get_background(kind, inputs, draw, limit, axes_size(ax))
+    image = plt.imread(io.BytesIO(background['png']), format='png')
+    ax.imshow(image, extent=background['extent'], origin='upper', zorder=0, interpolation='antialiased')
+    return ax
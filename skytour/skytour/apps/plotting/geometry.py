@@ -0,0 +1,89 @@
+import threading
+import numpy as np
+from ..astro.markers import generate_equator
+
+"""
+Static chart geometry: the Milky Way contours, constellation boundaries and
+the equator/ecliptic/galactic reference lines.
+
+None of it changes from one chart to the next, so each piece is read/generated
+once per process and kept as packed numpy arrays (see PackedLines), which a
+chart then projects in one call.   The model-save signals call
+invalidate_geometry() so edits show up on the next chart.
+"""
+
+class PackedLines:
+    """
+    A set of polylines packed into flat RA (hours) and Dec (degrees) arrays:
+    line i is ra[offsets[i]:offsets[i+1]], dec[offsets[i]:offsets[i+1]].
+    """
+    def __init__(self, ra, dec, offsets):
+        self.ra = np.asarray(ra, dtype=float)
+        self.dec = np.asarray(dec, dtype=float)
+        self.offsets = np.asarray(offsets, dtype=int)
+
+    @classmethod
+    def from_segments(cls, segments):
+        """
+        From a list of polylines, each a list of (ra, dec) tuples.
+        """
+        lengths = [len(s) for s in segments]
+        points = np.array([p for s in segments for p in s], dtype=float).reshape(-1, 2)
+        return cls(points[:,0], points[:,1], np.cumsum([0] + lengths))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def split(self, values):
+        """
+        Cut an array with one value per point (e.g., projected x) back into lines.
+        """
+        return [values[a:b] for a, b in zip(self.offsets[:-1], self.offsets[1:])]
+
+    def segments(self):
+        """
+        As a list of polylines, each a list of (ra, dec) tuples.
+        """
+        return [list(zip(ra.tolist(), dec.tolist())) for ra, dec in zip(self.split(self.ra), self.split(self.dec))]
+
+    def subset(self, indices):
+        """
+        Just the lines in indices (in that order).
+        """
+        indices = np.asarray(indices, dtype=int)
+        starts, ends = self.offsets[:-1][indices], self.offsets[1:][indices]
+        if len(indices) == 0:
+            return PackedLines([], [], [0])
+        points = np.concatenate([np.arange(a, b) for a, b in zip(starts, ends)])
+        return PackedLines(self.ra[points], self.dec[points], np.cumsum(np.concatenate([[0], ends - starts])))
+
+_geometry = {}
+_lock = threading.RLock()
+
+def get_geometry(key, loader):
+    """
+    The cached geometry for key, calling loader() to build it the first time.
+    """
+    with _lock:
+        if key not in _geometry:
+            _geometry[key] = loader()
+        return _geometry[key]
+
+def invalidate_geometry(*keys):
+    """
+    Drop cached geometry (all of it if no keys): it's rebuilt on next use.
+    """
+    with _lock:
+        if len(keys) == 0:
+            _geometry.clear()
+        for key in keys:
+            _geometry.pop(key, None)
+
+def get_reference_line(type='equ'):
+    """
+    RA/Dec arrays for the celestial equator ('equ'), ecliptic ('ecl') or galactic equator ('gal').
+    """
+    def loader():
+        points = np.array(generate_equator(type=type), dtype=float)
+        return points[:,0], points[:,1]
+    return get_geometry(('reference', type), loader)
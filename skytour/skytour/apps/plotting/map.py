@@ -1,23 +1,28 @@
 import math
 import matplotlib
 import numpy as np
+import pandas as pd
 from matplotlib import pyplot as plt
 from matplotlib.collections import LineCollection
 from matplotlib.patches import Wedge, Ellipse
-from skyfield.api import Star, load
-from skyfield.data import hipparcos, stellarium
+from skyfield.api import Star
 
 from ..astro.astro import get_altitude
-from ..astro.markers import generate_equator, SPECIAL_POINTS
-from ..dso.atlas_utils import assemble_neighbors, find_neighbors
-from ..dso.milky_way import get_list_of_segments
+from ..astro.markers import SPECIAL_POINTS
+from ..dso.atlas_utils import plate_neighbor_rows
+from ..dso.milky_way import get_milky_way
+from ..dso.symbols import add_chart_labels
 from ..dso.models import DSO
+from ..observe.horizon import get_horizon_mask
 from ..site_parameter.helpers import find_site_parameter
 from ..solar_system.meteors import get_meteor_showers
 from ..solar_system.saturn import saturn_ring
 from ..solar_system.vocabs import UNICODE
 from ..stars.models import BrightStar
+from ..stars.star_catalog import get_constellation_edges, get_star_catalog
 from ..stars.vocabs import CONSTELLATION_LABELS
+from .geometry import get_reference_line
+from .projection import get_observer, project_lines, project_radec
 
 matplotlib.use('Agg') # This gets around some of Matplotlib's oddities
 
@@ -32,18 +37,11 @@ def map_constellation_lines(ax, stars, reversed=False, line_color=None):
     This requires that the map_hipparcos() method run first, since it
     gets the list of stars FROM the return of that method.
     """
-    url = ('https://raw.githubusercontent.com/Stellarium/stellarium/master'
-        '/skycultures/western_SnT/constellationship.fab')
-    with load.open(url) as f:
-        constellations = stellarium.parse_constellations(f)
-    edges = [edge for name, edges in constellations for edge in edges]
-    edges_star1 = [star1 for star1, star2 in edges]
-    edges_star2 = [star2 for star1, star2 in edges]
-
-    # assemble constellation lines
-    xy1 = stars[['x', 'y']].loc[edges_star1].values
-    xy2 = stars[['x', 'y']].loc[edges_star2].values
-    lines_xy = np.rollaxis(np.array([xy1, xy2]), 1)
+    # Edges are catalog row offsets; the frame is indexed (sorted) by row
+    edges = get_constellation_edges()
+    pos = np.searchsorted(stars.index.values, edges)
+    xy = stars[['x', 'y']].values
+    lines_xy = xy[pos] # shape (N, 2 ends, 2 coords)
     ##### constellation lines
     if line_color is None:
         line_color = '#99f8' if reversed else '#00f2' 
@@ -57,29 +55,33 @@ def new_map_constellation_boundaries(ax, lines, earth, t, projection, reversed=F
     line_color = '#9907' if reversed else '#999' # constellation-boundary
     line_width = 1.5
     line_type = '--'
-    for k, v in lines.items():
-        # k is the key, v is the list of coordinates
-        d = dict(x =[], y = [])
-        for point in v:
-            ra = point[0]
-            dec = point[1]
-            x, y = projection(earth.at(t).observe(Star(ra_hours=ra, dec_degrees=dec)))
-            d['x'].append(x)
-            d['y'].append(y)
-        w = ax.plot(d['x'], d['y'], ls=line_type, lw=line_width, alpha=0.7, color=line_color)
+    # lines are PackedLines (see dso.const_utils.get_boundary_lines()) - project them all at once
+    for x, y in project_lines(earth, t, projection, lines):
+        w = ax.plot(x, y, ls=line_type, lw=line_width, alpha=0.7, color=line_color)
     return ax
 
-def map_hipparcos(ax, earth, t, mag_limit, projection, mag_offset=0.25, star_scale = 1.0, reversed=False):
+def map_hipparcos(ax, earth, t, mag_limit, projection, mag_offset=0.25, star_scale = 1.0, reversed=False,
+        center=None, radius=None
+    ):
     """
     Put down sized points for stars.
-    While this DOES pre-filter by mag_limit it does NOT filter
-    by proximity to the center of the map and its scale!
+    Only stars brighter than mag_limit are observed (the catalog is sorted by
+    magnitude), and if center (RA hours, Dec degrees) and radius (degrees) are
+    given, only those inside that cone.
+
+    The stars in the constellation lines are always projected as well, so
+    map_constellation_lines() can use the returned frame (indexed by catalog row).
     """
-    with load.open(hipparcos.URL) as f:
-        stars = hipparcos.load_dataframe(f)
+    catalog = get_star_catalog()
+    rows = catalog.select(mag_limit, center=center, radius=radius)
+    rows = np.union1d(rows, get_constellation_edges().ravel())
     # Compute the X,Y coordinates of stars on the plot
-    star_positions = earth.at(t).observe(Star.from_dataframe(stars))
-    stars['x'], stars['y'] = projection(star_positions)
+    star_positions = get_observer(earth, t).observe(catalog.skyfield_stars(rows))
+    x, y = projection(star_positions)
+    stars = pd.DataFrame(
+        dict(hip=catalog.data['hip'][rows], magnitude=catalog.data['magnitude'][rows], x=x, y=y),
+        index = pd.Index(rows, name='row')
+    )
     bright_stars = (stars.magnitude <= mag_limit)
     magnitude = stars['magnitude'][bright_stars]
     marker_size = star_scale * (mag_offset + mag_limit - magnitude) **2.0 
@@ -105,14 +107,16 @@ def map_bright_stars(ax, earth, t, projection,
     if mag_limit:
         bsc_stars = bsc_stars.exclude(magnitude__gte=mag_limit)
     bsc_list = {'x': [], 'y': [], 'label': [], 'size': []}
+    ra_list = []
+    dec_list = []
     for bsc in bsc_stars:
-        x, y = projection(earth.at(t).observe(bsc.skyfield_object))
-        bsc_list['x'].append(x)
-        bsc_list['y'].append(y)
+        ra_list.append(bsc.ra_float)
+        dec_list.append(bsc.dec_float)
         bsc_list['label'].append(bsc.plot_label)
         if mag_limit is None:
             mag_limit = 7.
         bsc_list['size'].append((0.5 + mag_limit - bsc.magnitude) **2)
+    bsc_list['x'], bsc_list['y'] = project_radec(earth, t, projection, ra_list, dec_list)
 
     if points:
         scatter = ax.scatter(
@@ -135,11 +139,9 @@ def map_target(ax, ra, dec, projection, earth, t, symbol):
     This just puts a symbol on the map.
     For finding charts, I use this.
     """
-    object_x, object_y = projection(earth.at(t).observe(
-        Star(ra_hours=ra, dec_degrees=dec))
-    )
+    object_x, object_y = project_radec(earth, t, projection, ra, dec)
     object_scatter = ax.scatter(
-        [object_x], [object_y], 
+        object_x, object_y, 
         s=[90.], c=['#900'], 
         marker='+'
     )
@@ -200,14 +202,14 @@ def map_moons(ax, pdict, earth, t, projection, ang_size_radians, reversed=False,
     dist_to_planet = pdict['apparent']['distance']['au']
     planet_ra = pdict['apparent']['equ']['ra']
     planet_dec = pdict['apparent']['equ']['dec']
-    planet_target = earth.at(t).observe(Star(ra_hours=planet_ra, dec_degrees=planet_dec))
+    planet_target = get_observer(earth, t).observe(Star(ra_hours=planet_ra, dec_degrees=planet_dec))
     max_sep = 0.
     try:
         for moon in pdict['moons']:
             moon_ra = moon['apparent']['equ']['ra']
             moon_dec = moon['apparent']['equ']['dec']
             d = moon['apparent']['distance']['au']
-            moon_target = earth.at(t).observe(Star(ra_hours=moon_ra, dec_degrees=moon_dec))
+            moon_target = get_observer(earth, t).observe(Star(ra_hours=moon_ra, dec_degrees=moon_dec))
             sep = moon_target.separation_from(planet_target).radians
             x, y = projection(moon_target)
             if debug:
@@ -392,7 +394,8 @@ def map_dsos(ax, earth, t, projection,
         label_weight = 'bold',
         colors=None,
         sort_list=True,
-        min_alt = 20. # degrees
+        min_alt = 20., # degrees
+        cull_labels = False # skip labels that would overlap one already drawn
     ):
     """
     Like the star mapping methods above, put down symbols for DSOs.
@@ -410,12 +413,14 @@ def map_dsos(ax, earth, t, projection,
     elif dso: # if I'm a DSO finder chart, exclude myself
         other_dso_records = other_dso_records.exclude(pk = dso.pk)
     elif product == 'skymap':
-        other_dso_records = DSO.objects.filter(show_on_skymap=1).order_by('ra_text')
+        other_dso_records = DSO.objects.filter(show_on_skymap=1).order_by('ra_text').with_observing_summary()
     else:
-        other_dso_records = DSO.objects.order_by('ra_text')
+        other_dso_records = DSO.objects.order_by('ra_text').with_observing_summary()
 
     # Create the plotting dictionary
     other_dsos = {'x': [], 'y': [], 'label': [], 'marker': []}
+    ra_list = []
+    dec_list = []
     interesting = []
     # Loop through the culled DSO list, add to interesting.
     for other in other_dso_records:
@@ -430,13 +435,11 @@ def map_dsos(ax, earth, t, projection,
                     my_alt = math.degrees(math.asin(sin_dist))
                     if my_alt > min_alt:
                         interesting.append(other)
-        x, y = projection(earth.at(t).observe(other.skyfield_object))
-        other_dsos['x'].append(x)
-        other_dsos['y'].append(y)
+        ra_list.append(other.ra_float)
+        dec_list.append(other.dec_float)
         other_dsos['label'].append(other.label_on_chart)
         other_dsos['marker'].append(other.object_type.marker_type)
-    xxx = np.array(other_dsos['x'])
-    yyy = np.array(other_dsos['y'])
+    xxx, yyy = project_radec(earth, t, projection, ra_list, dec_list)
     mmm = np.array(other_dsos['marker'])
 
     # On the Sky Map, we don't show the scaled DSO and custom markers, e.g., 
@@ -471,17 +474,10 @@ def map_dsos(ax, earth, t, projection,
     else:
         color = colors[1] if reversed else colors[0]
 
-    for x, y, z in zip(xxx, yyy, other_dsos['label']):
-        ax.annotate(
-            z, xy=(x,y),
-            xytext=(5, 5),
-            textcoords='offset points',
-            horizontalalignment='left',
-            annotation_clip = True,
-            color=color,
-            fontsize=label_size,
-            fontweight=label_weight
-        )
+    add_chart_labels(ax, xxx, yyy, other_dsos['label'],
+        offset=(5, 5), ha='left', color=color, 
+        fontsize=label_size, fontweight=label_weight, cull=cull_labels
+    )
     if sort_list:
         zz = sorted(interesting, key=lambda t: (t.catalog.abbreviation, t.id_in_catalog))
         interesting = zz
@@ -493,7 +489,7 @@ def map_planets(ax, this_planet, planets, earth, t, projection, center=None):
     Sometimes, planets sneak into the finder charts, esp. close conjunctions!
     So, let's put in the other planets too.
     """
-    d = {'x': [], 'y': [], 'marker': []}
+    d = {'ra': [], 'dec': [], 'marker': []}
     interesting = []
     for k, v in planets.items():
         if k == this_planet: # Skip me
@@ -508,13 +504,11 @@ def map_planets(ax, this_planet, planets, earth, t, projection, center=None):
             else:
                 interesting.append(v)
 
-        x, y = projection(earth.at(t).observe(Star(ra_hours=ra, dec_degrees=dec)))
-        d['x'].append(x)
-        d['y'].append(y)
+        d['ra'].append(ra)
+        d['dec'].append(dec)
         d['marker'].append(UNICODE[k])
 
-    xxx = np.array(d['x'])
-    yyy = np.array(d['y'])
+    xxx, yyy = project_radec(earth, t, projection, d['ra'], d['dec'])
     mmm = np.array(d['marker'])
     for x, y, z in zip(xxx, yyy, mmm):
         ax.annotate (
@@ -532,7 +526,7 @@ def map_asteroids(ax, name, asteroid_list, earth, t, projection,
         center=None, size=60, marker='o', alpha=0.8,
         reversed=False
     ):
-    adict = { 'x': [], 'y': [], 'label': []}
+    adict = { 'x': [], 'y': [], 'ra': [], 'dec': [], 'label': []}
     interesting = []
     for a in asteroid_list:
         ra = a['apparent']['equ']['ra']
@@ -545,10 +539,10 @@ def map_asteroids(ax, name, asteroid_list, earth, t, projection,
                 continue # skip the rest of processing
             else:
                 interesting.append(a)
-        x, y = projection(earth.at(t).observe(Star(ra_hours=ra, dec_degrees=dec)))
-        adict['x'].append(x)
-        adict['y'].append(y)
+        adict['ra'].append(ra)
+        adict['dec'].append(dec)
         adict['label'].append(a['number'])
+    adict['x'], adict['y'] = project_radec(earth, t, projection, adict['ra'], adict['dec'])
     asteroid_color = 'red' if reversed else 'maroon'
     scatter = ax.scatter(
         adict['x'], adict['y'], 
@@ -576,10 +570,10 @@ def map_single_object(ax, name, obj, earth, t, projection, color='silver'):
     """
     ra = obj['apparent']['equ']['ra']
     dec = obj['apparent']['equ']['dec']
-    x, y = projection(earth.at(t).observe(Star(ra_hours=ra, dec_degrees=dec)))
+    x, y = project_radec(earth, t, projection, ra, dec)
     m = UNICODE[name]
     ax.annotate(
-        m, xy=(x,y),
+        m, xy=(x[0],y[0]),
         textcoords='offset points',
         xytext=(0,0),
         horizontalalignment='center',
@@ -600,7 +594,7 @@ def map_meteor_showers(ax, utdt, earth, t, projection,
     if len(active) == 0: # Nothing to do!
         return ax, None
 
-    d = {'x': [], 'y': [], 'label': [], 'marker': [], 'size': []}
+    d = {'x': [], 'y': [], 'ra': [], 'dec': [], 'label': [], 'marker': [], 'size': []}
     interesting = []
     for a in active:
         if center:
@@ -609,9 +603,8 @@ def map_meteor_showers(ax, utdt, earth, t, projection,
                 continue
             else:
                 interesting.append(a)
-        x, y = projection(earth.at(t).observe(a.skyfield_object))
-        d['x'].append(x)
-        d['y'].append(y)
+        d['ra'].append(a.radiant_ra)
+        d['dec'].append(a.radiant_dec)
         d['label'].append(a.name)
         if a.intensity == 'Major':
             d['size'].append(size)
@@ -619,7 +612,7 @@ def map_meteor_showers(ax, utdt, earth, t, projection,
             d['size'].append(size * 0.5)
         else:
             d['size'].append(size * 0.25)
-
+    d['x'], d['y'] = project_radec(earth, t, projection, d['ra'], d['dec'])
 
     scatter = ax.scatter(
         d['x'], d['y'], 
@@ -636,7 +629,7 @@ def map_comets(ax, comet_list, earth, t, projection,
 
     alpha_list = 'ABCDEFGHJKLMNPQRSTUVWXYZ' # No I or O
     n = 0
-    d = {'x': [], 'y': [], 'label': [], 'marker': []}
+    d = {'x': [], 'y': [], 'ra': [], 'dec': [], 'label': [], 'marker': []}
     interesting = []
     for c in comet_list:
         ra = c['apparent']['equ']['ra']
@@ -647,11 +640,11 @@ def map_comets(ax, comet_list, earth, t, projection,
                 continue
             c['letter'] = alpha_list[n]
             interesting.append(c)
-        x, y = projection(earth.at(t).observe(Star(ra_hours=ra,dec_degrees=dec)))
-        d['x'].append(x)
-        d['y'].append(y)
+        d['ra'].append(ra)
+        d['dec'].append(dec)
         d['label'].append(alpha_list[n])
         n += 1
+    d['x'], d['y'] = project_radec(earth, t, projection, d['ra'], d['dec'])
 
     scatter = ax.scatter(
         d['x'], d['y'],
@@ -674,27 +667,20 @@ def map_comets(ax, comet_list, earth, t, projection,
 
 def map_equ(ax, earth, t, projection, type, reversed=False):
     if type == 'equ':
-        points = generate_equator()
         line_type = (0, (7, 10))
         color = '#f9f' if reversed else '#f99' # lines, equator
     elif type == 'ecl':
-        points = generate_equator(type='ecl')
         line_type = '-.'
         color = '#6ff' if reversed else '#3c3' # lines, ecliptic
     elif type == 'gal':
-        points = generate_equator(type='gal')
         line_type = '--' # (0, (3, 5, 1, 5, 1, 5))
         color = '#c6f' # lines, galactic
     else:
         return ax
 
-    d = dict(x = [], y = [])
-    for p in points:
-        ra, dec = p
-        xx, yy = projection(earth.at(t).observe(Star(ra_hours=ra, dec_degrees=dec)))
-        d['x'].append(xx)
-        d['y'].append(yy)
-    w = ax.plot(d['x'], d['y'], ls=line_type, lw=1., alpha=0.7, c=color)
+    ra, dec = get_reference_line(type)
+    xx, yy = project_radec(earth, t, projection, ra, dec)
+    w = ax.plot(xx, yy, ls=line_type, lw=1., alpha=0.7, c=color)
     return ax
 
 def map_milky_way(
@@ -708,15 +694,8 @@ def map_milky_way(
     ):
     color = colors[1] if reversed else colors[0]
     line_type = (0, (1,1))
-    segments = get_list_of_segments(contour=contour)
-    for segment in segments:
-        d = {'x': [], 'y': []}
-        for coord in segment:
-            xx, yy = projection(earth.at(t).observe(Star(ra_hours=coord[0], dec_degrees=coord[1])))
-            # TODO V2.x: test if xx, yy near the plot to speed this up
-            d['x'].append(xx)
-            d['y'].append(yy)
-        w = ax.plot(d['x'], d['y'], c=color, ls=line_type, lw=line_width, alpha=alpha)
+    for xx, yy in project_lines(earth, t, projection, get_milky_way(contour=contour)):
+        w = ax.plot(xx, yy, c=color, ls=line_type, lw=line_width, alpha=alpha)
     return ax
 
 def map_special_points(ax, earth, t, projection, 
@@ -728,11 +707,11 @@ def map_special_points(ax, earth, t, projection,
     ):
     d = {'x': [], 'y': [], 'label': [], 'marker': []}
 
-    for a in SPECIAL_POINTS:
-        x, y = projection(earth.at(t).observe(Star(ra_hours=a['ra'], dec_degrees=a['dec'])))
-        d['x'].append(x)
-        d['y'].append(y)
-        d['label'].append(a['abbr'])
+    d['x'], d['y'] = project_radec(earth, t, projection, 
+        [a['ra'] for a in SPECIAL_POINTS], 
+        [a['dec'] for a in SPECIAL_POINTS]
+    )
+    d['label'] = [a['abbr'] for a in SPECIAL_POINTS]
 
     color = colors[1] if reversed else colors[0] # special-points, symbol
     scatter = ax.scatter(
@@ -754,19 +733,15 @@ def map_special_points(ax, earth, t, projection,
     return ax
 
 def map_plate_neighbors(ax, plate, reversed=reversed):
-    rows = assemble_neighbors(find_neighbors(plate.center_ra, plate.center_dec))
+    rows = plate_neighbor_rows(plate)
     neighbors = []
-    row_number = 0
     for row in rows:
-        p_num = 0
         for n in row:
-            p_num += 1
             if n['sep'] < 0.1: # skip center
                 continue
-            if len(row) == 5 and p_num not in [2,4]: # deal with dec 75 issue
+            if len(row) == 5 and n['column'] not in [1,3]: # deal with dec 75 issue
                 continue
             neighbors.append(n)
-        row_number += 1
 
     csize = math.radians(.25)
     radius = math.radians(9.2/2.)
@@ -804,11 +779,13 @@ def map_constellation_names(ax, plate, earth, t, projection, reversed=reversed):
     tcolor = '#ffb' if reversed else '#333'  # constellation, markers, label
     fcolor = '#333' if reversed else '#fff'  # constellation, markers, background
     ecolor = '#ffd' if reversed else '#000'  # constellation, markers, edge
+    ra_list = []
+    dec_list = []
     for c in constellations:
-        x, y = projection(earth.at(t).observe(Star(ra_hours=c.ra, dec_degrees=c.dec)))
-        d['x'].append(x)
-        d['y'].append(y)
+        ra_list.append(c.ra)
+        dec_list.append(c.dec)
         d['label'].append(c.constellation.abbreviation)
+    d['x'], d['y'] = project_radec(earth, t, projection, ra_list, dec_list)
     for x, y, z in zip(d['x'], d['y'], d['label']):
         ax.text(x, y, z, color=tcolor, fontsize='x-small',
             bbox = dict(
@@ -821,11 +798,10 @@ def map_constellation_names(ax, plate, earth, t, projection, reversed=reversed):
 
 def map_constellation_labels(ax, earth, t, projection):
     d = {'x': [], 'y': [], 'label': []}
-    for k in CONSTELLATION_LABELS.keys():
-        ra, dec = CONSTELLATION_LABELS[k]
-        #ra = v[0]
-        #dec = v[1]
-        x, y = projection(earth.at(t).observe(Star(ra_hours=ra, dec_degrees=dec)))
+    keys = list(CONSTELLATION_LABELS.keys())
+    ra, dec = zip(*[CONSTELLATION_LABELS[k] for k in keys])
+    xx, yy = project_radec(earth, t, projection, ra, dec)
+    for k, x, y in zip(keys, xx, yy):
         if abs(x) > 1 or abs(y) > 1:
             continue
         #print(f"K: {k} X: {x} Y: {y}")
@@ -840,75 +816,21 @@ def map_constellation_labels(ax, earth, t, projection):
     return ax
         
 def map_mask(ax, location, color='#3ff', simple=False, debug=False):
-    n = 0
-
-    def get_xy(az, alt):
-        rad = (90 - alt)/90.
-        x = rad * math.cos(math.radians(az+90.))
-        y = rad * math.sin(math.radians(az+90.))
-        return x, y
-    
-    def add_mask_points(mask, x, y, steps = 10):
-        points = []
-            
-        for i in range(steps+1):
-            z = (i + 0.)/steps
-            dx = mask.azimuth_start + z * (mask.azimuth_end - mask.azimuth_start)
-            dh = mask.altitude_end - mask.altitude_start
-            dy = mask.altitude_start + z * dh
-            if i != 0:
-                x0, y0 = get_xy(x, y)
-                x1, y1 = get_xy(dx, dy)
-                ax.plot([x0, x1], [y0, y1], color=color, linewidth=2)
-                if debug:
-                    point = ((x, y), (dx, dy))
-                    print(f"\t{i}: Sub arc: {point}")
-            x = dx
-            y = dy
-        return
-            
-    prev_mask = None
-    mask_points = location.observinglocationmask_set.order_by('azimuth_start')
-    if mask_points.count() == 0: # abort if nothing to process
+    """
+    Draw the location's horizon mask from its compiled lookup table.
+    simple=True draws it at 1° rather than full resolution.
+    """
+    horizon = get_horizon_mask(location)
+    if horizon.is_empty: # abort if nothing to process
         return ax
-    for mask in mask_points:
-        if prev_mask: # connect two segments
-            x0, y0 = get_xy(prev_mask.azimuth_end, prev_mask.altitude_end)
-            x1, y1 = get_xy(mask.azimuth_start, mask.altitude_start)
-            ax.plot([x0, x1], [y0, y1], color=color, linewidth=2)
-            x = x1
-            y = y1
-            if debug:
-                point = (
-                    (prev_mask.azimuth_end, mask.altitude_end), 
-                    (prev_mask.azimuth_start, mask.altitude_start)
-                )
-                print(n, "Adding Mask from Prev: ", point)
-        else:
-            first_mask = mask
-
-        if simple: # add new segment
-            x0, y0 = get_xy(mask.azimuth_start, mask.altitude_start)
-            x1, y1 = get_xy(mask.azimuth_end, mask.altitude_end)
-            ax.plot([x0, x1], [y0, y1], color=color, linewidth=2)
-            if debug:
-                point = ((mask.azimuth_start, mask.altitude_start), (mask.azimuth_end, mask.altitude_end))
-                print(n, "Adding Mask from Mask: ", mask)
-        else:
-            add_mask_points(mask, mask.azimuth_start, mask.azimuth_end)
-
-        prev_mask = mask
-        n += 1
-
-    # final point
-    ax.plot([mask.azimuth_end, first_mask.azimuth_start], [mask.altitude_end, first_mask.altitude_start], color=color, linewidth=2)
+    step = max(1, int(round(1. / horizon.resolution))) if simple else 1
+    az, alt = horizon.outline(step=step)
+    rad = (90. - alt) / 90.
+    x = rad * np.cos(np.radians(az + 90.))
+    y = rad * np.sin(np.radians(az + 90.))
+    ax.plot(x, y, color=color, linewidth=2)
     if debug:
-        point = (
-            (mask.azimuth_end, mask.altitude_end),
-            (mask.azimuth_start, first_mask.altitude_start)
-        )
-        print(n, "Adding Last Point: ", mask)
-    
+        print(f"Mask: {len(az)} points, {np.isnan(alt).sum()} unmasked")
     return ax
 
 def add_cartesian_circle(ax, x, y, r_deg=45, num_points=200, **kwargs):
@@ -0,0 +1,49 @@
+import threading
+import numpy as np
+from skyfield.api import Star
+
+"""
+Batch projection for the map layers.
+
+Every layer on a chart projects RA/Dec points with the same earth, t and
+projection.   Rather than building one Star() and doing one observe() per
+point, the layers hand over whole arrays and get back x/y arrays.
+"""
+
+_observer = threading.local()
+
+def get_observer(earth, t):
+    """
+    earth.at(t) is the same for every layer on a chart, so compute it once
+    and hand back the same position while the chart is being built.
+    """
+    last = getattr(_observer, 'last', None)
+    if last is not None and last[0] is earth and last[1] is t:
+        return last[2]
+    position = earth.at(t)
+    _observer.last = (earth, t, position)
+    return position
+
+def project_radec(earth, t, projection, ra, dec):
+    """
+    Project RA (hours) and Dec (degrees) onto the chart.
+    ra/dec can be scalars, lists or numpy arrays.
+    Returns x, y as numpy arrays (same length as the input).
+    """
+    ra = np.atleast_1d(np.asarray(ra, dtype=float))
+    dec = np.atleast_1d(np.asarray(dec, dtype=float))
+    if ra.size == 0:
+        return np.array([]), np.array([])
+    star = Star(ra_hours=ra, dec_degrees=dec)
+    x, y = projection(get_observer(earth, t).observe(star))
+    return np.atleast_1d(x), np.atleast_1d(y)
+
+def project_lines(earth, t, projection, lines):
+    """
+    Project a set of polylines packed as PackedLines (see geometry.py):
+    every point in one call.   Returns a list of (x, y) array pairs, one per line.
+    """
+    x, y = project_radec(earth, t, projection, lines.ra, lines.dec)
+    if len(lines.ra) == 0:
+        return [(x, y) for i in range(len(lines))]
+    return list(zip(lines.split(x), lines.split(y)))
@@ -0,0 +1,206 @@
+import datetime, functools, hashlib, inspect, json, math, os, pickle, threading, time, uuid
+import numpy as np
+from django.conf import settings
+from ..utils.files import atomic_file
+
+"""
+A disk cache for rendered maps/charts.
+
+The key is a hash of the normalized inputs of the rendering function:
+    - datetimes (and Skyfield Times) are rounded down to a time bucket
+        (settings.RENDER_CACHE_TIME_BUCKET, in minutes; 0 = exact);
+    - model instances become their label + pk, querysets their list of pks;
+    - floats are rounded, dicts sorted, etc.
+plus a catalog version stamp.   The stamp is a token on disk that the
+model-save signals replace (see bump_render_cache()), so every process sees
+that the DSOs/locations/stars have changed and stops using the old images.
+
+Entries are pickles under RENDER_CACHE_DIR.   A hit touches the file, and
+after every write the oldest files are removed until the directory is under
+the size cap (settings.RENDER_CACHE_SIZE_MB), i.e., it's an LRU.   (Caches with
+their own directory, like the backgrounds', are pruned separately.)
+settings.RENDER_CACHE_ENABLED = False turns it off.
+"""
+
+RENDER_CACHE_DIR = getattr(settings, 'RENDER_CACHE_DIR', 'generated_data/render_cache')
+# Atlas/finder backgrounds (see backgrounds.py) - a cache with its own version stamp and size cap,
+# kept apart so that regenerating the atlas doesn't push its own backgrounds out of the LRU
+BACKGROUND_CACHE_DIR = getattr(settings, 'BACKGROUND_CACHE_DIR', 'generated_data/background_cache')
+BACKGROUND_CACHE_SIZE_MB = getattr(settings, 'BACKGROUND_CACHE_SIZE_MB', 2048)
+VERSION_FILE = 'VERSION'
+
+_lock = threading.Lock()
+
+def get_render_cache_version(cache_dir=RENDER_CACHE_DIR):
+    """
+    The current catalog version stamp (made on first use).
+    """
+    try:
+        with open(os.path.join(cache_dir, VERSION_FILE)) as f:
+            return f.read().strip()
+    except OSError:
+        return bump_render_cache(cache_dir=cache_dir)
+
+def bump_render_cache(cache_dir=RENDER_CACHE_DIR):
+    """
+    Start a new catalog version: nothing cached before this will be used again
+    (and the old entries age out of the LRU).
+    """
+    token = uuid.uuid4().hex
+    os.makedirs(cache_dir, exist_ok=True)
+    with atomic_file(os.path.join(cache_dir, VERSION_FILE)) as tmp:
+        with open(tmp, 'w') as f:
+            f.write(token)
+    return token
+
+def bump_background_cache():
+    """
+    The static layers of the atlas/finder charts changed: don't use the cached backgrounds.
+    """
+    return bump_render_cache(cache_dir=BACKGROUND_CACHE_DIR)
+
+def normalize(x, bucket):
+    """
+    Turn a rendering input into something JSON-able that is the same for "the same" input.
+    bucket is the time bucket in seconds.
+    """
+    if x is None or isinstance(x, (bool, int, str)):
+        return x
+    if isinstance(x, (float, np.floating)):
+        x = float(x)
+        return None if math.isnan(x) else round(x, 6)
+    if isinstance(x, np.integer):
+        return int(x)
+    if isinstance(x, np.ndarray):
+        return normalize(x.tolist(), bucket)
+    if isinstance(x, datetime.datetime):
+        if x.tzinfo is None:
+            x = x.replace(tzinfo=datetime.timezone.utc)
+        stamp = x.timestamp()
+        return math.floor(stamp / bucket) * bucket if bucket > 0 else stamp
+    if isinstance(x, (datetime.date, datetime.time, datetime.timedelta)):
+        return str(x)
+    if hasattr(x, 'utc_datetime'): # Skyfield Time
+        return normalize(x.utc_datetime(), bucket)
+    if hasattr(x, '_meta') and hasattr(x, 'pk'): # model instance
+        return f"{x._meta.label}:{x.pk}"
+    if hasattr(x, 'values_list') and hasattr(x, 'model'): # queryset
+        return [x.model._meta.label, list(x.order_by('pk').values_list('pk', flat=True))]
+    if isinstance(x, dict):
+        return dict((str(k), normalize(v, bucket)) for k, v in x.items())
+    if isinstance(x, (list, tuple, set)):
+        items = [normalize(v, bucket) for v in x]
+        return sorted(items, key=str) if isinstance(x, set) else items
+    return repr(x)
+
+def render_key(kind, inputs, bucket, version):
+    blob = json.dumps([kind, version, normalize(inputs, bucket)], sort_keys=True)
+    return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+
+def _entry_path(key, cache_dir):
+    return os.path.join(cache_dir, key[:2], f"{key}.pkl")
+
+def get_cached_render(key, cache_dir=RENDER_CACHE_DIR):
+    path = _entry_path(key, cache_dir)
+    try:
+        with open(path, 'rb') as f:
+            value = pickle.load(f)
+        os.utime(path) # LRU: mark as recently used
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        return None
+    return value
+
+def put_cached_render(key, value, cache_dir=RENDER_CACHE_DIR, size_cap=None):
+    path = _entry_path(key, cache_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with atomic_file(path) as tmp:
+        with open(tmp, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+    size_cap = getattr(settings, 'RENDER_CACHE_SIZE_MB', 250) if size_cap is None else size_cap
+    prune_render_cache(size_cap * 1024 * 1024, cache_dir=cache_dir)
+
+def prune_render_cache(max_bytes, cache_dir=RENDER_CACHE_DIR):
+    """
+    Remove the least-recently-used entries until the cache is under max_bytes.
+    """
+    with _lock:
+        entries, total = [], 0
+        for root, dirs, files in os.walk(cache_dir):
+            # A subdirectory with its own VERSION is another cache, with its own cap
+            dirs[:] = [d for d in dirs if not os.path.exists(os.path.join(root, d, VERSION_FILE))]
+            for fn in files:
+                if not fn.endswith('.pkl'):
+                    continue
+                path = os.path.join(root, fn)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass # someone else got it
+            total -= size
+
+def render_cached(kind, skip=(), times_index=None, now_if_none=(), cacheable=None):
+    """
+    Decorator: cache what a rendering function returns.
+
+        kind:           name for the cache key (so different functions never collide)
+        skip:           arguments that aren't inputs to the image (ts, eph, times, ...)
+        times_index:    where the function's times list is in what it returns;
+                        on a hit it's replaced by one with a 'Render cache hit' entry
+        now_if_none:    if all of these arguments are None the function draws "now",
+                        so the (bucketed) current time goes into the key
+        cacheable:      function of the arguments; False means don't use the cache
+                        (e.g., when the image is being saved to a file instead)
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = bound.arguments
+            if not getattr(settings, 'RENDER_CACHE_ENABLED', True):
+                return func(*args, **kwargs)
+            if cacheable is not None and not cacheable(arguments):
+                return func(*args, **kwargs)
+
+            start = time.perf_counter()
+            bucket = 60. * getattr(settings, 'RENDER_CACHE_TIME_BUCKET', 5)
+            inputs = dict((k, v) for k, v in arguments.items() if k not in skip)
+            if now_if_none and all(arguments.get(k) is None for k in now_if_none):
+                inputs['_now'] = datetime.datetime.now(datetime.timezone.utc)
+            key = render_key(kind, inputs, bucket, get_render_cache_version())
+
+            value = get_cached_render(key)
+            if value is not None:
+                if times_index is None:
+                    return value
+                times = arguments.get('times') or [(start, 'Start')]
+                times.append((time.perf_counter(), 'Render cache hit'))
+                value = list(value)
+                value[times_index] = times
+                return tuple(value)
+
+            value = func(*args, **kwargs)
+            stored = value
+            if times_index is not None:
+                stored = list(value)
+                stored[times_index] = None
+                stored = tuple(stored)
+            try:
+                put_cached_render(key, stored)
+            except (OSError, pickle.PicklingError, TypeError, AttributeError) as e:
+                print(f"Render cache: could not store {kind}: {e}")
+            return value
+        return wrapper
+    return decorator
@@ -1,53 +1,174 @@
-from ..solar_system.pdf import create_pdf_view
-from .pdf_pages.dso import do_dso_lists
+import datetime, hashlib, json, os, time
+from django.conf import settings
+from ..dso.render_batch import BatchReport, run_batch
+from ..plotting.render_cache import RENDER_CACHE_DIR, get_render_cache_version, normalize
+from ..site_parameter.helpers import find_site_parameter
+from ..solar_system.pdf import create_pdf_view, pdf_view_calls
+from .pdf_pages.charts import run_chart_call
+from .pdf_pages.dso import do_dso_lists, dso_list_page_calls
 from .pdf_pages.observing_form import do_observing_form
 from .pdf_pages.page1 import do_page1
-from .pdf_pages.solar_system import do_asteroids, do_comets, do_moon, do_planets
-from .pdf_pages.stars import do_skymap, do_zenith
+from .pdf_pages.solar_system import (
+    do_asteroids, do_comets, do_moon, do_planets,
+    asteroid_page_calls, comet_page_calls, planet_page_calls
+)
+from .pdf_pages.stars import do_skymap, do_zenith, skymap_call, zenith_call
 
-def run_pdf(
-        p, 
-        context, 
-        planet_list=None, 
+"""
+The observing plan PDF.
+
+The plan is a list of pages, each with the charts it needs (see pdf_pages/charts.py).
+The charts are drawn up front (dso.render_batch.run_batch - in worker processes
+unless the pdf-chart-workers site parameter is 1); as they come back, every page
+whose charts are all there is drawn, in order - so the PDF is written page by
+page as the charts finish, rather than one chart at a time.
+The finished file is kept (see plan_pdf_path()) and streamed from disk.
+"""
+
+PLAN_PDF_DIR = getattr(settings, 'PLAN_PDF_DIR', os.path.join(RENDER_CACHE_DIR, 'plans'))
+PLAN_PDF_KEEP = getattr(settings, 'PLAN_PDF_KEEP', 20)
+PDF_CHART_WORKERS = min(4, os.cpu_count() or 1)
+
+def plan_pages(
+        context,
+        planet_list=None,
         asteroid_list=None,
         comet_list=None,
-        dso_lists=None, 
-        skip=[], 
+        dso_lists=None,
+        skip=[],
         pages=None
     ):
+    """
+    The pages of the plan, in order: (label, function(p) that draws it, [ChartCall, ...]).
+    """
     utdt = context['utdt_start']
     planet_cookie = context['cookies']['planets']
-    p = do_page1(p, context)             # Cover Page
+    plan = [('Cover', lambda p: do_page1(p, context), [])]     # Cover Page
     if 'skymap' not in skip:
-        p = do_skymap(p, context)        # Skymap
+        plan.append(('Skymap', lambda p: do_skymap(p, context), [skymap_call(context)]))
     if 'zenith' not in skip:
-        p = do_zenith(p, context)        # Zenith Chart
+        plan.append(('Zenith Chart', lambda p: do_zenith(p, context), [zenith_call(context)]))
     if planet_list.count() > 0:     #planets' not in skip:
-        p = do_planets(p, context)       # Planets Overview
-    for planet in planet_list:
-        pname = planet.name
-        session = planet_cookie[pname]
-        p = create_pdf_view(             # Individual Planets
-            p, 
-            utdt, 
-            planet, 
-            'planet', 
-            session, 
-            context
-    )
+        plan.append(('Planets', lambda p: do_planets(p, context), planet_page_calls(context)))
+    for planet in planet_list:                                  # Individual Planets
+        session = planet_cookie[planet.name]
+        calls = pdf_view_calls(utdt, planet, 'planet', session, context)
+        plan.append((
+            planet.name,
+            lambda p, planet=planet, session=session: create_pdf_view(p, utdt, planet, 'planet', session, context),
+            list(calls.values())
+        ))
     if asteroid_list.count() > 0:       # 'asteroids' not in skip:
-        p = do_asteroids(p, context, asteroid_list=asteroid_list)     # Asteroids
+        plan.append(('Asteroids', lambda p: do_asteroids(p, context, asteroid_list=asteroid_list),
+            asteroid_page_calls(context, asteroid_list)))
     if comet_list.count() > 0:          # 'comets' not in skip:
-        p = do_comets(p, context, comet_list=comet_list)        # Comets
+        plan.append(('Comets', lambda p: do_comets(p, context, comet_list=comet_list),
+            comet_page_calls(context, comet_list)))
     #if 'moon' not in skip:
-    #    p = do_moon(p, context)          # Moon   
-    if dso_lists is not None and dso_lists.count() > 0:
-        p = do_dso_lists(p, context, dso_lists=dso_lists)     # DSO Lists       
-    if 'forms' not in skip:
-        p = do_observing_form(           # Blank Observing Forms
-            p, 
-            context, 
-            pages=pages
-    )
+    #    plan.append(('Moon', lambda p: do_moon(p, context), []))
+    if dso_lists is not None:                                   # DSO Lists
+        for dl in dso_lists:
+            plan.append((f'DSO List {dl.name}', lambda p, dl=dl: do_dso_lists(p, context, dso_lists=[dl]),
+                dso_list_page_calls(dl)))
+    if 'forms' not in skip:                                     # Blank Observing Forms
+        plan.append(('Observing Forms', lambda p: do_observing_form(p, context, pages=pages), []))
+    return plan
+
+def run_pdf(
+        p,
+        context,
+        planet_list=None,
+        asteroid_list=None,
+        comet_list=None,
+        dso_lists=None,
+        skip=[],
+        pages=None,
+        workers=None,
+        timeout=None
+    ):
+    """
+    Draw the plan onto p.   The charts are drawn by a small pool of (spawned)
+    worker processes: workers, else the pdf-chart-workers site parameter, else
+    up to 4; 1 draws them all in this process.   Charts a worker hasn't finished
+    within timeout seconds (pdf-chart-timeout) are drawn here instead.
+    """
+    plan = plan_pages(context, planet_list=planet_list, asteroid_list=asteroid_list, comet_list=comet_list,
+        dso_lists=dso_lists, skip=skip, pages=pages)
+    workers = workers or find_site_parameter('pdf-chart-workers', default=PDF_CHART_WORKERS, param_type='positive')
+    timeout = timeout or find_site_parameter('pdf-chart-timeout', default=120., param_type='float')
+
+    calls = {}
+    for _, _, page_calls in plan:
+        for call in page_calls:
+            calls.setdefault(call.key, call)
+    context['chart_images'] = images = {}
+    done, chart_time = set(), {}
+    report = BatchReport(len(calls), label='chart')
+    page_times = []
+
+    def draw_ready(n):
+        # Draw the pages from n on whose charts are all done
+        while n < len(plan) and all(call.key in done for call in plan[n][2]):
+            label, draw, page_calls = plan[n]
+            start = time.perf_counter()
+            draw(p)
+            page_times.append((label, sum(chart_time[c.key] for c in page_calls), time.perf_counter() - start))
+            n += 1
+        return n
+
+    n = draw_ready(0)
+    tasks = list(calls.values())
+    for call, result, seconds, error in run_batch(run_chart_call, tasks, workers=workers, chunk_size=1,
+            utdt=context['utdt_start'], timeout=timeout):
+        report.add(call.name, seconds, error)
+        if error is None:
+            key, image = result
+            images[key] = image
+        # (if it failed, the page will try drawing it itself)
+        done.add(call.key)
+        chart_time[call.key] = seconds
+        n = draw_ready(n)
+    n = draw_ready(n)
+    report.summary()
+    for i, (label, charts, page) in enumerate(page_times):
+        print(f"Page {i+1}/{len(plan)} {label}: charts {charts:.2f}s, page {page:.2f}s")
     p.save()
     return p
+
+def plan_pdf_path(context, planet_list, asteroid_list, comet_list, dso_lists, skip, pages):
+    """
+    Where the PDF for this plan goes: named for everything that goes into it
+    (the session, the selections, the catalog version - see plotting.render_cache - and the date).
+    """
+    lists = [[dl.pk, dl.dso.all()] for dl in dso_lists] if dso_lists is not None else None
+    inputs = [
+        context['cookies'], planet_list, asteroid_list, comet_list, lists, sorted(skip), pages,
+        get_render_cache_version(), datetime.date.today()
+    ]
+    blob = json.dumps(normalize(inputs, 0), sort_keys=True, default=str)
+    key = hashlib.sha256(blob.encode('utf-8')).hexdigest()
+    os.makedirs(PLAN_PDF_DIR, exist_ok=True)
+    return os.path.join(PLAN_PDF_DIR, f"plan-{key[:32]}.pdf")
+
+def plan_pdf_mtime(fn):
+    try:
+        return os.path.getmtime(fn)
+    except OSError: # pruned by another request
+        return 0.
+
+def prune_plan_pdfs(keep=PLAN_PDF_KEEP, exclude=[]):
+    """
+    Only keep the most recent plans (and any in exclude).
+    """
+    try:
+        files = [os.path.join(PLAN_PDF_DIR, fn) for fn in os.listdir(PLAN_PDF_DIR) if fn.endswith('.pdf')]
+    except OSError:
+        return
+    exclude = [os.path.abspath(fn) for fn in exclude]
+    files = [fn for fn in files if os.path.abspath(fn) not in exclude]
+    files.sort(key=plan_pdf_mtime, reverse=True)
+    for fn in files[max(0, keep - len(exclude)):]:
+        try:
+            os.remove(fn)
+        except OSError:
+            pass
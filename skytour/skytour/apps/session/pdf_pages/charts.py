@@ -0,0 +1,56 @@
+import json
+from ...dso.finder import plot_dso_list
+from ...plotting.render_cache import normalize
+from ...solar_system.plot import create_finder_chart, create_planet_system_view
+from ...stars.plot import get_skymap, get_zenith_map
+
+"""
+The chart images on the observing-plan PDF pages.
+
+A page asks for each chart with a ChartCall (a name in CHARTS plus its arguments)
+rather than calling the plotting function itself.   That way session.pdf can
+collect the calls for every page up front, have worker processes render them
+in parallel, and leave the images in context['chart_images'] where render_chart()
+finds them when the page is drawn.
+"""
+
+CHARTS = {
+    'skymap': get_skymap,
+    'zenith_map': get_zenith_map,
+    'finder_chart': create_finder_chart,
+    'planet_system_view': create_planet_system_view,
+    'dso_list': plot_dso_list,
+}
+
+class ChartCall:
+    """
+    One call to a chart function - picklable, so it can go to a worker process.
+    """
+    def __init__(self, name, *args, **kwargs):
+        self.name = name
+        self.args = args
+        self.kwargs = kwargs
+
+    @property
+    def key(self):
+        if getattr(self, '_key', None) is None:
+            self._key = json.dumps([self.name, normalize([self.args, self.kwargs], 0)], sort_keys=True)
+        return self._key
+
+    def __call__(self):
+        return CHARTS[self.name](*self.args, **self.kwargs)
+
+def run_chart_call(call):
+    """
+    Worker task (see dso.render_batch.run_batch()): (key, what the chart function returned).
+    """
+    return call.key, call()
+
+def render_chart(context, call):
+    """
+    The chart for call: from the ones rendered ahead of time if it's there, otherwise drawn now.
+    """
+    images = context.get('chart_images', {})
+    if call.key in images:
+        return images[call.key]
+    return call()
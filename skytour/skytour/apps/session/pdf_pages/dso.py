@@ -1,8 +1,28 @@
-from ...dso.finder import plot_dso_list
 from ...dso.helpers import get_map_parameters, get_star_mag_limit
 from ...pdf.utils import bold_text, label_and_text, add_image
 from ...pdf.utils import X0, Y0
 from ...utils.format import to_hm, to_dm
+from .charts import ChartCall, render_chart
+
+def dso_list_call(dl, dso_set, center_ra, center_dec, fov, star_mag_limit):
+    return ChartCall('dso_list',
+        center_ra, 
+        center_dec, 
+        dso_set, 
+        reversed = False,
+        fov = fov,
+        star_mag_limit = star_mag_limit,
+        label_size='small',
+        symbol_size=60,
+        title = f"DSO List: {dl.name}"
+    )
+
+def dso_list_page_calls(dl):
+    dso_set = dl.dso.all()
+    if dso_set.count() == 0:
+        return []
+    center_ra, center_dec, max_dist, fov = get_map_parameters(dso_set)
+    return [dso_list_call(dl, dso_set, center_ra, center_dec, fov, get_star_mag_limit(max_dist))]
 
 def do_dso_lists(p, context, dso_lists=None):  
     if dso_lists is None:
@@ -28,17 +48,7 @@ def do_dso_lists(p, context, dso_lists=None):
         p, y = label_and_text(p, x, y, ('FOV: ', 7), (f"{fov:.0f}°", 7), cr=9)
         p, y = label_and_text(p, x, y, ('Mag. Limit: ', 7), (f"{star_mag_limit:.1f}", 7), cr=9)
 
-        map = plot_dso_list(
-            center_ra, 
-            center_dec, 
-            dso_set, 
-            reversed = False,
-            fov = fov,
-            star_mag_limit = star_mag_limit,
-            label_size='small',
-            symbol_size=60,
-            title = f"DSO List: {dl.name}"
-        )
+        map = render_chart(context, dso_list_call(dl, dso_set, center_ra, center_dec, fov, star_mag_limit))
         y = 735
         p, y = add_image(p, y, map, size=500, x=20)
 
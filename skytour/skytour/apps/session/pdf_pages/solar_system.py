@@ -3,8 +3,8 @@ from django.contrib.staticfiles import finders
 from ...pdf.utils import label_and_text
 from ...site_parameter.helpers import find_site_parameter
 from ...solar_system.models import Asteroid, Comet, Planet
-from ...solar_system.plot import create_planet_system_view, create_finder_chart
 from ...utils.format import to_sex, to_hm, to_dm, to_time
+from .charts import ChartCall, render_chart
 from .utils import do_line, show_object_table, show_table_header
 from .vocabs import PDICT, PLANET_LIST
 
@@ -14,8 +14,56 @@ FCX = [390,  30, 210, 390,  30, 210, 390,  30, 210, 390]
 FCY = [  0, 160, 160, 160, 320, 320, 320, 480, 480, 480]
 #FCY = [-45, 130, 130, 130, 310, 310, 310, 490, 490, 490]
 
+def planet_view_call(context, instance):
+    return ChartCall('planet_system_view', context['utdt_start'], instance, context['cookies']['planets'], reversed=False)
+
+def neptune_finder_call(context, instance):
+    cookie_dict = context['cookies']
+    return ChartCall('finder_chart',
+        context['utdt_start'], 
+        instance, 
+        cookie_dict['planets'],
+        cookie_dict['asteroids'],
+        reversed = False
+    )
+
+def object_finder_call(context, instance, object_type, obj_cookie):
+    """
+    The finder chart for an asteroid or comet.
+    """
+    cookie_dict = context['cookies']
+    return ChartCall('finder_chart',
+        context['utdt_start'], 
+        instance, 
+        planets_cookie=cookie_dict['planets'],
+        asteroids=cookie_dict['asteroids'],
+        object_type=object_type,
+        obj_cookie=obj_cookie,
+        fov=5,
+        reversed = False
+    )
+
+def planet_page_calls(context):
+    calls = []
+    for planet in PLANET_LIST:
+        instance = Planet.objects.get(slug=planet.lower())
+        calls.append(planet_view_call(context, instance))
+        if planet == 'Neptune':
+            calls.append(neptune_finder_call(context, instance))
+    return calls
+
+def asteroid_page_calls(context, asteroid_list):
+    adict = dict((a['slug'], a) for a in context['cookies']['asteroids'])
+    # Only the first 10 get finder charts
+    return [object_finder_call(context, instance, 'asteroid', adict[instance.slug]) for instance in asteroid_list[:10]]
+
+def comet_page_calls(context, comet_list):
+    cdict = dict((c['pk'], c) for c in context['cookies']['comets'])
+    # Only the first 5 bright enough to list get finder charts
+    comets = [instance for instance in comet_list if cdict[instance.pk]['observe']['apparent_magnitude'] <= 12.0]
+    return [object_finder_call(context, instance, 'comet', cdict[instance.pk]) for instance in comets[:5]]
+
 def do_planets(p, context):
-    utdt = context['utdt_start']
     cookie_dict = context['cookies']
 
     y = 720
@@ -44,16 +92,10 @@ def do_planets(p, context):
         p.drawString(160, y, f"Mag: {tp['observe']['apparent_magnitude']:.2f}")
         y -= 15
         p.drawString(160, y, f"Ang. Size: {tp['observe']['angular_diameter_str']}")
-        tel_view, _ = create_planet_system_view(utdt, instance, cookie_dict['planets'], reversed=False)
+        tel_view, _ = render_chart(context, planet_view_call(context, instance))
         p.drawInlineImage(tel_view, xp, yp, 180, 180)
         if planet == 'Neptune':
-            nft, _ = create_finder_chart(
-                utdt, 
-                instance, 
-                cookie_dict['planets'],
-                cookie_dict['asteroids'],
-                reversed = False
-            )
+            nft, _ = render_chart(context, neptune_finder_call(context, instance))
             p.drawInlineImage(nft, 420, 20, 180, 180)
         for alm in tp['almanac']:
             p.drawString(65, dy, f"{alm['type']}: {isoparse(alm['ut']).strftime('%H:%M')} UT")
@@ -62,7 +104,6 @@ def do_planets(p, context):
     return p
 
 def do_asteroids(p, context, asteroid_list=None, debug=False):
-    utdt = context['utdt_start']
     cookie_dict = context['cookies']
 
     y = 720
@@ -91,16 +132,7 @@ def do_asteroids(p, context, asteroid_list=None, debug=False):
             p, y = show_object_table(a, p, y, instance) 
             # Finder Charts
             if na < 10:
-                aft, _ = create_finder_chart(
-                    utdt, 
-                    instance, 
-                    planets_cookie=cookie_dict['planets'],
-                    asteroids=cookie_dict['asteroids'],
-                    object_type='asteroid',
-                    obj_cookie=a,
-                    fov=5,
-                    reversed = False
-                )
+                aft, _ = render_chart(context, object_finder_call(context, instance, 'asteroid', a))
                 #p.drawInlineImage(aft, FCX[na % 3], fcy_start - FCY[na // 3], 180, 180)
                 p.drawInlineImage(aft, FCX[na], fcy_start - FCY[na], 180, 180)
                 na += 1
@@ -111,7 +143,6 @@ def do_asteroids(p, context, asteroid_list=None, debug=False):
 
 def do_comets(p, context, comet_list=None, debug=False): 
     cookie_dict = context['cookies']
-    utdt = context['utdt_start']
 
     y = 720
     p.setFont('Helvetica-Bold', 14)
@@ -145,16 +176,7 @@ def do_comets(p, context, comet_list=None, debug=False):
             p, y = show_object_table(comet, p, y, instance, xoff=40)
             
             if na < 6:
-                aft, _ = create_finder_chart(
-                    utdt, 
-                    instance, 
-                    planets_cookie=cookie_dict['planets'],
-                    asteroids=cookie_dict['asteroids'],
-                    object_type='comet',
-                    obj_cookie=comet,
-                    fov=5,
-                    reversed = False
-                )
+                aft, _ = render_chart(context, object_finder_call(context, instance, 'comet', comet))
                 #p.drawInlineImage(aft, FCX[na % 3], fcy_start - FCY[na // 3], 180, 180)
                 p.drawInlineImage(aft, FCX[na], fcy_start - FCY[na], 180, 180)
                 na += 1        
@@ -198,14 +220,14 @@ def do_moon(p, context):
         p, y = label_and_text(p, 50, y, (l, 12), (t, 12), cr=16) 
     # Phase plot
     cookie_dict['moon']['name'] = 'Moon' # TODO: Fix this bug!
-    moon_tel, _ = create_planet_system_view(
+    moon_tel, _ = render_chart(context, ChartCall('planet_system_view',
         utdt,
         None,
         cookie_dict['moon'],
         object_type = 'moon',
         flipped = False,
         reversed = False
-    )
+    ))
     p.drawInlineImage(moon_tel, 30, y -200, 200, 200)
     y =  200
 
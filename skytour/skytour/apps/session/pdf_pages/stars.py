@@ -1,18 +1,11 @@
 import datetime
-from ...stars.plot import get_skymap, get_zenith_map
+from .charts import ChartCall, render_chart
 from .vocabs import PAGE_WIDTH
 
-def do_skymap(p, context):
+def skymap_call(context):
     cookie_dict = context['cookies']
-
-    ######################################### PAGE 2
-    # Skymap 
-    p.setFont('Helvetica-Bold', 24)
-    p.drawCentredString(PAGE_WIDTH/2, 700, 'SKYMAP')
-    p.setFont('Helvetica', 12)
     slew_limit = None if 'slew_limit' not in context.keys() else context['slew_limit']
-    
-    skymap, interesting, last, times = get_skymap(
+    return ChartCall('skymap',
         context['utdt_start'], 
         context['location'],
         planets = cookie_dict['planets'],
@@ -23,7 +16,25 @@ def do_skymap(p, context):
         reversed = False,
         slew_limit = slew_limit,
         local_time = context['local_time_start']
-    ) 
+    )
+
+def zenith_call(context):
+    return ChartCall('zenith_map',
+        context['utdt_start'],
+        context['location'], 
+        6.5, # mag limit
+        30., # radius from zenith
+        reversed=False,
+        mag_offset = 0.5
+    )
+
+def do_skymap(p, context):
+    ######################################### PAGE 2
+    # Skymap 
+    p.setFont('Helvetica-Bold', 24)
+    p.drawCentredString(PAGE_WIDTH/2, 700, 'SKYMAP')
+    p.setFont('Helvetica', 12)
+    skymap, interesting, last, times = render_chart(context, skymap_call(context))
     p.drawInlineImage(skymap, 28, 150, 7.5*72, 7.5*72)
     p.setFont('Helvetica-Bold', 14)
     p.drawString( 50, 150, 'Planets')
@@ -66,18 +77,10 @@ def do_zenith(p, context):
     p.setFont('Helvetica-Bold', 24)
     p.drawCentredString(PAGE_WIDTH/2, 700, 'Zenith Chart')
     p.setFont('Helvetica', 12)
-    utdt_mid = context['utdt_start'] 
     local_mid = context['local_time_start'] 
     #p.drawString(50, 670, f"{local_mid.strftime('%b %-d, %Y %-I:%M %p %z')}")
     p.drawString(50, 670, f"{local_mid}")
-    zenith_chart, _ = get_zenith_map(
-        utdt_mid,
-        context['location'], 
-        6.5, # mag limit
-        30., # radius from zenith
-        reversed=False,
-        mag_offset = 0.5
-    ) 
+    zenith_chart, _ = render_chart(context, zenith_call(context))
     p.drawInlineImage(zenith_chart, 28, 100, 7.5*72, 7.5*72)
     p.showPage() # This ends the page
     return p
\ No newline at end of file
@@ -0,0 +1,113 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from dateutil.parser import isoparse
+from django.db import connections
+from ..astro.almanac import get_dark_time
+from ..astro.ephemeris import get_eph, get_timescale
+from ..site_parameter.helpers import find_site_parameter
+from ..solar_system.helpers import get_planet_positions, get_comet_positions, get_visible_asteroid_positions
+from ..solar_system.position import get_object_metadata
+
+"""
+Assembling the ephemeris for an observing session (SetSessionCookieView).
+
+The Sun, Moon, planets, asteroids, comets and twilight don't depend on each other,
+so they're computed at the same time in a thread pool (sharing the process-wide
+ephemeris; see astro.ephemeris), each with a time limit.   The results go into
+the session as they always have (request.session['planets'], etc.), along with
+a snapshot record - version, time, location, per-part timing - so that other
+views can tell whether what's in the session is for their time/location and
+reuse it instead of computing it again.
+"""
+
+# Bump this when what's stored in the session changes shape.
+SNAPSHOT_VERSION = 1
+
+def _twilight(utdt, location):
+    twi_end, twi_begin = get_dark_time(utdt, location)
+    return dict(
+        end=twi_end.utc_datetime().isoformat(),
+        begin=twi_begin.utc_datetime().isoformat()
+    )
+
+# name: (function(utdt, location), value if it fails or runs out of time)
+SESSION_PARTS = {
+    'sun': (lambda utdt, location: get_object_metadata(utdt, 'Sun', 'sun', location=location), None),
+    'moon': (lambda utdt, location: get_object_metadata(utdt, 'Moon', 'moon', location=location), None),
+    'planets': (lambda utdt, location: get_planet_positions(utdt, location=location), None),
+    'asteroids': (lambda utdt, location: get_visible_asteroid_positions(utdt, location=location)[0], []),
+    'comets': (lambda utdt, location: get_comet_positions(utdt, location=location)[0], []),
+    'twilight': (_twilight, dict(end=None, begin=None)),
+}
+
+def _run_part(name, utdt, location):
+    start = time.perf_counter()
+    try:
+        return SESSION_PARTS[name][0](utdt, location), time.perf_counter() - start
+    finally:
+        connections.close_all() # this thread's connections only
+
+def assemble_session(utdt, location, workers=None, timeout=None):
+    """
+    Compute every part of SESSION_PARTS concurrently.
+    Returns (values, status, times):
+        values: {name: value} - the fallback value for a part that failed or timed out
+        status: {name: dict(seconds=..., error=...)}
+        times: (perf_counter, label) entries, as the views' timers use
+    """
+    workers = workers or int(find_site_parameter('session-assembly-workers', default=len(SESSION_PARTS), param_type='number'))
+    timeout = timeout or find_site_parameter('session-assembly-timeout', default=30., param_type='float')
+    get_timescale() # load these once, before the threads want them
+    get_eph()
+
+    start = time.perf_counter()
+    times = [(start, 'Start Assembly')]
+    values, status = {}, {}
+    pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        futures = dict((name, pool.submit(_run_part, name, utdt, location)) for name in SESSION_PARTS)
+        deadline = start + timeout
+        for name, future in futures.items():
+            try:
+                values[name], seconds = future.result(timeout=max(0., deadline - time.perf_counter()))
+                status[name] = dict(seconds=seconds, error=None)
+            except TimeoutError:
+                values[name] = SESSION_PARTS[name][1]
+                status[name] = dict(seconds=None, error=f'Timed out after {timeout:.0f}s')
+            except Exception as e:
+                values[name] = SESSION_PARTS[name][1]
+                status[name] = dict(seconds=None, error=f'{e.__class__.__name__}: {e}')
+            label = f'{name.title()}: {status[name]["seconds"]:.2f}s' if status[name]['error'] is None \
+                else f'{name.title()}: {status[name]["error"]}'
+            times.append((time.perf_counter(), label))
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    return values, status, times
+
+def save_session_snapshot(request, utdt, location, values, status):
+    """
+    Put the assembled parts into the session, with the snapshot record.
+    """
+    for name in ['sun', 'moon', 'planets', 'asteroids', 'comets']:
+        request.session[name] = values[name]
+    request.session['session_snapshot'] = dict(
+        version = SNAPSHOT_VERSION,
+        utdt_start = utdt.isoformat(),
+        location = location.pk,
+        twilight = values['twilight'],
+        status = status
+    )
+
+def get_session_snapshot(request, utdt=None, location=None):
+    """
+    The session's snapshot record, if it's the current version and (when given)
+    for this time and location; otherwise None.
+    """
+    snapshot = request.session.get('session_snapshot', None)
+    if not snapshot or snapshot.get('version') != SNAPSHOT_VERSION:
+        return None
+    if utdt is not None and isoparse(snapshot['utdt_start']) != utdt:
+        return None
+    if location is not None and snapshot['location'] != location.pk:
+        return None
+    return snapshot
@@ -1,11 +1,10 @@
 import datetime, pytz
-import io
 import numpy as np
 import pandas as pd
 import time
 
 from django.core.exceptions import ValidationError
-from django.http import HttpResponse
+from django.http import FileResponse
 from django.urls import reverse, reverse_lazy
 from django.utils.decorators import method_decorator
 from django.views.decorators.cache import cache_page
@@ -16,7 +15,6 @@ from django.views.generic.list import ListView
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
 
-from ..astro.almanac import get_dark_time
 from ..astro.calendar import create_simple_calendar_grid
 from ..astro.time import get_julian_date, utc_round_up_minutes
 from ..astro.utils import get_declination_range
@@ -25,19 +23,14 @@ from ..dso.models import DSOObservation
 from ..observe.models import ObservingLocation
 from ..observe.plot import plot_sqm_history
 from ..plotting.scatter import create_histogram
-from ..solar_system.helpers import ( 
-    get_planet_positions, 
-    get_comet_positions,
-    get_visible_asteroid_positions
-)
 from ..solar_system.models import (
     Asteroid, AsteroidObservation,
     Comet, CometObservation,
     PlanetObservation,
     MoonObservation
 )
-from ..solar_system.position import get_object_metadata
 from ..tech.models import Telescope
+from ..utils.files import atomic_file
 from ..utils.timer import compile_times
 from .cookie import get_all_cookies, deal_with_cookie
 from .forms import (
@@ -48,7 +41,8 @@ from .forms import (
 )
 from .mixins import CookieMixin
 from .models import ObservingSession, ObservingCircumstances
-from .pdf import run_pdf
+from .pdf import plan_pdf_path, prune_plan_pdfs, run_pdf
+from .snapshot import assemble_session, save_session_snapshot
 from .utils import (
     get_initial_from_cookie, 
     get_observing_mode_string,
@@ -101,51 +95,15 @@ class SetSessionCookieView(FormView):
         local_time_start = utdt_start.astimezone(time_zone) if time_zone is not None else None
         times.append((time.perf_counter(), f'Processed Form'))
 
-        # Sun
-        sun = get_object_metadata(utdt_start, 'Sun', 'sun', location=my_location)
-        context['sun'] = sun 
-        self.request.session['sun'] = sun
-        times.append((time.perf_counter(), f'Got Sun'))
-
-        # Moon
-        moon = get_object_metadata(utdt_start, 'Moon', 'moon', location=my_location)
-        context['moon'] = moon 
-        self.request.session['moon'] = moon
-        times.append((time.perf_counter(), f'Got Moon'))
-
-        # Planets
-        planets = get_planet_positions(utdt_start, location=my_location)
-        context['planets'] = planets
-        self.request.session['planets'] = planets
-        times.append((time.perf_counter(), f'Got Planets'))
-
-        # Asteroids
-        asteroid_list, atimes = get_visible_asteroid_positions(
-            utdt_start, 
-            #location=my_location, # This slows it down by 10x
-        )
-        context['asteroids'] = asteroid_list
-        self.request.session['asteroids'] = asteroid_list
-        times += atimes
-        times.append((time.perf_counter(), f'Got Asteroids'))
-
-        # Comets
-        comet_list, ctimes = get_comet_positions(
-            utdt_start, 
-            #location=my_location,  # This slows it down by 10x
-            times=times
-        )
-        context['comets'] = comet_list
-        self.request.session['comets'] = comet_list
-        times += ctimes
-        times.append((time.perf_counter(), 'Got Comets'))
-
-        # Twilight
-        twi_end, twi_begin = get_dark_time(utdt_start, my_location)
-        twilight = dict(
-            end=twi_end.utc_datetime().isoformat(), 
-            begin=twi_begin.utc_datetime().isoformat()
-        )
+        # Sun, Moon, planets, asteroids, comets, twilight - all at once
+        parts, status, ptimes = assemble_session(utdt_start, my_location)
+        save_session_snapshot(self.request, utdt_start, my_location, parts, status)
+        for k in ['sun', 'moon', 'planets', 'asteroids', 'comets']:
+            context[k] = parts[k]
+        context['assembly_errors'] = dict((k, v['error']) for k, v in status.items() if v['error'])
+        twilight = parts['twilight']
+        times += ptimes
+        times.append((time.perf_counter(), 'Assembled Session'))
 
         # Misc.
         flip_planets = 'Yes' if d['observing_mode'] in 'SM' else 'No' # Make boolean
@@ -255,24 +213,27 @@ class ObservingPlanV2View(CookieMixin, FormView):
         dso_lists = d['dso_lists']
         pages = d['obs_forms']
 
-        # Create a PDF file
-        buffer = io.BytesIO()
-        p = canvas.Canvas(buffer, pagesize=letter)
-        p = run_pdf(
-            p, 
-            context, 
-            planet_list=planet_list, 
-            asteroid_list=asteroid_list,
-            comet_list=comet_list,
-            dso_lists=dso_lists, 
-            skip=skip, 
-            pages=pages
-        )
-        buffer.seek(0)
-        if p:
-            response = HttpResponse(buffer, content_type='application/pdf')
-            return response
-        return self.render_to_response(context)
+        # Create the PDF file - unless this exact plan has already been made today
+        path = plan_pdf_path(context, planet_list, asteroid_list, comet_list, dso_lists, skip, pages)
+        try:
+            pdf = open(path, 'rb')
+        except FileNotFoundError:
+            with atomic_file(path) as tmp:
+                p = canvas.Canvas(tmp, pagesize=letter)
+                run_pdf(
+                    p, 
+                    context, 
+                    planet_list=planet_list, 
+                    asteroid_list=asteroid_list,
+                    comet_list=comet_list,
+                    dso_lists=dso_lists, 
+                    skip=skip, 
+                    pages=pages
+                )
+            # Open it before pruning: another request's prune can't take it away from us now
+            pdf = open(path, 'rb')
+            prune_plan_pdfs(exclude=[path])
+        return FileResponse(pdf, content_type='application/pdf')
     
     def get_context_data(self, **kwargs):
         context = super(ObservingPlanV2View, self).get_context_data(**kwargs)
@@ -1,5 +1,8 @@
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils.translation import gettext as _
+from ..plotting.render_cache import bump_background_cache, bump_render_cache
 
 class AbstractSiteParameter(models.Model):
     date_created = models.DateTimeField(
@@ -88,4 +91,15 @@ class SiteParameterPDFFile(AbstractSiteParameter):
     value = models.FileField (
         _('PDF File'),
         upload_to = 'pdf_files'
-    )
\ No newline at end of file
+    )
+
+@receiver([post_save, post_delete], sender=SiteParameterPositiveInteger)
+@receiver([post_save, post_delete], sender=SiteParameterNumber)
+@receiver([post_save, post_delete], sender=SiteParameterFloat)
+@receiver([post_save, post_delete], sender=SiteParameterString)
+def bump_site_parameter_render_cache(sender, instance, **kwargs):
+    """
+    Magnitude limits etc. for the maps are site parameters.
+    """
+    bump_render_cache()
+    bump_background_cache()
@@ -1,7 +1,7 @@
 import math
-from skyfield.api import load
 from skyfield.constants import GM_SUN_Pitjeva_2005_km3_s2 as GM_SUN
 from skyfield.data import mpc
+from .orbit_store import lookup_orbit
 
 def get_asteroid_target(asteroid, ts, sun):
    """
@@ -20,16 +20,12 @@ def get_asteroid_target(asteroid, ts, sun):
 
 def lookup_asteroid_object(name):
    """
-   This is VERY VERY slow.
-   TODO: find SOME way to optimize this
+   Look up an asteroid by designation in the parsed MPCORB.DAT (see orbit_store).
    """
-   with load.open('data/MPCORB.DAT') as f:
-      mps = mpc.load_mpcorb_dataframe(f)
-   mps = mps.set_index('designation', drop=False)
    try:
-      row = mps.loc[name]
+      row = lookup_orbit('asteroids', name)
    except:
-      return None   
+      return None
    return row
 
 def get_asteroid_object(asteroid):
@@ -37,11 +33,8 @@ def get_asteroid_object(asteroid):
    Lookup an asteroid in bright_asteroids.txt and return it as a target.
    TODO: Deprecate!  
    """
-   with load.open('generated_data/bright_asteroids.txt') as f:
-      mps = mpc.load_mpcorb_dataframe(f)
-   mps = mps.set_index('designation', drop=False)
    try:
-      row = mps.loc[asteroid.mpc_lookup_designation]
+      row = lookup_orbit('bright_asteroids', asteroid.mpc_lookup_designation)
    except:
       return None
    return row
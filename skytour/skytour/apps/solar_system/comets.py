@@ -1,27 +1,20 @@
 import math
-from skyfield.api import load
 from skyfield.constants import GM_SUN_Pitjeva_2005_km3_s2 as GM_SUN
 from skyfield.data import mpc
+from .orbit_store import lookup_orbit
 
 def get_comet_object(comet):
     """
     Look up a comet in CometEls.txt and return the row.
     """
-    with load.open('generated_data/CometEls.txt') as f:
-        comets = mpc.load_comets_dataframe(f)
-    comets = (comets.sort_values('reference').groupby('designation', as_index=False).last().set_index('designation', drop=False))
-    try:
-        row = comets.loc[comet.name]
-    except:
-        row = None
-    return row
+    return lookup_comet_by_name(comet.name)
 
 def lookup_comet_by_name(name):
-    with load.open('generated_data/CometEls.txt') as f:
-        comets = mpc.load_comets_dataframe(f)
-    comets = (comets.sort_values('reference').groupby('designation', as_index=False).last().set_index('designation', drop=False))
+    """
+    Look up a comet by designation in the parsed CometEls.txt (see orbit_store).
+    """
     try:
-        row = comets.loc[name]
+        row = lookup_orbit('comets', name)
     except:
         row = None
     return row
@@ -12,6 +12,11 @@ class TrackerForm(forms.Form):
     start_date = forms.DateField()
     end_date = forms.DateField()
     object = forms.ChoiceField(choices=[])
+    other_objects = forms.MultipleChoiceField(
+        choices=[],
+        required=False,
+        help_text = 'Other objects to track on the same chart.'
+    )
     date_step = forms.IntegerField(
         initial=1,
         help_text = 'How often should we plot a poiint?'
@@ -63,6 +68,7 @@ class TrackerForm(forms.Form):
         comets = Comet.objects.filter(status=1)
         c += [('comet--'+ str(x.pk), x.name) for x in comets]
         self.fields['object'].choices = c
+        self.fields['other_objects'].choices = c
 
 class AsteroidEditForm(forms.ModelForm):
 
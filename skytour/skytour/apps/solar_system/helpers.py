@@ -1,12 +1,12 @@
-import datetime, time
+import datetime, math, time
 from django.db.models import Q
-from skyfield.api import load, Star
-from skyfield.constants import GM_SUN_Pitjeva_2005_km3_s2 as GM_SUN
-from skyfield.data import mpc
-from ..site_parameter.helpers import find_site_parameter, get_ephemeris
-from .asteroids import fast_asteroid
+from skyfield.api import Star
+from ..astro.ephemeris import get_eph, get_timescale
+from ..site_parameter.helpers import find_site_parameter
+from .kepler import OrbitalElements, batch_geometry, batch_rise_set, comet_magnitude, hg_magnitude
 from .models import Planet, Asteroid, Comet
-from .position import get_object_metadata
+from .position import get_batch_object_metadata, get_object_metadata
+from .utils import get_constellations
 from .vocabs import PLANETS
 
 def compile_nearby_planet_list(p, pdict, utdt, times=None):
@@ -34,8 +34,8 @@ def get_adjacent_planets(planet_dict, utdt, times=None):
    """
    min_sep = find_site_parameter('adjacent-planets-separation', default=10., param_type='float')
 
-   ts = load.timescale()
-   eph = load(get_ephemeris())
+   ts = get_timescale()
+   eph = get_eph()
    earth = eph['earth']
    t = ts.utc(utdt)
 
@@ -88,6 +88,9 @@ def get_visible_asteroid_positions(utdt=None, location=None, pluto=True):
    Asteroids are filtered by magnitude.
    Asteroids with "always_include" set to True are not filtered.  This is generally
    set for the dwarf planets.
+
+   All the candidates are propagated together (see kepler.py), and rise/set
+   for the ones that make the cut is done in one batch as well.
    """
    utdt = datetime.datetime.now(datetime.timezone.utc) if utdt is None else utdt
    # TODO V2.x: fix this somehow
@@ -98,78 +101,116 @@ def get_visible_asteroid_positions(utdt=None, location=None, pluto=True):
    # hundreds of asteroids, when we'll only be interested in ~20 tops.
    cutoff = find_site_parameter('asteroid-cutoff', default=10.0, param_type='float')
 
-   ts = load.timescale()
-   eph = load(get_ephemeris())
-   sun = eph['sun']
-
+   ts = get_timescale()
+   eph = get_eph()
    t = ts.utc(utdt)
-   earth = eph['earth']
-   r_earth_sun = earth.at(t).observe(sun).radec()[2].au.item()
-
-   asteroids = Asteroid.objects.filter(Q(est_brightest__lte=cutoff) | Q(always_include=True))
-
-   #with load.open('generated_data/bright_asteroids.txt') as f:
-   #   mps = mpc.load_mpcorb_dataframe(f)
-   #mps = mps.set_index('designation', drop=False)
+   times = [(time.perf_counter(), 'Start')]
 
+   asteroids, rows = [], []
+   for a in Asteroid.objects.filter(Q(est_brightest__lte=cutoff) | Q(always_include=True)):
+      row = a.mpc_object
+      if row is None:
+         print(f"Error with {a}: no MPC elements")
+         continue
+      asteroids.append(a)
+      rows.append(row)
+   if len(rows) == 0:
+      return [], times
+
+   elements = OrbitalElements.from_mpcorb(ts, rows)
+   earth_helio = (eph['earth'] - eph['sun']).at(t).position.au
+   helio, geo = elements.observe(earth_helio, t.tt)
+   geometry = batch_geometry(helio, geo, earth_helio)
+   h = [_float(r, 'magnitude_H') for r in rows]
+   g = [_float(r, 'magnitude_G', 0.15) for r in rows]
+   mag = hg_magnitude(h, g, geometry['r_earth'], geometry['r_sun'], geometry['phase_angle'])
+   times.append((time.perf_counter(), f'Propagate {len(rows)} asteroids'))
+
+   keep = [i for i, a in enumerate(asteroids) if mag[i] <= mag_limit or a.always_include]
+   almanac = [None] * len(keep)
+   if location and len(keep) > 0:
+      almanac = batch_rise_set(elements.subset(keep), eph, ts, utdt, location, time_zone=location.my_time_zone)
+      times.append((time.perf_counter(), f'Rise/Set for {len(keep)} asteroids'))
+
+   constellations = get_constellations(geometry['ra'][keep], geometry['dec'][keep])
    asteroid_list = []
-   times = [(time.perf_counter(), 'Start')]
-   for a in asteroids:
-      mag = None
+   for i, events, constellation in zip(keep, almanac, constellations):
+      a = asteroids[i]
       try:
-         row = a.mpc_object
-         #try:
-         #   row = mps.loc[a.mpc_lookup_designation]
-         #except:
-         #   continue
-         target = sun + mpc.mpcorb_orbit(row, ts, GM_SUN)
-      except Exception as err:
-         o = a.mpc_object
-         e = o['eccentricity']
-         print(f"Error with {a}, e = {e} {type(e)}\n{err}")
-
-      mag = fast_asteroid(a, target, t, earth, sun, r_earth_sun)
-      if mag is not None and mag <= mag_limit or a.always_include:
-         x = get_object_metadata(
-            utdt, 
-            target, 
-            'asteroid', 
-            instance=a, 
-            location=location,
-         )
-         if x is None:
-            continue
-         x['name'] = f'{a.number}: {a.name}'
-         x['slug'] = a.slug
-         x['number'] = a.number
-         asteroid_list.append(x)
-         times.append((time.perf_counter(), x['name']))
+         diameter = a.mean_diameter
+      except:
+         diameter = None
+      x = get_batch_object_metadata(geometry, i, mag[i], diameter=diameter, almanac=events, constellation=constellation)
+      x['name'] = f'{a.number}: {a.name}'
+      x['slug'] = a.slug
+      x['number'] = a.number
+      asteroid_list.append(x)
+   times.append((time.perf_counter(), 'Assemble Asteroid List'))
    return asteroid_list, times
 
 def get_comet_positions(utdt=None, location=None, times=None):
    """
    Get positions of selected comets (i.e., those whose status == 1)
+   All of them are propagated together (see kepler.py).
    """
    utdt = datetime.datetime.now(datetime.timezone.utc) if utdt is None else utdt
    mag_limit = find_site_parameter('comet-magnitude-limit', 12.0, 'float')
-   comets = Comet.objects.filter(status=1)
-   comet_list = []
-   for c in comets:
-      d = get_object_metadata(
-         utdt, 
-         c.name, 
-         'comet', 
-         instance=c, 
-         location=location,
-      )
-      if d is None:
-         continue
-      app_mag = d['observe']['apparent_magnitude']
-      if app_mag > mag_limit and c.override_limits != 1:
+
+   ts = get_timescale()
+   eph = get_eph()
+   t = ts.utc(utdt)
+
+   comets, rows = [], []
+   for c in Comet.objects.filter(status=1):
+      row = c.mpc_object
+      if row is None:
+         print(f"Cannot find {c} in the MPC comet file - skipping")
          continue
+      comets.append(c)
+      rows.append(row)
+   if len(rows) == 0:
+      return [], times
+
+   elements = OrbitalElements.from_comets(ts, rows)
+   earth_helio = (eph['earth'] - eph['sun']).at(t).position.au
+   helio, geo = elements.observe(earth_helio, t.tt)
+   geometry = batch_geometry(helio, geo, earth_helio)
+   mag = comet_magnitude(
+      [_float(r, 'magnitude_g') for r in rows],
+      [_float(r, 'magnitude_k') for r in rows],
+      geometry['r_earth'], geometry['r_sun'],
+      offset = [c.mag_offset or 0. for c in comets]
+   )
+   if times is not None:
+      times.append((time.perf_counter(), f'Propagate {len(rows)} comets'))
+
+   keep = [i for i, c in enumerate(comets) if not mag[i] > mag_limit or c.override_limits == 1]
+   almanac = [None] * len(keep)
+   if location and len(keep) > 0:
+      almanac = batch_rise_set(elements.subset(keep), eph, ts, utdt, location, time_zone=location.my_time_zone)
+      if times is not None:
+         times.append((time.perf_counter(), f'Rise/Set for {len(keep)} comets'))
+
+   constellations = get_constellations(geometry['ra'][keep], geometry['dec'][keep])
+   comet_list = []
+   for i, events, constellation in zip(keep, almanac, constellations):
+      c = comets[i]
+      d = get_batch_object_metadata(geometry, i, mag[i], almanac=events, constellation=constellation)
       d['pk'] = c.pk
       d['name'] = c.name
       comet_list.append(d)
-      if times is not None:
-         times.append((time.perf_counter(), f"added comet {c}"))
+   if times is not None:
+      times.append((time.perf_counter(), 'Assemble Comet List'))
    return comet_list, times
+
+def _float(row, key, default=None):
+   """
+   Element from an MPC row as a float (NaN if missing, unless there's a default).
+   """
+   try:
+      x = float(row[key])
+   except:
+      x = float('nan')
+   if math.isnan(x) and default is not None:
+      return default
+   return x
@@ -1,9 +1,8 @@
 import datetime
 import math
-from skyfield.api import load
 from ..astro.altaz import get_obliquity
+from ..astro.ephemeris import get_eph, get_timescale
 from ..astro.time import get_julian_date, estimate_delta_t
-from ..site_parameter.helpers import get_ephemeris
 from .vocabs import MARS_FEATURES
 
 # Trig functions for degrees
@@ -32,9 +31,9 @@ def get_mars_physical_ephem(utdt, planet, fudge=0, features=True, debug=False):
     eps0 = (23. + 26/60. + 21.448/3600.) - (46.8150*tt + 5.9e-4 * tt**2 + 1.813 * tt**3)/3600.
 
     # Things from Skyfield to get things started.
-    ts = load.timescale()
+    ts = get_timescale()
     t = ts.utc(utdt.year, utdt.month, utdt.day, utdt.hour, utdt.minute)
-    eph = load(get_ephemeris())
+    eph = get_eph()
     earth = eph['earth']
     sun = eph['sun']
     mars = eph[planet.target]
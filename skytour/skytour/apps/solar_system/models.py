@@ -6,6 +6,8 @@ warnings.simplefilter(action='ignore', category=FutureWarning)
 import pandas as pd
 import json
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils.html import mark_safe
 from django.utils.translation import gettext as _
 from djangoyearlessdate.models import YearlessDateField
@@ -14,6 +16,7 @@ from skyfield.api import Star
 from ..abstract.models import ObservingLog, ObservableObject, LibraryAbstractImage, WikipediaPage, WikipediaPageObject
 from ..abstract.utils import get_metadata
 from ..abstract.vocabs import YES, NO, YES_NO
+from ..plotting.render_cache import bump_render_cache
 from ..utils.text import replace_greek_letters
 from .asteroids import get_asteroid_object, lookup_asteroid_object, create_asteroid_dict
 from .comets import get_comet_object, get_comet_period
@@ -744,4 +747,14 @@ class PlanetMoon(models.Model):
     @property
     def apparent_magnitude(self, earth_dist, sun_dist):
         m = self.h + 5 * math.log10(earth_dist * sun_dist) - self.g
-        return m
\ No newline at end of file
+        return m
+
+@receiver([post_save, post_delete], sender=Planet)
+@receiver([post_save, post_delete], sender=Asteroid)
+@receiver([post_save, post_delete], sender=Comet)
+@receiver([post_save, post_delete], sender=MeteorShower)
+def bump_solar_system_render_cache(sender, instance, **kwargs):
+    """
+    Solar system objects (and meteor shower radiants) are drawn on the maps.
+    """
+    bump_render_cache()
@@ -0,0 +1,133 @@
+import threading
+import numpy as np
+import pandas as pd
+from skyfield.api import load
+from skyfield.data import mpc
+from ..utils.files import file_mtime, is_stale, save_npy
+
+"""
+MPC orbital elements, parsed once.
+
+CometEls.txt and (especially) MPCORB.DAT are slow to parse, and every comet
+or asteroid lookup used to do it.   Instead each source file is converted to
+a binary table sorted by designation (generated_data/*.npy), which each
+process memory-maps the first time it's asked for.   A lookup is then a
+binary search on the designation column and one row read.
+
+A table is rebuilt when its source file is newer than it.
+
+Rows come back as pandas Series with the same fields (and name) as the
+rows of the skyfield MPC dataframes, so mpc.comet_orbit()/mpcorb_orbit()
+and the existing callers work unchanged.
+"""
+
+COMET_SOURCE = 'generated_data/CometEls.txt'
+ASTEROID_SOURCE = 'data/MPCORB.DAT'
+BRIGHT_ASTEROID_SOURCE = 'generated_data/bright_asteroids.txt'
+
+def load_comets(path):
+    with load.open(path) as f:
+        comets = mpc.load_comets_dataframe(f)
+    # Keep the most recent orbit for each comet
+    return comets.sort_values('reference').groupby('designation', as_index=False).last()
+
+def load_asteroids(path):
+    with load.open(path) as f:
+        return mpc.load_mpcorb_dataframe(f)
+
+STORES = {
+    'comets': (COMET_SOURCE, 'generated_data/comet_orbits.npy', load_comets),
+    'asteroids': (ASTEROID_SOURCE, 'generated_data/mpcorb_orbits.npy', load_asteroids),
+    'bright_asteroids': (BRIGHT_ASTEROID_SOURCE, 'generated_data/bright_asteroid_orbits.npy', load_asteroids),
+}
+
+def dataframe_to_records(df):
+    """
+    Fixed-width structured array from an MPC dataframe (so it can be memory-mapped).
+    Text columns become unicode strings, with missing values as ''.
+    """
+    columns = []
+    for name in df.columns:
+        col = df[name]
+        if col.dtype.kind in 'biuf':
+            values = col.values
+        else:
+            # (built as a list: pandas' own string conversions can hand back an object array)
+            values = np.array(col.astype(object).where(col.notna(), '').astype(str).tolist(), dtype='U')
+        columns.append((name, values))
+    data = np.empty(len(df), dtype=[(name, values.dtype) for name, values in columns])
+    for name, values in columns:
+        data[name] = values
+    return data[np.argsort(data['designation'], kind='stable')]
+
+class OrbitStore:
+    """
+    Designation-sorted table of orbital elements.
+    """
+    def __init__(self, data):
+        self.data = data
+
+    def __len__(self):
+        return len(self.data)
+
+    def row_index(self, designation):
+        """
+        Row offset for a designation, or None.
+        """
+        designations = self.data['designation']
+        i = int(np.searchsorted(designations, designation))
+        if i < len(designations) and designations[i] == designation:
+            return i
+        return None
+
+    def get_row(self, designation):
+        """
+        The orbit for a designation as a pandas Series, or None if it's not there.
+        """
+        i = self.row_index(designation)
+        if i is None:
+            return None
+        record = self.data[i]
+        values = {}
+        for name in self.data.dtype.names:
+            value = record[name].item()
+            values[name] = np.nan if value == '' else value
+        return pd.Series(values, name=designation)
+
+    def get_rows(self, designations):
+        """
+        DataFrame (indexed by designation) of the orbits that exist for a list of designations.
+        """
+        rows = [self.get_row(d) for d in designations]
+        return pd.DataFrame([r for r in rows if r is not None])
+
+def build_orbit_store(source, path, loader):
+    """
+    Parse an MPC file into the binary table.
+    """
+    return save_npy(path, dataframe_to_records(loader(source)))
+
+_lock = threading.Lock()
+_stores = {}
+
+def get_orbit_store(kind):
+    """
+    The process-wide OrbitStore for 'comets', 'asteroids' or 'bright_asteroids',
+    (re)building the table when the source file has changed.
+    """
+    source, path, loader = STORES[kind]
+    with _lock:
+        if file_mtime(source) is not None and is_stale(path, source):
+            build_orbit_store(source, path, loader)
+        mtime = file_mtime(path)
+        cached = _stores.get(kind)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, OrbitStore(np.load(path, mmap_mode='r')))
+            _stores[kind] = cached
+        return cached[1]
+
+def lookup_orbit(kind, designation):
+    """
+    Row for designation from one of the stores, or None.
+    """
+    return get_orbit_store(kind).get_row(designation)
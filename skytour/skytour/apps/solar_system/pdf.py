@@ -13,11 +13,8 @@ from ..pdf.utils import (
     add_image, bold_text, place_text, label_and_text
 )
 from ..session.cookie import deal_with_cookie, get_all_cookies
-from ..solar_system.plot import (
-    create_planet_system_view, 
-    create_finder_chart,
-    get_planet_map
-)
+from ..session.pdf_pages.charts import ChartCall, render_chart
+from ..solar_system.plot import get_planet_map
 from .models import Asteroid, Comet, Planet
 from ..utils.format import float2ang
 
@@ -62,6 +59,35 @@ def get_cookie_value(cookie, object_type, object):
             return cookie['planets'][object.name]
     return None
 
+def pdf_view_calls(utdt, object, object_type, session, cookies):
+    """
+    The charts on create_pdf_view()'s page: finder, and the telescope view (planets)
+    or a closer finder.
+    """
+    def finder(fov):
+        return ChartCall('finder_chart',
+            utdt, 
+            object, 
+            planets_cookie=cookies['cookies']['planets'], 
+            asteroids=cookies['cookies']['asteroids'], 
+            object_type = object_type,
+            obj_cookie = session,
+            fov = fov,
+            reversed=False
+        )
+    calls = dict(finder = finder(10))
+    if object_type == 'planet':
+        calls['view'] = ChartCall('planet_system_view',
+            utdt, 
+            object, 
+            cookies['cookies']['planets'], 
+            flipped = cookies['flip_planets'] == 'Yes',
+            reversed=False
+        )
+    else:
+        calls['closer'] = finder(5)
+    return calls
+
 FS = 10
 def create_pdf_view(p, utdt, object, object_type, session, cookies):
     """
@@ -74,7 +100,6 @@ def create_pdf_view(p, utdt, object, object_type, session, cookies):
     app = session['apparent']
     obs = session['observe']
     phy = session['physical']
-    flip_planets = cookies['flip_planets'] == 'Yes'
 
     # Title
     y = Y0
@@ -122,26 +147,12 @@ def create_pdf_view(p, utdt, object, object_type, session, cookies):
         p, y = label_and_text(p, 175, y, ('Elong: ', FS), (f"{obs['elongation']:.2f}°", FS), cr=10)
 
     # Finder Chart
-    finder, _ = create_finder_chart(
-        utdt, 
-        object, 
-        planets_cookie=cookies['cookies']['planets'], 
-        asteroids=cookies['cookies']['asteroids'], 
-        object_type = object_type,
-        obj_cookie = session,
-        fov = 10,
-        reversed=False
-    )
+    calls = pdf_view_calls(utdt, object, object_type, session, cookies)
+    finder, _ = render_chart(cookies, calls['finder'])
     p, newy = add_image(p, y, finder, x=50, size=250)
     # Moon/Phase Chart
     if object_type == 'planet':
-        telview, _ = create_planet_system_view(
-            utdt, 
-            object, 
-            cookies['cookies']['planets'], 
-            flipped = flip_planets,
-            reversed=False
-        )
+        telview, _ = render_chart(cookies, calls['view'])
         p, newy = add_image(p, y, telview, x=300, size=250)
         y -= 250
         if object.slug not in ['mercury', 'venus']:
@@ -149,16 +160,7 @@ def create_pdf_view(p, utdt, object, object_type, session, cookies):
             p.drawString(380, y, 'ID above + = moon behind planet')
             p.setFont(DEFAULT_FONT, DEFAULT_FONT_SIZE)
     else:
-        closer, _ = create_finder_chart(
-            utdt, 
-            object, 
-            planets_cookie=cookies['cookies']['planets'], 
-            asteroids=cookies['cookies']['asteroids'], 
-            object_type = object_type,
-            obj_cookie = session,
-            fov = 5,
-            reversed=False
-        )
+        closer, _ = render_chart(cookies, calls['closer'])
         p, newy = add_image(p, y, closer, x=300, size=250)
     # Map
     if object_type == 'planet' and object.slug in ['mars', 'jupiter']:
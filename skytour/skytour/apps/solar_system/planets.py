@@ -1,16 +1,15 @@
 import datetime, pytz
-from skyfield.api import load 
 from .vocabs import PLANETS_8
-from ..site_parameter.helpers import get_ephemeris
+from ..astro.ephemeris import get_eph, get_timescale
 
 def get_ecliptic_positions(utdt=None):
     if utdt is None:
         utdt = datetime.datetime.now(datetime.timezone.utc)
     all_planets = PLANETS_8
     # start
-    ts = load.timescale()
+    ts = get_timescale()
     t = ts.utc(utdt.year, utdt.month, utdt.day, utdt.hour, utdt.minute)
-    eph = load(get_ephemeris())
+    eph = get_eph()
     sun = eph['sun']
     points = []
     for planet in all_planets:
@@ -7,15 +7,18 @@ import numpy as np
 import time
 from matplotlib import pyplot as plt
 from matplotlib.backends.backend_agg import FigureCanvasAgg as FigureCanvas
-from skyfield.api import load, Star
+from skyfield.api import Star
 from skyfield.magnitudelib import planetary_magnitude
 from skyfield.projections import build_stereographic_projection
+from ..astro.ephemeris import get_eph, get_timescale
 from ..astro.time import get_t_epoch, get_julian_date
 from ..plotting.map import *
-from ..site_parameter.helpers import get_ephemeris
-from .asteroids import get_asteroid_target, fast_asteroid
-from .comets import get_comet_target, get_comet_magnitude
-from .utils import get_constellation
+from ..plotting.projection import project_radec
+from ..plotting.render_cache import render_cached
+from .asteroids import get_asteroid_target
+from .comets import get_comet_target
+from .kepler import comet_magnitude, hg_magnitude
+from .utils import get_constellations
 from .vocabs import ZODIAC, PLANET_COLORS
 
 
@@ -36,9 +39,20 @@ def r2as(a):
 def as2r(a):
     return a * math.pi / (360.*3600.)
 
+def view_radius(ax):
+    """
+    Angle (degrees) from the center of a stereographic chart to its farthest
+    visible corner (r = tan(angle/2) on the projection).
+    """
+    x0, x1 = ax.get_xlim()
+    y0, y1 = ax.get_ylim()
+    r = max(math.hypot(x, y) for x in (x0, x1) for y in (y0, y1))
+    return math.degrees(2. * math.atan(r))
+
 def sizeme(mag, limit):
     return (0.5 + limit - mag) **2.0
 
+@render_cached('finder_chart', skip=('times',), times_index=1)
 def create_finder_chart(
         utdt,                   # UTDT
         instance,               # Planet instance
@@ -76,9 +90,9 @@ def create_finder_chart(
     ra = pdict['apparent']['equ']['ra']
     dec = pdict['apparent']['equ']['dec']
 
-    ts = load.timescale()
+    ts = get_timescale()
     t = ts.from_datetime(utdt)
-    eph = load(get_ephemeris())
+    eph = get_eph()
     earth = eph['earth']
     target = earth.at(t).observe(Star(ra_hours=ra, dec_degrees=dec))
     projection = build_stereographic_projection(target)
@@ -97,7 +111,10 @@ def create_finder_chart(
     ax = map_equ(ax, earth, t, projection, 'gal', reversed=reversed)
     # Add stars from Hipparcos, constellation lines (from Stellarium),
     #   and Bayer/Flamsteed designations from the BSC
-    ax, stars = map_hipparcos(ax, earth, t, mag_limit, projection, mag_offset=mag_offset, reversed=reversed)
+    if not fov: # set FOV if not supplied
+        fov = 8. if name in ['Uranus', 'Neptune'] else 20.
+    ax, stars = map_hipparcos(ax, earth, t, mag_limit, projection, mag_offset=mag_offset, reversed=reversed,
+        center=(ra, dec), radius=fov) # (the corners are at fov/sqrt(2))
     ax = map_constellation_lines(ax, stars, reversed=reversed)
     ax = map_bright_stars(ax, earth, t, projection, points=False, annotations=True, reversed=reversed)
     times.append((time.perf_counter(), 'Stars/Constellations'))
@@ -139,8 +156,6 @@ def create_finder_chart(
     #legend2 = ax.legend(*scatter.legend_elements(**kw), loc="upper left", title="Mag.")
 
     # Plot scaling
-    if not fov: # set FOV if not supplied
-        fov = 8. if name in ['Uranus', 'Neptune'] else 20.
     angle = np.pi - fov / 360.0 * np.pi
     limit = np.sin(angle) / (1.0 - np.cos(angle))
 
@@ -201,10 +216,10 @@ def create_planet_system_view (
     planet_ra = pdict['apparent']['equ']['ra']
     planet_dec = pdict['apparent']['equ']['dec']
     ang_size_radians = math.radians(pdict['observe']['angular_diameter'])
-    ts = load.timescale()
+    ts = get_timescale()
     t = ts.from_datetime(utdt)
     t0 = get_t_epoch(get_julian_date(utdt))
-    eph = load(get_ephemeris())
+    eph = get_eph()
     earth = eph['earth']
     target = earth.at(t).observe(Star(ra_hours=planet_ra, dec_degrees=planet_dec))
     projection = build_stereographic_projection(target)
@@ -350,6 +365,58 @@ def plot_ecliptic_positions(planets, reversed):
     plt.close(fig)
     return pngImageB64String, planets
 
+def get_track(tt, object_type, object):
+    """
+    Observe an object once over a skyfield Time array.
+    RA, Dec, distance, magnitude and constellation all come back as vectors
+    (magnitude is NaN where it can't be estimated).
+    """
+    ts = get_timescale()
+    eph = get_eph()
+    earth = eph['earth']
+    sun = eph['sun']
+    comet_row = None
+    if object_type == 'planet':
+        target = eph[object.target]
+    elif object_type == 'asteroid':
+        target = get_asteroid_target(object, ts, sun)
+    elif object_type == 'comet':
+        target, comet_row = get_comet_target(object, ts, sun)
+    else:
+        target = None
+    if target is None:
+        return None
+
+    z = earth.at(tt).observe(target).apparent()
+    ra, dec, distance = z.radec()
+    r_earth_target = distance.au
+    r_earth_sun = earth.at(tt).observe(sun).radec()[2].au
+    r_sun_target = sun.at(tt).observe(target).radec()[2].au
+
+    mag = np.full(len(tt), np.nan)
+    if object_type == 'asteroid' and object.mag_h is not None:
+        cos_i = (r_sun_target**2 + r_earth_target**2 - r_earth_sun**2) / (2. * r_sun_target * r_earth_target)
+        phase_angle = np.degrees(np.arccos(np.clip(cos_i, -1., 1.)))
+        mag_g = object.mag_g if object.mag_g is not None else 0.15
+        mag = hg_magnitude(object.mag_h, mag_g, r_earth_target, r_sun_target, phase_angle)
+    elif object_type == 'planet':
+        try:
+            mag = planetary_magnitude(z)
+        except:
+            pass # there are some edge issues...
+    elif object_type == 'comet' and comet_row is not None:
+        mag_offset = object.mag_offset if object is not None else 0.
+        mag = comet_magnitude(comet_row['magnitude_g'], comet_row['magnitude_k'], r_earth_target, r_sun_target, offset=mag_offset)
+
+    return dict(
+        target = target,
+        ra = ra.hours,
+        dec = dec.degrees,
+        distance = r_earth_target,
+        mag = np.atleast_1d(mag),
+        constellation = get_constellations(ra.hours, dec.degrees)
+    )
+
 def plot_track(
         utdt, 
         object_type='planet', 
@@ -368,29 +435,33 @@ def plot_track(
         force_ra = None,
         force_dec = None,
         same_size = False,
+        extra_objects = None,
         debug=False
     ):
     """
     Planet is from the Planet model
     utdt is the MIDPOINT date.
+    extra_objects is a list of (object_type, object) to track on the same chart.
     """
-    ts = load.timescale()
-    eph = load(get_ephemeris())
+    ts = get_timescale()
+    eph = get_eph()
     earth = eph['earth']
-    sun = eph['sun']
-    if object_type == 'planet':
-        target = eph[object.target]
-    elif object_type == 'asteroid':
-        target = get_asteroid_target(object, ts, sun)
-        if times is not None:
-            times.append((time.perf_counter(), 'Get Asteroid Target'))
 
-    elif object_type == 'comet':
-        target, comet_row = get_comet_target(object, ts, sun)
-        if times is not None:
-            times.append((time.perf_counter(), 'Get Comet Target'))
+    # One Time array for the whole track
+    dates = [utdt + datetime.timedelta(days=dt) for dt in range(offset_before, offset_after, step_days)]
+    tt = ts.from_datetimes(dates)
+    tracks = []
+    for this_type, this_object in [(object_type, object)] + list(extra_objects or []):
+        track = get_track(tt, this_type, this_object)
+        if track is not None:
+            track['name'] = this_object.name
+            tracks.append(track)
+    if times is not None:
+        times.append((time.perf_counter(), f'Get {len(tracks)} Track(s)'))
 
     t = ts.from_datetime(utdt)
+    target = tracks[0]['target']
+    starting_position = earth.at(tt[0]).observe(target).apparent()
     first_projection = None
     if force_ra is not None and force_dec is not None:
         try:
@@ -404,80 +475,61 @@ def plot_track(
 
     fig, ax = plt.subplots(figsize=[8,8])
     projection = build_stereographic_projection(first_projection)
-    # Build the observation points
+
+    labels = [
+        "{}/{:2d}".format(d.month, d.day) if i%step_label == 0 else '' for i, d in enumerate(dates)
+    ]
+    if debug:
+        print (labels)
+
+    line_colors = ['red', 'cyan', 'lime', 'magenta', 'yellow'] if reversed else ['orange', 'teal', 'green', 'purple', 'olive']
+    plus_color = 'orange' if reversed else '#900'
+    label_color = 'goldenrod' if reversed else 'maroon'
+    all_x, all_y = [], []
+    for n, track in enumerate(tracks):
+        xx, yy = project_radec(earth, t, projection, track['ra'], track['dec'])
+        all_x.append(xx)
+        all_y.append(yy)
+        line_color = line_colors[n % len(line_colors)]
+        w = ax.plot(xx, yy, color=line_color, marker=None)
+        w = ax.scatter(xx, yy, s=90., c=plus_color if n == 0 else line_color, marker='+', alpha=0.7)
+        for x, y, l in zip(xx, yy, labels):
+            ax.annotate(
+                l, xy=(x, y), 
+                textcoords='offset points',
+                xytext=(3, 10),
+                horizontalalignment='left',
+                color=label_color
+            )
+        if len(tracks) > 1:
+            ax.annotate(
+                track['name'], xy=(xx[0], yy[0]),
+                textcoords='offset points',
+                xytext=(3, -14),
+                horizontalalignment='left',
+                color=line_color
+            )
+    all_x = np.concatenate(all_x)
+    all_y = np.concatenate(all_y)
+    min_x, max_x = min(all_x.min(), 0), max(all_x.max(), 0)
+    min_y, max_y = min(all_y.min(), 0), max(all_y.max(), 0)
+
     data = []
-    d_planet = dict(x = [], y = [], label = [])
-    i = 0
-    min_x = 0
-    max_x = 0
-    min_y = 0
-    max_y = 0
-    first = True
-    for dt in range(offset_before, offset_after, step_days):
-        this_utdt = utdt + datetime.timedelta(days=dt)
-        tt = ts.from_datetime(this_utdt)
-        z = earth.at(tt).observe(target).apparent()
-        ra, dec, distance = z.radec()
-        
-        earth_sun = earth.at(tt).observe(sun)
-        r_earth_sun = earth_sun.radec()[2].au.item()
-
-        sun_target = sun.at(tt).observe(target)
-        r_sun_target = sun_target.radec()[2].au.item()
-
-        mag = None
-        if object_type == 'asteroid':
-            mag = fast_asteroid(object, target, tt, earth, sun, r_earth_sun)
-        elif object_type == 'planet':
-            mag = planetary_magnitude(z).item()
-        elif object_type == 'comet' and comet_row is not None:
-            mag_g = comet_row['magnitude_g']
-            mag_k = comet_row['magnitude_k']
-            mag_offset = object.mag_offset if object is not None else 0.
-            mag = get_comet_magnitude(mag_g, mag_k, distance.au.item(), r_sun_target, offset=mag_offset)
-
-        if return_data:
+    if return_data:
+        track = tracks[0]
+        for i, this_utdt in enumerate(dates):
+            mag = track['mag'][i]
             data.append(dict(
                 utdt = this_utdt,
-                ra = ra.hours.item(),
-                dec = dec.degrees.item(),
-                distance = distance.au.item(),
-                constellation = get_constellation(ra.hours.item(), dec.degrees.item()),
-                mag = mag
+                ra = track['ra'][i].item(),
+                dec = track['dec'][i].item(),
+                distance = track['distance'][i].item(),
+                constellation = track['constellation'][i],
+                mag = None if np.isnan(mag) else mag.item()
             ))
+    if times is not None:
+        times.append((time.perf_counter(), 'Plot Track(s)'))
 
-        if first:
-            starting_position = z
-            first = False
-
-        xx, yy = projection(earth.at(tt).observe(Star(ra_hours=ra.hours, dec_degrees=dec.degrees)))
-        min_x = xx if xx < min_x else min_x
-        max_x = xx if xx > max_x else max_x
-        min_y = yy if yy < min_y else min_y
-        max_y = yy if yy > max_y else max_y
-
-        d_planet['x'].append(xx)
-        d_planet['y'].append(yy)
-        lll = "{}/{:2d}".format(this_utdt.month, this_utdt.day) if i%step_label == 0 else ''
-        d_planet['label'].append(lll)
-        i += 1
-    if debug:
-        print (d_planet['label'])
-    line_color = 'red' if reversed else 'orange'
-    w = ax.plot(d_planet['x'], d_planet['y'], color=line_color, marker=None)
-    plus_color = 'orange' if reversed else '#900'
-    w = ax.scatter(d_planet['x'], d_planet['y'], s=90., c=plus_color, marker='+', alpha=0.7)
-
-    label_color = 'goldenrod' if reversed else 'maroon'
-    for x, y, l in zip(d_planet['x'], d_planet['y'], d_planet['label']):
-        ax.annotate(
-            l, xy=(x, y), 
-            textcoords='offset points',
-            xytext=(3, 10),
-            horizontalalignment='left',
-            color=label_color
-        )
-    
     ax = map_equ(ax, earth, t, projection, 'equ', reversed=reversed)
     ax = map_equ(ax, earth, t, projection, 'ecl', reversed=reversed)
     ax = map_equ(ax, earth, t, projection, 'gal', reversed=reversed)
@@ -521,7 +573,9 @@ def plot_track(
         else:
             mag_limit = 9.0
 
-    ax, stars = map_hipparcos(ax, earth, t, mag_limit, projection, reversed=reversed)
+    center_ra, center_dec, _ = first_projection.radec()
+    ax, stars = map_hipparcos(ax, earth, t, mag_limit, projection, reversed=reversed,
+        center=(center_ra.hours, center_dec.degrees), radius=view_radius(ax))
     ax = map_constellation_lines(ax, stars, reversed=reversed)
     ax = map_bright_stars(ax, earth, t, projection, points=False, annotations=True, mag_limit=mag_limit, reversed=reversed)
     
@@ -537,7 +591,7 @@ def plot_track(
     secax.set_xlabel('Degrees')
     secay = ax.secondary_yaxis('left', functions=(r2d, d2r))
 
-    title = "Track for {}".format(object.name)
+    title = "Track for {}".format(", ".join(track['name'] for track in tracks))
     ax.set_title(title)
 
     # Convert to a PNG image
@@ -1,19 +1,18 @@
 import math
 from skyfield.almanac import moon_phase
-from skyfield.api import load
 from skyfield.magnitudelib import planetary_magnitude
 from ..astro.almanac import get_object_rise_set
 from ..astro.angdist import get_small_ang_sep
 from ..astro.astro import solar_system_apparent_magnitude, galilean_magnitude
+from ..astro.ephemeris import get_eph, get_moon_system, get_timescale
 from ..astro.local import get_observing_situation
-from ..site_parameter.helpers import get_ephemeris
 from .asteroids import get_asteroid_target
 from .comets import get_comet_target, get_comet_magnitude
 from .jupiter import get_jupiter_physical_ephem
 from .mars import get_mars_physical_ephem
 from .moon import simple_lunar_phase, equ_lunar_phase_angle
 from .saturn import get_iapetus_magnitude
-from .serializer import serialize_astrometric
+from .serializer import serialize_astrometric, serialize_position
 from .utils import (
     get_angular_size,
     get_angular_size_string,
@@ -33,11 +32,11 @@ def get_object_metadata(
         location=None,      # ObservingLocation instance
         debug=True
     ):
-    ts = load.timescale()
+    ts = get_timescale()
     t = ts.utc(utdt)
     jd = t.tt.item()
 
-    eph = load(get_ephemeris())
+    eph = get_eph()
     earth = eph['Earth']
     sun = eph['Sun']
     if object_type == 'comet':
@@ -177,7 +176,7 @@ def get_object_metadata(
     if object_type == 'planet' and instance is not None:
         if instance.moon_list:
             moon_obs = []
-            moonsys = load(instance.bsp_file)
+            moonsys = get_moon_system(instance)
             earth_s = moonsys['earth']
             sun_s = moonsys['sun']
             for moon in instance.moon_list:
@@ -240,3 +239,49 @@ def get_object_metadata(
             physical = physical
         )
     return return_dict
+
+def get_batch_object_metadata(geometry, i, apparent_magnitude, diameter=None, almanac=None, constellation=None):
+    """
+    The get_object_metadata() dict for body i of a batch propagation
+    (see kepler.batch_geometry()) - for asteroids and comets.
+    constellation: if it's already been looked up for the batch (see utils.get_constellations()).
+    """
+    def value(x):
+        x = float(x)
+        return None if math.isnan(x) else x
+
+    apparent = serialize_position(
+        value(geometry['ra'][i]),
+        value(geometry['dec'][i]),
+        value(geometry['latitude'][i]),
+        value(geometry['longitude'][i]),
+        value(geometry['r_earth'][i])
+    )
+    apparent['sun_distance'] = value(geometry['r_sun'][i])
+
+    phase_angle = value(geometry['phase_angle'][i])
+    if phase_angle is not None:
+        fraction_illuminated = 100. * 0.5 * (1. + math.cos(math.radians(phase_angle)))
+    else:
+        fraction_illuminated = None
+    angular_diameter = get_angular_size(diameter, apparent['distance']['km']) / 3600. if diameter else None
+
+    if constellation is None:
+        constellation = get_constellation(apparent['equ']['ra'], apparent['equ']['dec'])
+    observe = dict (
+        constellation = constellation,
+        phase_angle = phase_angle,
+        plotting_phase_angle = None,
+        fraction_illuminated = fraction_illuminated,
+        elongation = get_elongation(apparent['ecl']['longitude'], geometry['sun_longitude']),
+        angular_diameter = angular_diameter,
+        angular_diameter_str = get_angular_size_string(angular_diameter),
+        apparent_magnitude = value(apparent_magnitude) if apparent_magnitude is not None else None
+    )
+    return dict(
+        apparent = apparent,
+        almanac = almanac,
+        observe = observe,
+        moons = None,
+        physical = None
+    )
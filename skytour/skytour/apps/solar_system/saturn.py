@@ -1,7 +1,7 @@
 import math
 import numpy as np
 from datetime import datetime, timezone, timedelta
-from skyfield.api import load #, wgs84
+from ..astro.ephemeris import get_eph, get_timescale
 
 def saturn_ring(t, pdict):
     """
@@ -43,7 +43,6 @@ def saturn_ring(t, pdict):
 
 
 import numpy as np
-from skyfield.api import load
 from skyfield.magnitudelib import planetary_magnitude
 
 # Setup: Load ephemeris once (de421.bsp contains Saturn/Iapetus)
@@ -54,10 +53,10 @@ def get_iapetus_magnitude(utc_datetime=None, debug=False):
     Calculates Iapetus's apparent magnitude for a given datetime object.
     Accounts for: distance to Sun/Earth, phase angle, and orbital position (albedo).
     """
-    eph = load('generated_data/sat_excerpt.bsp')
+    eph = get_eph('generated_data/sat_excerpt.bsp')
     sun, earth, saturn = eph['sun'], eph['earth'], eph['saturn barycenter']
     iapetus = eph['iapetus']
-    ts = load.timescale()
+    ts = get_timescale()
     # 1. Convert datetime to Skyfield time
     # Handles microseconds/seconds as float automatically
     if utc_datetime is None:
@@ -1,19 +1,29 @@
+from skyfield.constants import AU_KM, C
 from ..utils.format import to_sex
 
 def serialize_astrometric(target):
     # Equatorial Coordinates
     xra, xdec, xdist = target.radec()
-    ra = xra.hours.item()
-    dec = xdec.degrees.item()
-    light_time = xdist.light_seconds().item() / 3600. # hours
     # Ecliptic Coordinates
     xlat, xlong, _ = target.ecliptic_latlon()
-    lat = xlat.degrees.item()
-    lon = xlong.degrees.item()
+    return serialize_position(
+        xra.hours.item(),
+        xdec.degrees.item(),
+        xlat.degrees.item(),
+        xlong.degrees.item(),
+        xdist.au.item()
+    )
 
+def serialize_position(ra, dec, lat, lon, au):
+    """
+    Same dict as serialize_astrometric(), from plain numbers
+    (RA in hours, Dec/latitude/longitude in degrees, distance in AU).
+    """
+    km = au * AU_KM
+    light_time = km / (C / 1000.) / 3600. # hours
     return dict(
         equ = dict (
-            ra = ra, 
+            ra = ra,
             ra_str = to_sex(ra, format='hours'),
             dec = dec,
             dec_str = to_sex(dec, format='degrees')
@@ -22,13 +32,13 @@ def serialize_astrometric(target):
             latitude = lat,
             lat_str = to_sex(lat, format='degrees'),
             longitude = lon,
-            lon_str = to_sex(lon, format='degrees') 
+            lon_str = to_sex(lon, format='degrees')
         ),
         distance = dict (
-            au = xdist.au.item(), 
-            km = xdist.km.item(),
-            mi = xdist.km.item() / 1.609,
+            au = au,
+            km = km,
+            mi = km / 1.609,
             light_time = light_time,
             light_time_str = to_sex(light_time, format='hours')
         )
-    )
\ No newline at end of file
+    )
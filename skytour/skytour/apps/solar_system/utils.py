@@ -1,4 +1,5 @@
-import math
+import math, threading
+import numpy as np
 from skyfield.api import (
     position_of_radec, 
     load_constellation_map,
@@ -93,6 +94,31 @@ def get_elongation(l_target, l_sun):
         elongation -= 360.
     return elongation
 
+_constellation_map = {}
+_constellation_lock = threading.Lock()
+
+def get_constellation_map():
+    """
+    Skyfield's constellation boundary lookup and the abbreviation -> name dict,
+    loaded once per process.
+    """
+    with _constellation_lock:
+        if not _constellation_map:
+            _constellation_map['at'] = load_constellation_map()
+            _constellation_map['names'] = dict(load_constellation_names())
+        return _constellation_map['at'], _constellation_map['names']
+
+def get_constellation_abbrs(ra, dec):
+    """
+    The constellation abbreviations for arrays of RA (hours) and Dec (degrees),
+    all looked up in one call.
+    """
+    constellation_at, _ = get_constellation_map()
+    ra, dec = np.atleast_1d(ra).astype(float), np.atleast_1d(dec).astype(float)
+    if len(ra) == 0:
+        return np.array([], dtype=str)
+    return np.atleast_1d(constellation_at(position_of_radec(ra, dec)))
+
 def get_constellation(ra, dec):
     """
     Return the constellation at a given ra, dec.
@@ -100,14 +126,21 @@ def get_constellation(ra, dec):
     from the 1875 epoch (where the constellation boundaries were 
     established) to the present-era RA/DEC.
     """
-    constellation_at = load_constellation_map()
-    d = dict(load_constellation_names())
+    constellation_at, d = get_constellation_map()
     abbr = constellation_at(position_of_radec(ra, dec))
     # Stupid hack - error in Skyfield - apparently this is fixed in V1.49
     #abbr = 'Cvn' if abbr == 'CVn' else abbr
     #abbr = 'Tra' if abbr == 'TrA' else abbr
     return dict(name = d[abbr], abbr = abbr)
 
+def get_constellations(ra, dec):
+    """
+    get_constellation() for arrays of RA (hours) and Dec (degrees).
+    Returns a list of dicts.
+    """
+    _, d = get_constellation_map()
+    return [dict(name = d[abbr], abbr = str(abbr)) for abbr in get_constellation_abbrs(ra, dec)]
+
 def get_meeus_phase_angle(sun_earth, earth_obj, sun_obj):
     c1 = sun_obj**2 + earth_obj**2 - sun_earth**2
     c2 = 2. * sun_obj * earth_obj
@@ -1,4 +1,5 @@
 import datetime, pytz, time
+from dateutil.parser import isoparse
 from operator import itemgetter
 from django.contrib import messages
 from django.http import HttpResponseRedirect
@@ -19,6 +20,7 @@ from ..astro.almanac import get_dark_time
 from ..astro.time import get_datetime_from_strings
 from ..session.cookie import deal_with_cookie
 from ..session.mixins import CookieMixin
+from ..session.snapshot import get_session_snapshot
 from ..tech.models import Telescope
 from ..utils.timer import compile_times
 from .asteroids import lookup_asteroid_object
@@ -78,9 +80,13 @@ class PlanetListView(CookieMixin, ListView):
         context['moon_rise'], context['moon_set'], context['moon_transit'] = get_rise_set(moon['almanac'])
         context['sun_rise'], context['sun_set'], context['sun_transit'] = get_rise_set(sun['almanac'], format="%I:%M %p")
         
-        twilight = context['cookies']['user_pref']['twilight']
         my_time_zone = pytz.timezone(context['location'].time_zone.pytz_name)
-        twilight = get_dark_time(context['utdt_start'], context['location'], as_datetime=True)
+        # Reuse what the session cookie form computed if it's for this time/place
+        snapshot = get_session_snapshot(self.request, context['utdt_start'], context['location'])
+        if snapshot is not None and None not in snapshot['twilight'].values():
+            twilight = (isoparse(snapshot['twilight']['end']), isoparse(snapshot['twilight']['begin']))
+        else:
+            twilight = get_dark_time(context['utdt_start'], context['location'], as_datetime=True)
         context['twilight'] = dict(
             end = twilight[0].astimezone(my_time_zone).strftime("%I:%M %p"), 
             start = twilight[1].astimezone(my_time_zone).strftime("%I:%M %p")
@@ -327,8 +333,7 @@ class CometDetailView(CookieMixin, DetailView):
 class TrackerView(FormView):
     """
     Combine planet, asteroid, and comet tracking into a single view.
-
-    TODO: allow multiple objects on the same plot
+    Other objects can be tracked on the same plot.
     """
     form_class = TrackerForm
     template_name = 'tracker.html'
@@ -372,6 +377,18 @@ class TrackerView(FormView):
             context['issue'] = f'{object_type} Object {slug} not found.'
             return context
 
+        extra_objects = []
+        for choice in d['other_objects']:
+            other_type, other_slug = choice.split('--')
+            if other_type not in model_dict.keys() or choice == d['object']:
+                continue
+            if other_type != 'comet':
+                other = model_dict[other_type].objects.filter(slug=other_slug).first()
+            else:
+                other = Comet.objects.filter(pk=other_slug).first()
+            if other is not None:
+                extra_objects.append((other_type, other))
+
         offset_before = 0
         offset_after = abs((d['end_date'] - d['start_date']).days)
         step_days = d['date_step'] or 1
@@ -401,7 +418,8 @@ class TrackerView(FormView):
             times=times,
             force_ra = force_ra,
             force_dec = force_dec,
-            same_size = True
+            same_size = True,
+            extra_objects = extra_objects
         )
         context['form'] = form
         context['track_positions'] = track_positions
@@ -6,11 +6,11 @@ from django.core.management.base import BaseCommand
 from matplotlib import pyplot as plt
 from matplotlib.backends.backend_agg import FigureCanvasAgg as FigureCanvas
 from matplotlib import patches
-from skyfield.api import load, Star
+from skyfield.api import Star
 from skyfield.projections import build_stereographic_projection
 from skytour.apps.plotting.map import *
 
-from skytour.apps.site_parameter.helpers import get_ephemeris
+from skytour.apps.astro.ephemeris import get_eph, get_timescale
 from skytour.apps.utils.format import to_sex
 
 class Command(BaseCommand):
@@ -59,9 +59,9 @@ class Command(BaseCommand):
             print(f"Scale: {scale}")
             print(f"Output File: {output_file}")
 
-        ts = load.timescale()
+        ts = get_timescale()
         t = ts.from_datetime(datetime.datetime.now(pytz.timezone('UTC'))) 
-        eph = load(get_ephemeris()) 
+        eph = get_eph() 
         earth = eph['earth']
 
         # Center the chart on the DSO
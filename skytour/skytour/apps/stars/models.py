@@ -1,6 +1,6 @@
 import math, re
 from django.db import models
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.utils.translation import gettext as _
 from jsonfield import JSONField
@@ -9,6 +9,9 @@ from taggit.managers import TaggableManager
 
 from ..abstract.models import Coordinates, WikipediaPage, WikipediaPageObject, AnnalsDeepSkyAbstract
 from ..astro.coords import equ2ecl
+from ..astro.sky_index import invalidate_sky_index
+from ..astro.sky_table import remove_sky_position, store_sky_position
+from ..plotting.render_cache import bump_background_cache, bump_render_cache
 from ..astro.stars import get_galactic_uvw
 from ..dso.observing import get_max_altitude
 from ..dso.utils import create_shown_name
@@ -1162,3 +1165,26 @@ def create_or_update_stellar_object_metadata(sender, instance, created, **kwargs
     # else:
     #     instance.relatedprofile.save() 
 
+@receiver([post_save, post_delete], sender=BrightStar)
+@receiver([post_save, post_delete], sender=VariableStar)
+def invalidate_star_sky_index(sender, instance, **kwargs):
+    # Positions changed (or a star came/went): rebuild the cone-search index on next use
+    invalidate_sky_index(sender)
+
+@receiver(post_save, sender=BrightStar)
+@receiver(post_save, sender=VariableStar)
+def store_star_sky_position(sender, instance, **kwargs):
+    # Keep the spatial table used by coordinate filters in step
+    store_sky_position(sender, instance)
+
+@receiver(post_delete, sender=BrightStar)
+@receiver(post_delete, sender=VariableStar)
+def remove_star_sky_position(sender, instance, **kwargs):
+    remove_sky_position(sender, instance.pk)
+
+@receiver([post_save, post_delete], sender=BrightStar)
+@receiver([post_save, post_delete], sender=VariableStar)
+def bump_star_render_cache(sender, instance, **kwargs):
+    # Stars are on every map: don't reuse cached images (or backgrounds)
+    bump_render_cache()
+    bump_background_cache()
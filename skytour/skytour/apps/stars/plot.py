@@ -6,15 +6,18 @@ import time
 
 from matplotlib import pyplot as plt
 from matplotlib.backends.backend_agg import FigureCanvasAgg as FigureCanvas
-from skyfield.api import load, Star
+from skyfield.api import Star
 from skyfield.projections import build_stereographic_projection
 
+from ..astro.ephemeris import get_eph, get_timescale
 from ..astro.time import get_t_epoch, get_julian_date, get_last
 from ..plotting.map import *
-from ..site_parameter.helpers import find_site_parameter, get_ephemeris
+from ..plotting.render_cache import render_cached
+from ..site_parameter.helpers import find_site_parameter
 from ..solar_system.plot import r2d, d2r
 from ..utils.format import to_hm, to_dm
 
+@render_cached('skymap', times_index=3)
 def get_skymap(
         utdt_start, 
         location, 
@@ -51,9 +54,9 @@ def get_skymap(
     star_mag_limit = 4.8 if simple else star_mag_limit
     
     # Set up SkyField
-    ts = load.timescale()
+    ts = get_timescale()
     t = ts.from_datetime(utdt)
-    eph = load(get_ephemeris())
+    eph = get_eph()
     earth = eph['earth']
     t0 = get_t_epoch(get_julian_date(utdt))
     last = get_last(utdt, location.longitude)
@@ -215,6 +218,7 @@ def get_skymap(
 
     return pngImageB64String, interesting, last, times
 
+@render_cached('zenith_map')
 def get_zenith_map(
         utdt, 
         location, 
@@ -226,9 +230,9 @@ def get_zenith_map(
         center_dec = None
     ):
     # Center is LAST, latitude
-    ts = load.timescale()
+    ts = get_timescale()
     t = ts.from_datetime(utdt)
-    eph = load(get_ephemeris())
+    eph = get_eph()
     earth = eph['earth']
     t0 = get_t_epoch(get_julian_date(utdt))
     last = get_last(utdt, location.longitude)
@@ -258,7 +262,9 @@ def get_zenith_map(
         mag_limit, 
         projection, 
         mag_offset=mag_offset, 
-        reversed=reversed
+        reversed=reversed,
+        center=(center_ra, center_dec),
+        radius=zenith_dist
     )
     ax = map_constellation_lines(ax, stars, reversed=reversed)
     ax = map_bright_stars(
@@ -0,0 +1,156 @@
+import math
+import os
+import threading
+import numpy as np
+from skyfield.api import Star, load
+from skyfield.data import hipparcos, stellarium
+from ..utils.files import file_mtime, is_stale, save_npy
+
+"""
+Hipparcos, parsed once.
+
+hipparcos.load_dataframe() on the full hip_main.dat is slow, and every chart
+used to do it.   Instead the columns we need are written once to a small binary
+file (sorted by magnitude) that each process memory-maps.   A chart then takes
+the magnitude prefix it needs (and optionally a cone around its center) before
+anything is observed.
+
+The constellation lines are kept alongside as pairs of row offsets into that
+file, so drawing them is just an index into the projected x/y.
+"""
+
+CATALOG_CACHE = 'generated_data/hipparcos.npy'
+EDGES_CACHE = 'generated_data/constellation_edges.npy'
+CONSTELLATION_FILE = 'constellationship.fab' # local copy of Stellarium's western_SnT file
+
+# Star.from_dataframe() turns Hipparcos' epoch_year (1991.25) into a TT JD this way.
+HIPPARCOS_EPOCH = 1721045.0 + 1991.25 * 365.25
+
+CATALOG_DTYPE = np.dtype([
+    ('hip', 'i4'),
+    ('ra_hours', 'f4'),
+    ('dec_degrees', 'f4'),
+    ('magnitude', 'f4'),
+    ('ra_mas_per_year', 'f4'),
+    ('dec_mas_per_year', 'f4'),
+    ('parallax_mas', 'f4'),
+])
+
+class StarCatalog:
+    """
+    Columnar, magnitude-sorted view of the Hipparcos catalog.
+    Row offsets index into self.data.
+    """
+    def __init__(self, data):
+        self.data = data
+        self._hip_order = None
+
+    def __len__(self):
+        return len(self.data)
+
+    def brighter_than(self, mag_limit):
+        """
+        Number of rows at or brighter than mag_limit, i.e., the prefix to use.
+        (Stars without a magnitude sort to the end.)
+        """
+        return int(np.searchsorted(self.data['magnitude'], mag_limit, side='right'))
+
+    def select(self, mag_limit, center=None, radius=None):
+        """
+        Rows brighter than mag_limit, optionally limited to a cone of
+        radius (degrees) around center = (ra hours, dec degrees).
+        """
+        n = self.brighter_than(mag_limit)
+        rows = np.arange(n)
+        if center is None or radius is None or radius >= 180.:
+            return rows
+        ra0 = math.radians(center[0] * 15.)
+        dec0 = math.radians(center[1])
+        ra = np.radians(self.data['ra_hours'][:n].astype(float) * 15.)
+        dec = np.radians(self.data['dec_degrees'][:n].astype(float))
+        cos_sep = math.sin(dec0) * np.sin(dec) + math.cos(dec0) * np.cos(dec) * np.cos(ra - ra0)
+        return rows[cos_sep >= math.cos(math.radians(radius))]
+
+    def rows_for_hip(self, hip):
+        """
+        Row offsets for an array of HIP numbers.
+        """
+        if self._hip_order is None:
+            self._hip_order = np.argsort(self.data['hip'])
+        sorted_hip = self.data['hip'][self._hip_order]
+        return self._hip_order[np.searchsorted(sorted_hip, hip)]
+
+    def skyfield_stars(self, rows):
+        """
+        One array-valued Star for the given rows (same as Star.from_dataframe()).
+        """
+        d = self.data[rows]
+        return Star(
+            ra_hours = d['ra_hours'].astype(float),
+            dec_degrees = d['dec_degrees'].astype(float),
+            ra_mas_per_year = d['ra_mas_per_year'].astype(float),
+            dec_mas_per_year = d['dec_mas_per_year'].astype(float),
+            parallax_mas = d['parallax_mas'].astype(float),
+            epoch = HIPPARCOS_EPOCH
+        )
+
+def build_catalog_cache(path=CATALOG_CACHE):
+    """
+    Parse hip_main.dat (downloading it if needed) into the binary cache.
+    """
+    with load.open(hipparcos.URL) as f:
+        df = hipparcos.load_dataframe(f)
+    data = np.zeros(len(df), dtype=CATALOG_DTYPE)
+    data['hip'] = df.index.values
+    for col in CATALOG_DTYPE.names[1:]:
+        data[col] = df[col].values
+    data = data[np.argsort(data['magnitude'], kind='stable')]
+    return save_npy(path, data)
+
+def build_edges_cache(catalog, path=EDGES_CACHE):
+    """
+    Parse constellationship.fab into an (N, 2) int32 array of catalog row
+    offsets, one row per line segment.
+    """
+    with open(CONSTELLATION_FILE, 'rb') as f:
+        constellations = stellarium.parse_constellations(f)
+    hip = np.array([edge for name, edges in constellations for edge in edges], dtype='i4')
+    return save_npy(path, catalog.rows_for_hip(hip).astype('i4'))
+
+def catalog_is_stale(path=CATALOG_CACHE):
+    return is_stale(path, load.path_to(os.path.basename(hipparcos.URL)))
+
+_lock = threading.Lock()
+_catalog = {}
+
+def get_star_catalog(path=CATALOG_CACHE):
+    """
+    The process-wide StarCatalog, (re)building the cache file when needed.
+    """
+    with _lock:
+        if catalog_is_stale(path):
+            build_catalog_cache(path)
+        mtime = file_mtime(path)
+        cached = _catalog.get(path)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, StarCatalog(np.load(path, mmap_mode='r')))
+            _catalog[path] = cached
+        return cached[1]
+
+_edges = {}
+
+def get_constellation_edges(path=EDGES_CACHE):
+    """
+    The constellation line segments as catalog row offsets, shape (N, 2).
+    Rebuilt when constellationship.fab or the star catalog changes.
+    """
+    catalog = get_star_catalog()
+    with _lock:
+        if is_stale(path, CONSTELLATION_FILE, CATALOG_CACHE):
+            build_edges_cache(catalog, path)
+        mtime = file_mtime(path)
+        cached = _edges.get(path)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, np.load(path))
+            _edges[path] = cached
+        return cached[1]
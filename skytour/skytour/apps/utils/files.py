@@ -0,0 +1,47 @@
+import os
+import numpy as np
+from contextlib import contextmanager
+
+def file_mtime(path):
+    """
+    Modification time of a file, or None if it isn't there.
+    """
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+def is_stale(cache_path, *source_paths):
+    """
+    True if the cache file is missing or older than any of the sources that exist.
+    """
+    cache_time = file_mtime(cache_path)
+    if cache_time is None:
+        return True
+    source_times = [file_mtime(p) for p in source_paths]
+    return any(t is not None and t > cache_time for t in source_times)
+
+def save_npy(path, data):
+    """
+    np.save() to a temp file and then move it, so a reader never sees half a file.
+    """
+    tmp = f"{path}.tmp"
+    with open(tmp, 'wb') as f:
+        np.save(f, data)
+    os.replace(tmp, path)
+    return path
+
+@contextmanager
+def atomic_file(path):
+    """
+    Yield a temp path next to path (same extension, so savefig() etc. still work),
+    and move it into place only if the block finishes.
+    """
+    root, ext = os.path.splitext(path)
+    tmp = f"{root}.tmp{os.getpid()}{ext}" # pid: parallel workers don't collide
+    try:
+        yield tmp
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
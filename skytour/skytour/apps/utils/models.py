@@ -1,8 +1,12 @@
 from django.db import models
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
 from django.utils.translation import gettext as _
 from colorfield.fields import ColorField
 from ..abstract.models import WikipediaPage, WikipediaPageObject
 from ..abstract.vocabs import YES_NO, NO
+from ..plotting.geometry import invalidate_geometry
+from ..plotting.render_cache import bump_background_cache, bump_render_cache
 from ..plotting.vocabs import MAP_SYMBOL_TYPES
 from .vocabs import CATALOG_PRECEDENCE, CATALOG_LOOKUP_CHOICES
 
@@ -367,3 +371,15 @@ class ConstellationBoundaries(models.Model):
     end_vertex = models.PositiveIntegerField('End Vertex')
     ra = models.FloatField(_('Start R.A.'))
     dec = models.FloatField(_('Start Dec.'))
+
+@receiver([post_save, post_delete], sender=ConstellationVertex)
+@receiver([post_save, post_delete], sender=ConstellationBoundaries)
+@receiver(m2m_changed, sender=ConstellationVertex.constellation.through)
+def invalidate_boundary_geometry(sender, instance, **kwargs):
+    """
+    Re-read the constellation boundaries on next use, and don't reuse
+    images (or backgrounds) they were drawn on.
+    """
+    invalidate_geometry('boundaries')
+    bump_render_cache()
+    bump_background_cache()
@@ -157,3 +157,9 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 TIME_FORMAT = 'H:i'
 
 SESSION_COOKIE_AGE = 86400 * 7
+
+# Disk cache for rendered maps/finder charts (see apps/plotting/render_cache.py)
+RENDER_CACHE_ENABLED = True
+RENDER_CACHE_DIR = os.path.join(BASE_DIR, 'generated_data', 'render_cache')
+RENDER_CACHE_TIME_BUCKET = 5    # minutes: times within the same bucket share an image
+RENDER_CACHE_SIZE_MB = 250
@@ -0,0 +1,72 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from skytour.apps.dso.models import DSO
+from skytour.apps.dso.utils_avail import find_dsos_at_location_and_time
+from skytour.apps.dso.utils_checklist import filter_dsos
+
+"""
+Query-count regression check for DSO.objects.with_observing_summary().
+
+The DSO list table, the availability pass and the finder charts read a
+handful of properties off every DSO.   With the summary prefetch the number
+of queries must not depend on how many DSOs there are.
+
+Run from the shell:
+    from skytour.test.test_dso_query_count import run_tests
+    run_tests()
+"""
+
+LIST_PARAMS = dict(
+    constellation = None, use_mode = None, priority = 0, redo_flag = 'any',
+    dso_type = 'all', subset = 'all', imaged = 'all', 
+    ra_low = None, ra_high = None, dec_low = None, dec_high = None
+)
+
+def touch(dsos):
+    """
+    Read what dso_table.html, home_objects.html and the charts read from each DSO.
+    """
+    for dso in dsos:
+        dso.mode_dict
+        dso.mode_priority_dict
+        dso.mode_set
+        dso.mode_imaging_priority_span
+        dso.library_image
+        dso.library_image_camera
+        dso.label_on_chart
+        dso.name_on_list
+        dso.dsoinfield_set.count()
+        dso.is_on_active_observing_list
+        dso.number_of_observations
+        dso.last_observed
+        dso.alias_list
+        dso.object_type.short_name
+        dso.constellation.abbreviation
+
+def count_queries(func, *args, **kwargs):
+    with CaptureQueriesContext(connection) as context:
+        func(*args, **kwargs)
+    return len(context.captured_queries)
+
+def list_page(n, summary=True):
+    dsos = DSO.objects.with_observing_summary() if summary else DSO.objects.all()
+    touch(filter_dsos(LIST_PARAMS, dsos)[:n])
+
+def availability(n, summary=True):
+    dsos = DSO.objects.filter(pk__in=DSO.objects.order_by('pk').values_list('pk', flat=True)[:n])
+    up_dict, _ = find_dsos_at_location_and_time(dsos=dsos, imaged='All', min_alt=None, mask=False)
+    result = up_dict['dsos'] if summary else DSO.objects.filter(pk__in=[x.pk for x in up_dict['dsos']])
+    touch(result)
+
+def run_tests(small=10, large=100):
+    ok = True
+    for label, func in [('DSO list', list_page), ('Availability', availability)]:
+        before = [count_queries(func, n, summary=False) for n in (small, large)]
+        after = [count_queries(func, n) for n in (small, large)]
+        print(f"{label}:\n\tWithout summary: {before[0]} / {before[1]} queries for {small} / {large} DSOs")
+        print(f"\tWith summary:    {after[0]} / {after[1]} queries for {small} / {large} DSOs")
+        if after[0] != after[1]:
+            print(f"\tFAIL: query count depends on the number of DSOs")
+            ok = False
+    print("PASS" if ok else "FAIL")
+    return ok
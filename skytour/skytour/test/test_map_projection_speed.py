@@ -0,0 +1,62 @@
+import datetime, time
+from skyfield.api import Star
+from skyfield.projections import build_stereographic_projection
+from skytour.apps.astro.ephemeris import get_eph, get_timescale
+from skytour.apps.astro.markers import generate_equator, SPECIAL_POINTS
+from skytour.apps.dso.const_utils import get_boundary_lines
+from skytour.apps.dso.milky_way import get_list_of_segments
+from skytour.apps.dso.models import DSO
+from skytour.apps.plotting.projection import project_radec
+from skytour.apps.stars.vocabs import CONSTELLATION_LABELS
+
+"""
+Compare the per-point observe() the map layers used to do against the
+batch projection in plotting.projection.
+
+Run from the shell:
+    from skytour.test.test_map_projection_speed import run_tests
+    run_tests()
+"""
+
+def get_layers():
+    layers = {}
+    layers['equator'] = generate_equator()
+    layers['ecliptic'] = generate_equator(type='ecl')
+    layers['galactic'] = generate_equator(type='gal')
+    layers['milky_way'] = [p for s in get_list_of_segments(contour=1) for p in s]
+    layers['special_points'] = [(a['ra'], a['dec']) for a in SPECIAL_POINTS]
+    layers['constellation_labels'] = list(CONSTELLATION_LABELS.values())
+    lines, _ = get_boundary_lines('UMa', model_type='constellation')
+    layers['boundaries'] = [p for v in lines.values() for p in v]
+    layers['dsos'] = [(d.ra_float, d.dec_float) for d in DSO.objects.all()]
+    return layers
+
+def one_at_a_time(earth, t, projection, points):
+    for ra, dec in points:
+        x, y = projection(earth.at(t).observe(Star(ra_hours=ra, dec_degrees=dec)))
+
+def batch(earth, t, projection, points):
+    ra, dec = zip(*points)
+    x, y = project_radec(earth, t, projection, ra, dec)
+
+def show_times(label, times):
+    t0 = times[0][0]
+    print(f"{label}")
+    for (t1, _), (t2, name) in zip(times[:-1], times[1:]):
+        print(f"\t{t2-t1:8.4f}s\t{name}")
+    print(f"\t{times[-1][0]-t0:8.4f}s\tTOTAL")
+
+def run_tests(utdt=None):
+    utdt = datetime.datetime.now(datetime.timezone.utc) if utdt is None else utdt
+    ts = get_timescale()
+    t = ts.from_datetime(utdt)
+    earth = get_eph()['earth']
+    projection = build_stereographic_projection(earth.at(t).observe(Star(ra_hours=12., dec_degrees=40.)))
+    layers = get_layers()
+
+    for label, method in [('Before (one observe per point)', one_at_a_time), ('After (batch)', batch)]:
+        times = [(time.perf_counter(), 'Start')]
+        for name, points in layers.items():
+            method(earth, t, projection, points)
+            times.append((time.perf_counter(), f"{name} ({len(points)} points)"))
+        show_times(label, times)
@@ -0,0 +1,41 @@
+import os, tempfile
+import numpy as np
+import pandas as pd
+from ..apps.solar_system.orbit_store import OrbitStore, dataframe_to_records
+from ..apps.utils.files import save_npy
+
+"""
+The orbit store has to be memory-mappable: every text column must come out as
+a fixed-width unicode column, never as Python objects.
+
+Run with pytest, or from the shell:
+    from skytour.test.test_orbit_store import run_tests
+    run_tests()
+"""
+
+def sample_orbits():
+    return pd.DataFrame({
+        'designation': ['C/2023 A3 (Tsuchinshan-ATLAS)', '12P/Pons-Brooks', '2P/Encke'],
+        'reference': ['MPEC 2024-S12', None, 'MPC 12345'],
+        'perihelion_distance_au': [0.391, 0.781, 0.339],
+        'eccentricity': [1.0001, 0.9546, 0.8483],
+    })
+
+def test_orbit_store_mmap():
+    data = dataframe_to_records(sample_orbits())
+    for name in ['designation', 'reference']:
+        assert data.dtype[name].kind == 'U', f"{name} is {data.dtype[name]}"
+    with tempfile.TemporaryDirectory() as tmp:
+        path = save_npy(os.path.join(tmp, 'orbits.npy'), data)
+        store = OrbitStore(np.load(path, mmap_mode='r'))
+        assert len(store) == 3
+        row = store.get_row('12P/Pons-Brooks')
+        assert row['eccentricity'] == 0.9546
+        assert pd.isna(row['reference'])
+        assert store.get_row('2P/Encke')['reference'] == 'MPC 12345'
+        assert store.get_row('1P/Halley') is None
+        del store # release the map before the directory goes
+
+def run_tests():
+    test_orbit_store_mmap()
+    print("orbit store: OK")